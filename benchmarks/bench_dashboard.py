@@ -0,0 +1,174 @@
+"""Time load_data, update_dashboard and cold start on synthetic data of increasing size.
+
+For each size a synthetic dataset is written to a temporary directory and the dashboard is
+imported against it. Every measurement is timed over --repeat runs (median and min reported)
+and then run once more under tracemalloc for its peak memory. Results go to a JSON file so
+runs from different commits can be compared.
+
+    python benchmarks/bench_dashboard.py --sizes 300 10000 100000 --output bench.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from dashboard_module import load_dashboard
+from synthetic_data import write_dataset
+
+DEFAULT_SIZES = [300, 10_000, 100_000, 1_000_000]
+
+# Representative interactions: (position, min_minutes, search_term, u23_scope)
+FILTER_MIXES = {
+    "default_view": [("all", 0, "", "all")],
+    "position_views": [(pos, 0, "", "all") for pos in ("DF", "MF", "FW", "GK")],
+    "minutes_thresholds": [("all", minutes, "", "all") for minutes in (0, 90, 270, 450, 900)],
+    "scope_toggle": [("all", 0, "", "u23"), ("MF", 450, "", "u23")],
+    "search_typing": [("all", 0, prefix, "all") for prefix in ("j", "ja", "jac", "jack")],
+}
+
+def measure(func, repeat, setup=None):
+    """Run func repeat times (after setup each time); return timing and peak memory stats"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "median_s": statistics.median(timings), "min_s": min(timings),
+        "runs": repeat, "peak_memory_bytes": peak,
+    }
+
+# Run in a fresh interpreter: import the dashboard, then warm it as the servers do at startup
+COLD_START_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+from dashboard_module import load_dashboard
+dashboard = load_dashboard(sys.argv[2], module_name="a_league_dashboard_cold_start")
+dashboard.warm_data()
+print(json.dumps(dashboard.startup_seconds))
+"""
+
+def measure_cold_start(data_dir, repeat):
+    """Median import and time-to-ready of a new process (from the module's first line), and its wall time"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, "-c", COLD_START_SCRIPT, os.path.dirname(os.path.abspath(__file__)), data_dir],
+                                   capture_output=True, text=True, check=True)
+        runs.append(dict(json.loads(completed.stdout.strip().splitlines()[-1]), process=time.perf_counter() - start))
+    return {f"{phase}_median_s": statistics.median(run[phase] for run in runs) for phase in runs[0]}
+
+def bench_size(n_rows, repeat, workdir):
+    data_dir = os.path.join(workdir, f"rows_{n_rows}")
+    source_path = write_dataset(data_dir, n_rows)
+    dashboard = load_dashboard(data_dir, module_name=f"a_league_dashboard_bench_{n_rows}")
+    snapshot_path, snapshot_meta_path = dashboard._snapshot_paths(source_path)
+
+    def drop_snapshot():
+        for path in (snapshot_path, snapshot_meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def clear_caches():
+        dashboard.dashboard_cache.clear()
+        dashboard.selection_cache.clear()
+
+    result = {
+        "rows": n_rows,
+        "csv_bytes": os.path.getsize(source_path),
+        "load_data": {
+            "csv": measure(lambda: dashboard.load_data(use_snapshot=False), repeat),
+            "csv_and_write_snapshot": measure(dashboard.load_data, repeat, setup=drop_snapshot),
+            "snapshot": measure(dashboard.load_data, repeat),
+        },
+        "update_dashboard": {},
+    }
+    # Snapshot in place, as on a server that has run before
+    result["cold_start"] = measure_cold_start(data_dir, repeat)
+    dataset_df = dashboard.get_dataset(dashboard.normalize_scope(None, None)).df
+    result["dataframe_bytes"] = int(dataset_df.memory_usage(deep=True).sum())
+
+    for mix_name, filter_sets in FILTER_MIXES.items():
+        def run_mix():
+            for filters in filter_sets:
+                dashboard.update_dashboard(*filters)
+        result["update_dashboard"][mix_name] = {
+            "requests": len(filter_sets),
+            "cold": measure(run_mix, repeat, setup=clear_caches),
+            "cached": measure(run_mix, repeat),
+        }
+    return result
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_summary(result):
+    load = result["load_data"]
+    print(f"{result['rows']:>9} rows | csv {load['csv']['median_s'] * 1000:9.1f} ms"
+          f" | snapshot {load['snapshot']['median_s'] * 1000:8.1f} ms"
+          f" | frame {result['dataframe_bytes'] / 2**20:7.1f} MiB")
+    cold = result["cold_start"]
+    print(f"{'':>9}      cold start: import {cold['import_median_s']:6.2f} s, ready {cold['ready_median_s']:6.2f} s,"
+          f" process {cold['process_median_s']:6.2f} s")
+    for mix_name, mix in result["update_dashboard"].items():
+        per_request = mix["cold"]["median_s"] / mix["requests"] * 1000
+        cached = mix["cached"]["median_s"] / mix["requests"] * 1000
+        print(f"{'':>9}      {mix_name:<20} {per_request:8.2f} ms/request cold, {cached:7.3f} ms cached,"
+              f" peak {mix['cold']['peak_memory_bytes'] / 2**20:7.1f} MiB")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark load_data and update_dashboard on synthetic data")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Player-season row counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--workdir", help="Where to write the synthetic data (default: a temporary directory)")
+    args = parser.parse_args(argv)
+    output_path = os.path.abspath(args.output)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0], "platform": platform.platform(),
+        "pandas": pd.__version__, "numpy": np.__version__,
+        "repeat": args.repeat, "results": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="aleague_bench_") as tmp_dir:
+        workdir = args.workdir or tmp_dir
+        for n_rows in args.sizes:
+            result = bench_size(n_rows, args.repeat, workdir)
+            print_summary(result)
+            report["results"].append(result)
+        os.chdir(os.path.dirname(output_path))
+
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {output_path}")
+
+if __name__ == '__main__':
+    main()
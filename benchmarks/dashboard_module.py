@@ -0,0 +1,23 @@
+"""Import dashboard-code.py (not importable by name because of the hyphen) against a data directory"""
+import importlib.util
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DASHBOARD_PATH = os.path.join(REPO_DIR, "dashboard-code.py")
+
+def load_dashboard(data_dir, module_name="a_league_dashboard_bench"):
+    """Import a fresh copy of the dashboard with data_dir as the working directory.
+
+    load_data and the data store use paths relative to the working directory, so the
+    process stays in data_dir afterwards.
+    """
+    os.environ.setdefault("DASHBOARD_LOG_LEVEL", "WARNING")
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR) # for the dashboard's sibling modules (name_keys)
+    os.chdir(data_dir)
+    spec = importlib.util.spec_from_file_location(module_name, DASHBOARD_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,390 @@
+"""Load-test /_dash-update-component with simulated concurrent dashboard users.
+
+Each simulated user opens the dashboard (the layout, then the initial callbacks) and keeps
+changing filters until the run ends: position, minutes threshold, U23 scope, seasons, typing
+a player search a letter at a time, paging the players table and looking up similar players,
+with a random think time in between. As in the browser, a change fires every server callback
+that takes the changed property as an input, up to 6 at a time, and callbacks whose inputs are
+outputs of those fire once they have answered. Clientside callbacks run in the browser and are
+not replayed.
+
+Requests go through the Flask test client of an in-process dashboard on synthetic data (or on
+--data-dir), or over HTTP to a running instance with --url. Throughput, p50/p95/p99 latency and
+error rate are reported per callback (named by its first output, as in /metrics) and the time
+from a change to its last response per kind of action. Results go to a JSON file.
+
+    python benchmarks/load_test.py --users 1 5 20 --duration 30 --rows 10000 --output load.json
+    python benchmarks/load_test.py --url http://localhost:8050 --users 20
+"""
+import argparse
+import gzip
+import http.client
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from bench_dashboard import git_commit
+from dashboard_module import load_dashboard
+from synthetic_data import write_dataset
+
+UPDATE_PATH = "/_dash-update-component"
+REQUEST_HEADERS = {"Content-Type": "application/json", "Accept-Encoding": "gzip"}
+MAX_PARALLEL_REQUESTS = 6  # per user, as browsers limit connections per host
+MAX_CALLBACK_ROUNDS = 10
+
+# How often a scout takes each kind of action, relative to the others
+ACTION_WEIGHTS = {
+    "position": 3, "minutes": 2, "u23_scope": 2, "search": 2,
+    "table_page": 2, "seasons": 1, "similar_player": 1,
+}
+
+# --- Transports ---
+
+class FlaskClientTransport:
+    """Requests through the Flask test client of an in-process dashboard, one client per thread"""
+    def __init__(self, server):
+        self.server = server
+        self.local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = self.server.test_client()
+        response = client.open(path, method=method, data=body, headers=REQUEST_HEADERS)
+        return response.status_code, response.headers.get("Content-Encoding"), response.get_data()
+
+class HttpTransport:
+    """Requests to a running dashboard, one keep-alive connection per thread"""
+    def __init__(self, url):
+        parsed = urllib.parse.urlsplit(url)
+        self.connection_class = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        self.netloc, self.prefix = parsed.netloc, parsed.path.rstrip("/")
+        self.local = threading.local()
+
+    def request(self, method, path, body=None):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self.local.connection = self.connection_class(self.netloc, timeout=60)
+        try:
+            connection.request(method, self.prefix + path, body=body, headers=REQUEST_HEADERS)
+            response = connection.getresponse()
+            return response.status, response.getheader("Content-Encoding"), response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self.local.connection = None
+            raise
+
+def fetch_json(transport, path):
+    status, encoding, body = transport.request("GET", path)
+    if status != 200:
+        raise RuntimeError(f"GET {path} returned {status}")
+    return json.loads(gzip.decompress(body) if encoding == "gzip" else body)
+
+# --- Callbacks ---
+
+class Callback:
+    """A server callback from /_dash-dependencies"""
+    def __init__(self, dependency):
+        self.output = dependency["output"]
+        specs = self.output[2:-2].split("...") if self.output.startswith("..") else [self.output]
+        # Properties may carry an '@<hash>' suffix (allow_duplicate); it is sent back as is
+        self.outputs = [tuple(spec.rsplit(".", 1)) for spec in specs]
+        self.inputs = [(item["id"], item["property"]) for item in dependency["inputs"]]
+        self.state = [(item["id"], item["property"]) for item in dependency["state"]]
+        self.prevent_initial_call = dependency.get("prevent_initial_call", False)
+        self.name = self.outputs[0][0]
+        self.output_props = {(component_id, prop.split("@")[0]) for component_id, prop in self.outputs}
+
+def load_callbacks(transport):
+    """Server callbacks of the dashboard; clientside and pattern-matching ones are skipped"""
+    return [
+        Callback(dependency) for dependency in fetch_json(transport, "/_dash-dependencies")
+        if not dependency.get("clientside_function")
+        and not any(item["id"].startswith("{") for item in dependency["inputs"] + dependency["state"])
+    ]
+
+def layout_props(node, props=None):
+    """(id, property) -> value for every component with an id in a /_dash-layout tree"""
+    props = {} if props is None else props
+    if isinstance(node, list):
+        for child in node:
+            layout_props(child, props)
+    elif isinstance(node, dict) and "props" in node:
+        component_id = node["props"].get("id")
+        for prop, value in node["props"].items():
+            if isinstance(component_id, str):
+                props[(component_id, prop)] = value
+            if prop == "children" or isinstance(value, (list, dict)):
+                layout_props(value, props)
+    return props
+
+# --- Simulated Users ---
+
+class Recorder:
+    """Latencies and outcomes of every request and action, shared by all users"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = defaultdict(list)  # callback name -> [(seconds, ok)]
+        self.actions = defaultdict(list)  # action kind -> [seconds]
+
+    def request(self, name, seconds, ok):
+        with self.lock:
+            self.requests[name].append((seconds, ok))
+
+    def action(self, kind, seconds):
+        with self.lock:
+            self.actions[kind].append(seconds)
+
+class UserSession:
+    """One dashboard tab: its component properties and the callbacks its changes fire"""
+    def __init__(self, transport, callbacks, recorder, rng, executor):
+        self.transport, self.callbacks, self.recorder = transport, callbacks, recorder
+        self.rng, self.executor = rng, executor
+        self.props = {}
+
+    def open_dashboard(self):
+        start = time.perf_counter()
+        try:
+            self.props = layout_props(fetch_json(self.transport, "/_dash-layout"))
+            ok = True
+        except (OSError, http.client.HTTPException, RuntimeError, ValueError):
+            ok = False
+        self.recorder.request("_dash-layout", time.perf_counter() - start, ok)
+        if ok:
+            self.run_callbacks([cb for cb in self.callbacks if not cb.prevent_initial_call], set())
+        self.recorder.action("open_dashboard", time.perf_counter() - start)
+        return ok
+
+    def change(self, kind, changes):
+        """Set component properties as the user would and wait for every callback it fires"""
+        start = time.perf_counter()
+        self.props.update(changes)
+        self.run_callbacks([cb for cb in self.callbacks if set(cb.inputs) & changes.keys()], set(changes))
+        self.recorder.action(kind, time.perf_counter() - start)
+
+    def run_callbacks(self, pending, changed):
+        # Like the renderer: a callback waits while another pending callback writes one of its inputs
+        for _ in range(MAX_CALLBACK_ROUNDS):
+            if not pending:
+                return
+            ready = [cb for cb in pending if not any(set(cb.inputs) & other.output_props for other in pending if other is not cb)]
+            ready = ready or pending
+            pending = [cb for cb in pending if cb not in ready]
+            updates = {}
+            for result in self.executor.map(lambda cb: self.fire(cb, changed), ready):
+                updates.update(result)
+            self.props.update(updates)
+            changed = set(updates)
+            pending += [cb for cb in self.callbacks if cb not in pending and set(cb.inputs) & changed]
+
+    def fire(self, callback, changed):
+        """POST one callback; returns the properties it updated"""
+        def prop_payload(component_id, prop):
+            item = {"id": component_id, "property": prop}
+            if (component_id, prop) in self.props:
+                item["value"] = self.props[(component_id, prop)]
+            return item
+        outputs = [{"id": component_id, "property": prop} for component_id, prop in callback.outputs]
+        body = json.dumps({
+            "output": callback.output,
+            "outputs": outputs if callback.output.startswith("..") else outputs[0],
+            "inputs": [prop_payload(*item) for item in callback.inputs],
+            "state": [prop_payload(*item) for item in callback.state],
+            "changedPropIds": [f"{component_id}.{prop}" for component_id, prop in callback.inputs if (component_id, prop) in changed],
+        }).encode()
+
+        start = time.perf_counter()
+        updates, ok = {}, False
+        try:
+            status, encoding, content = self.transport.request("POST", UPDATE_PATH, body)
+            if status == 200:
+                response = json.loads(gzip.decompress(content) if encoding == "gzip" else content).get("response", {})
+                updates = {(component_id, prop): value for component_id, props in response.items() for prop, value in props.items()}
+                # A Patch edits the property in place; keep the full value it was applied to
+                updates = {key: value for key, value in updates.items()
+                           if not (isinstance(value, dict) and "__dash_patch_update" in value and key in self.props)}
+            ok = status in (200, 204)  # 204: PreventUpdate
+        except (OSError, http.client.HTTPException, ValueError):
+            pass
+        self.recorder.request(callback.name, time.perf_counter() - start, ok)
+        return updates
+
+    # -- Actions --
+
+    def option_values(self, component_id):
+        options = self.props.get((component_id, "options")) or []
+        return [option["value"] if isinstance(option, dict) else option for option in options]
+
+    def pick_other(self, component_id):
+        """A different option of a dropdown or radio group, or None if there is none"""
+        current = self.props.get((component_id, "value"))
+        values = [value for value in self.option_values(component_id) if value != current]
+        return self.rng.choice(values) if values else None
+
+    def player_name_word(self):
+        names = [row.get("Player") for row in self.props.get(("players-table", "data")) or [] if row.get("Player")]
+        if not names:
+            return None
+        return self.rng.choice(str(self.rng.choice(names)).split())
+
+    def act(self, kind):
+        """Take one action of the given kind; returns False if the page doesn't allow it"""
+        if kind in ("position", "minutes", "u23_scope"):
+            component_id = {"position": "position-filter", "minutes": "min-minutes-filter", "u23_scope": "u23-filter-toggle"}[kind]
+            value = self.pick_other(component_id)
+            if value is None:
+                return False
+            self.change(kind, {(component_id, "value"): value})
+        elif kind == "seasons":
+            values = self.option_values("season-filter")
+            if not values:
+                return False
+            self.change(kind, {("season-filter", "value"): self.rng.sample(values, self.rng.randint(1, min(3, len(values))))})
+        elif kind == "search":
+            if self.props.get(("player-search", "value")):
+                self.change(kind, {("player-search", "value"): ""})
+                return True
+            word = self.player_name_word()
+            if word is None:
+                return False
+            # Each longer prefix is a new search, as when the user types and submits again
+            for length in range(2, min(len(word), 5) + 1):
+                self.change(kind, {("player-search", "value"): word[:length]})
+        elif kind == "table_page":
+            page_count = self.props.get(("players-table", "page_count")) or 0
+            if page_count < 2:
+                return False
+            self.change(kind, {("players-table", "page_current"): self.rng.randrange(page_count)})
+        elif kind == "similar_player":
+            word = self.player_name_word()
+            if word is None or ("similar-player", "search_value") not in {item for cb in self.callbacks for item in cb.inputs}:
+                return False
+            self.change(kind, {("similar-player", "search_value"): word[:3]})
+            values = self.option_values("similar-player")
+            if values:
+                self.change(kind, {("similar-player", "value"): self.rng.choice(values)})
+        return True
+
+def run_user(transport, callbacks, recorder, rng, deadline, think_time):
+    with ThreadPoolExecutor(MAX_PARALLEL_REQUESTS) as executor:
+        session = UserSession(transport, callbacks, recorder, rng, executor)
+        if not session.open_dashboard():
+            return
+        kinds, weights = list(ACTION_WEIGHTS), list(ACTION_WEIGHTS.values())
+        while time.perf_counter() < deadline:
+            session.act(rng.choices(kinds, weights)[0])
+            if think_time > 0:
+                time.sleep(min(rng.expovariate(1 / think_time), max(deadline - time.perf_counter(), 0)))
+
+# --- Reporting ---
+
+def latency_stats(seconds):
+    p50, p95, p99 = np.percentile(np.asarray(seconds) * 1000, [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+def summarize(recorder, elapsed):
+    def callback_stats(samples):
+        errors = sum(1 for _, ok in samples if not ok)
+        return {
+            "requests": len(samples), "throughput_rps": len(samples) / elapsed,
+            "errors": errors, "error_rate": errors / len(samples),
+            **latency_stats([seconds for seconds, _ in samples]),
+        }
+    all_samples = [sample for samples in recorder.requests.values() for sample in samples]
+    return {
+        "elapsed_s": elapsed,
+        "total": callback_stats(all_samples) if all_samples else None,
+        "callbacks": {name: callback_stats(samples) for name, samples in sorted(recorder.requests.items())},
+        "actions": {kind: {"count": len(samples), **latency_stats(samples)} for kind, samples in sorted(recorder.actions.items())},
+    }
+
+def run_load(transport, n_users, duration, think_time, ramp_up, seed):
+    """Run n_users simulated users for duration seconds (plus ramp_up) and summarize"""
+    callbacks = load_callbacks(transport)
+    recorder = Recorder()
+    start = time.perf_counter()
+    deadline = start + ramp_up + duration
+
+    def start_user(index):
+        time.sleep(ramp_up * index / n_users)
+        run_user(transport, callbacks, recorder, random.Random(f"{seed}-{index}"), deadline, think_time)
+
+    threads = [threading.Thread(target=start_user, args=(index,), daemon=True) for index in range(n_users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return dict(users=n_users, **summarize(recorder, time.perf_counter() - start))
+
+def print_summary(result):
+    total = result["total"]
+    if total is None:
+        print(f"{result['users']:>5} users | no requests completed")
+        return
+    print(f"{result['users']:>5} users | {total['requests']} requests, {total['throughput_rps']:7.1f} req/s,"
+          f" p50 {total['p50_ms']:7.1f} ms, p95 {total['p95_ms']:7.1f} ms, p99 {total['p99_ms']:7.1f} ms,"
+          f" errors {total['error_rate']:6.2%}")
+    for name, stats in result["callbacks"].items():
+        print(f"{'':>5}       {name:<24} {stats['requests']:>7} {stats['throughput_rps']:7.1f} req/s"
+              f" | p50 {stats['p50_ms']:7.1f} p95 {stats['p95_ms']:7.1f} p99 {stats['p99_ms']:7.1f} ms"
+              f" | errors {stats['error_rate']:6.2%}")
+    for kind, stats in result["actions"].items():
+        print(f"{'':>5}       action {kind:<17} {stats['count']:>7}"
+              f"            | p50 {stats['p50_ms']:7.1f} p95 {stats['p95_ms']:7.1f} p99 {stats['p99_ms']:7.1f} ms")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the dashboard callbacks with simulated users")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 5, 20], help="Concurrent users, one run per value")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per run, after ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=5, help="Seconds over which the users start")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean seconds between a user's actions (0: none)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="Test a running dashboard instead of an in-process one")
+    parser.add_argument("--rows", type=int, default=10_000, help="Synthetic player-season rows for the in-process dashboard")
+    parser.add_argument("--data-dir", help="Data directory for the in-process dashboard instead of synthetic data")
+    parser.add_argument("--output", default="load_results.json")
+    args = parser.parse_args(argv)
+    output_path = os.path.abspath(args.output)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0], "platform": platform.platform(),
+        "target": args.url or "in-process",
+        "rows": None if args.url or args.data_dir else args.rows, "data_dir": args.data_dir,
+        "duration_s": args.duration, "ramp_up_s": args.ramp_up, "think_time_s": args.think_time,
+        "seed": args.seed, "results": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="aleague_load_") as tmp_dir:
+        if args.url:
+            transport = HttpTransport(args.url)
+        else:
+            data_dir = os.path.abspath(args.data_dir) if args.data_dir else os.path.join(tmp_dir, f"rows_{args.rows}")
+            if not args.data_dir:
+                write_dataset(data_dir, args.rows)
+            dashboard = load_dashboard(data_dir, module_name="a_league_dashboard_load_test")
+            dashboard.warm_data()
+            transport = FlaskClientTransport(dashboard.server)
+        for n_users in args.users:
+            result = run_load(transport, n_users, args.duration, args.think_time, args.ramp_up, args.seed)
+            print_summary(result)
+            report["results"].append(result)
+        os.chdir(os.path.dirname(output_path))
+
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {output_path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Synthetic FBref-shaped player data for benchmarking the dashboard.
+
+The generated columns use the FBref export names that load_data's column_mapping_attempts
+maps (e.g. 'Playing Time Min', 'Performance Gls'), so the full cleaning path is exercised.
+
+    python benchmarks/synthetic_data.py --rows 100000 --out /tmp/aleague_bench
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+TEAMS = [
+    'Adelaide United', 'Auckland FC', 'Brisbane Roar', 'Central Coast Mariners', 'Macarthur FC',
+    'Melbourne City', 'Melbourne Victory', 'Newcastle Jets', 'Perth Glory', 'Sydney FC',
+    'Western Sydney Wanderers', 'Wellington Phoenix', 'Western United',
+]
+POSITIONS = ['GK', 'DF', 'MF', 'FW', 'DF,MF', 'MF,DF', 'MF,FW', 'FW,MF', 'DF,FW']
+POSITION_WEIGHTS = [0.08, 0.28, 0.24, 0.16, 0.06, 0.05, 0.06, 0.05, 0.02]
+FIRST_NAMES = ['Jack', 'Liam', 'Noah', 'José', 'Zoë', 'Ángel', 'Nikola', 'Mohamed', 'Kai', 'Luka', 'Ryan', 'Jordan']
+LAST_NAMES = ['Smith', 'Jones', 'Müller', 'Brown', 'Ćirić', 'Nguyen', "O'Neill", 'García', 'Taggart', 'Kuol', 'Mabil', 'Đurić']
+
+def generate_players(n_rows, seed=0):
+    """DataFrame of n_rows player-season rows with FBref standard/shooting/passing/defense columns"""
+    rng = np.random.default_rng(seed)
+    minutes = np.minimum(rng.gamma(1.4, 700, n_rows), 2430).astype(int)
+    matches = np.minimum(np.ceil(minutes / rng.uniform(45, 90, n_rows)), 26).astype(int)
+    nineties = np.round(minutes / 90, 1)
+    shots = rng.poisson(nineties * 1.2)
+    on_target = rng.binomial(shots, 0.35)
+    goals = rng.binomial(on_target, 0.3)
+    tackles = rng.poisson(nineties * 1.5)
+    names = np.char.add(np.char.add(rng.choice(FIRST_NAMES, n_rows), ' '), rng.choice(LAST_NAMES, n_rows))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df = pd.DataFrame({
+            'Player': np.char.add(np.char.add(names, ' '), np.arange(n_rows).astype(str)),
+            'Pos': rng.choice(POSITIONS, n_rows, p=POSITION_WEIGHTS),
+            'Squad': rng.choice(TEAMS, n_rows),
+            'Age': rng.integers(16, 38, n_rows),
+            'Playing Time MP': matches,
+            'Playing Time Min': minutes,
+            'Playing Time 90s': nineties,
+            'Performance Gls': goals,
+            'Performance Ast': rng.poisson(nineties * 0.1),
+            'Standard Sh': shots,
+            'Standard SoT': on_target,
+            'Standard SoT%': np.where(shots > 0, np.round(on_target / shots * 100, 1), np.nan),
+            'Standard G/Sh': np.where(shots > 0, np.round(goals / shots, 2), np.nan),
+            'Expected Goals': np.round(shots * rng.uniform(0.05, 0.15, n_rows), 1),
+            'Key Passes': rng.poisson(nineties * 0.8),
+            'Expected Assists': np.round(rng.gamma(1.0, 0.08, n_rows) * nineties, 1),
+            'Passes Completed': rng.poisson(nineties * 30),
+            'Tackles Tkl': tackles,
+            'Tackles Won %': np.where(tackles > 0, np.round(rng.uniform(20, 80, n_rows), 1), np.nan),
+        })
+    return df
+
+def write_dataset(directory, n_rows, seed=0):
+    """Write the merged CSV where load_data looks for it under directory; return its path"""
+    path = os.path.join(directory, "a_league_data", "merged_player_stats.csv")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    generate_players(n_rows, seed).to_csv(path, index=False)
+    return path
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=".", help="Directory to write a_league_data/merged_player_stats.csv into")
+    args = parser.parse_args()
+    print(f"Wrote {args.rows} rows to {write_dataset(args.out, args.rows, args.seed)}")
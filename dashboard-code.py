@@ -1,329 +1,1717 @@
+import time
+STARTED_AT = time.perf_counter() # cold-start measurements count from here, before the heavy imports
 import dash
 # Make sure to import Input, Output, State if you haven't
-from dash import dcc, html, dash_table, Input, Output, State
-import plotly.express as px
-import plotly.graph_objects as go
+from dash import dcc, html, dash_table, Input, Output, State, Patch, ctx, no_update
+from dash.dash_table.Format import Format, Scheme, Symbol
 import pandas as pd
+import numpy as np
 import webbrowser
-from threading import Timer
+from threading import Timer, Lock, RLock, Thread, Event
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import os
+import json
+import re
+import hashlib
+import argparse
+import sys
+import gc
+import signal
+import gzip
+import logging
+from bisect import bisect_left
+from contextlib import contextmanager
+from html import escape
+from flask import Response, request
+from name_keys import fold_name, slugify
+
+# --- Logging ---
+# Diagnostics go through the "a_league_dashboard" logger. Set DASHBOARD_LOG_LEVEL=DEBUG to see
+# per-column cleaning messages and per-span timings; the default INFO only reports loads and problems.
+logging.basicConfig(
+    level=os.environ.get("DASHBOARD_LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger("a_league_dashboard")
+
+# --- Timing Metrics ---
+# Cumulative latency histogram bucket bounds, in seconds
+METRIC_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class Metrics:
+    """Running call counts, error counts and latency histograms per named span, and response sizes"""
+
+    def __init__(self, buckets=METRIC_BUCKETS):
+        self.buckets = buckets
+        self._spans = {} # name -> {"counts": per-bucket counts (+Inf last), "sum": seconds, "errors": n}
+        self._payloads = {} # name -> {"responses": n, "raw": bytes before compression, "sent": bytes sent}
+        self._lock = Lock()
+
+    def observe(self, name, seconds, error=False):
+        with self._lock:
+            span = self._spans.get(name)
+            if span is None:
+                span = self._spans[name] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "errors": 0}
+            span["counts"][bisect_left(self.buckets, seconds)] += 1
+            span["sum"] += seconds
+            span["errors"] += error
+
+    def observe_payload(self, name, raw_bytes, sent_bytes):
+        with self._lock:
+            payload = self._payloads.setdefault(name, {"responses": 0, "raw": 0, "sent": 0})
+            payload["responses"] += 1
+            payload["raw"] += raw_bytes
+            payload["sent"] += sent_bytes
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(span, counts=list(span["counts"])) for name, span in self._spans.items()}
+
+    def prometheus_lines(self):
+        """Spans in Prometheus text exposition format"""
+        spans = self.snapshot()
+        lines = [
+            "# HELP dashboard_span_seconds Time spent in each dashboard callback and phase.",
+            "# TYPE dashboard_span_seconds histogram",
+        ]
+        for name, span in sorted(spans.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), span["counts"]):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append(f'dashboard_span_seconds_bucket{{span="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'dashboard_span_seconds_sum{{span="{name}"}} {span["sum"]:.6f}')
+            lines.append(f'dashboard_span_seconds_count{{span="{name}"}} {cumulative}')
+        lines += ["# HELP dashboard_span_errors_total Spans that raised an exception.", "# TYPE dashboard_span_errors_total counter"]
+        lines += [f'dashboard_span_errors_total{{span="{name}"}} {span["errors"]}' for name, span in sorted(spans.items())]
+        with self._lock:
+            payloads = {name: dict(payload) for name, payload in self._payloads.items()}
+        lines += ["# HELP dashboard_response_bytes_total Callback response bytes before compression (raw) and as sent.",
+                  "# TYPE dashboard_response_bytes_total counter"]
+        for name, payload in sorted(payloads.items()):
+            lines.append(f'dashboard_response_bytes_total{{callback="{name}",size="raw"}} {payload["raw"]}')
+            lines.append(f'dashboard_response_bytes_total{{callback="{name}",size="sent"}} {payload["sent"]}')
+        lines += ["# TYPE dashboard_responses_total counter"]
+        lines += [f'dashboard_responses_total{{callback="{name}"}} {payload["responses"]}' for name, payload in sorted(payloads.items())]
+        return lines
+
+metrics = Metrics()
+
+@contextmanager
+def timed(name):
+    """Record the wall time of a block (or, used as a decorator, of each call) under name"""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe(name, elapsed, error)
+        logger.debug("span %s took %.2f ms", name, elapsed * 1000)
+
+# --- Snapshot Cache ---
+# After the first clean load, the typed DataFrame is written next to the source CSV as a
+# Parquet snapshot (e.g. a_league_data/.snapshot/merged_player_stats.parquet) with a small
+# JSON sidecar recording the source file's mtime, size and SHA-256. Later starts read the
+# snapshot instead of re-parsing the CSV and re-running the column mapping / numeric coercion.
+SNAPSHOT_DIR_NAME = ".snapshot"
+# Bump this whenever the cleaning steps in load_data change, so old snapshots are rebuilt.
+SNAPSHOT_FORMAT_VERSION = 2
+
+def _snapshot_paths(source_path):
+    """Return (parquet_path, meta_path) for the snapshot of a source CSV"""
+    snapshot_dir = os.path.join(os.path.dirname(source_path), SNAPSHOT_DIR_NAME)
+    base_name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(snapshot_dir, base_name + ".parquet"), os.path.join(snapshot_dir, base_name + ".json")
+
+def _file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _write_json_atomic(path, payload):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+def read_snapshot(source_path):
+    """Return the cached DataFrame for source_path, or None if missing or stale.
+
+    A snapshot is fresh when the source's mtime and size match the sidecar. If the mtime
+    changed (file touched or re-copied), the content hash decides: an identical hash keeps
+    the snapshot (and refreshes the recorded mtime), a different hash invalidates it.
+    """
+    snapshot_path, meta_path = _snapshot_paths(source_path)
+    if not (os.path.exists(snapshot_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            logger.info("Snapshot for %s was written by an older loader. Rebuilding.", source_path)
+            return None
+        stat = os.stat(source_path)
+        if meta.get("mtime_ns") != stat.st_mtime_ns or meta.get("size") != stat.st_size:
+            if meta.get("size") != stat.st_size or meta.get("sha256") != _file_sha256(source_path):
+                logger.info("Source %s changed since the snapshot was written. Rebuilding.", source_path)
+                return None
+            meta["mtime_ns"] = stat.st_mtime_ns
+            _write_json_atomic(meta_path, meta)
+        df = pd.read_parquet(snapshot_path)
+        logger.info("Loaded snapshot: %d players, %d columns from %s", len(df), len(df.columns), snapshot_path)
+        return df
+    except ImportError:
+        logger.info("pyarrow not installed, snapshot cache disabled.")
+    except Exception as e:
+        logger.warning("Could not read snapshot %s: %s. Falling back to CSV.", snapshot_path, e)
+    return None
+
+def write_snapshot(df, source_path):
+    """Write the cleaned DataFrame as a Parquet snapshot of source_path"""
+    snapshot_path, meta_path = _snapshot_paths(source_path)
+    try:
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        stat = os.stat(source_path)
+        tmp_path = snapshot_path + ".tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, snapshot_path)
+        _write_json_atomic(meta_path, {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "source": os.path.abspath(source_path),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": _file_sha256(source_path),
+        })
+        logger.info("Wrote snapshot to %s", snapshot_path)
+    except ImportError:
+        logger.info("pyarrow not installed, snapshot cache disabled.")
+    except Exception as e:
+        logger.warning("Could not write snapshot %s: %s", snapshot_path, e)
+
+# --- Column Schema ---
+# Compact dtypes for the player table, applied once cleaning is done: team, position and season
+# names become categoricals, counting stats the narrowest nullable integer that holds them, and
+# rates/averages float32. A count column with fractional values (e.g. a pro-rated export) falls
+# back to float32 rather than being rounded.
+CATEGORY_COLUMNS = ['Squad', 'Pos', 'Season']
+COUNT_COLUMNS = ['Age', 'MP', 'Min', 'Gls', 'Ast', 'Sh', 'SoT', 'KP', 'Cmp', 'Tkl']
+RATE_COLUMNS = ['SoT%', 'G/Sh', '90s', 'xG', 'xA', 'Tkl%']
+NULLABLE_INT_DTYPES = ['Int8', 'Int16', 'Int32', 'Int64']
+
+def _narrow_int_dtype(values):
+    """Smallest nullable integer dtype for a float array, or None if a value has a fraction"""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return NULLABLE_INT_DTYPES[0]
+    if not np.array_equal(values, np.round(values)):
+        return None
+    low, high = values.min(), values.max()
+    for dtype in NULLABLE_INT_DTYPES:
+        bounds = np.iinfo(dtype.lower())
+        if bounds.min <= low and high <= bounds.max:
+            return dtype
+    return None
+
+def apply_player_schema(df):
+    """Cast the player table to the compact schema; columns already in it are left as they are.
+
+    Nullable integer columns are narrowed again, since a concat (e.g. a matchweek ingest adding
+    players) can widen them to Int64.
+    """
+    casts = {}
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            casts[col] = 'category'
+    for col in COUNT_COLUMNS:
+        if col in df.columns:
+            values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            dtype = _narrow_int_dtype(values) or 'float32'
+            if str(df[col].dtype) != dtype:
+                casts[col] = dtype
+    for col in RATE_COLUMNS:
+        if col in df.columns and df[col].dtype != 'float32':
+            casts[col] = 'float32'
+    return df.astype(casts) if casts else df
+
+MERGED_DATA_PATH = "a_league_data/merged_player_stats.csv"
+STANDARD_DATA_PATH = "a_league_processed/standard_stats_processed.csv"
 
 # --- Data Loading Function (assuming it's mostly correct, added Cmp, Tkl, Tkl% attempts) ---
-def load_data():
+def load_data(use_snapshot=True):
     """Load and prepare the merged player data for the dashboard"""
-    print("Attempting to load data...")
+    logger.info("Attempting to load data...")
     try:
-        merged_path = "a_league_data/merged_player_stats.csv"
-        standard_path = "a_league_processed/standard_stats_processed.csv"
+        merged_path, standard_path = MERGED_DATA_PATH, STANDARD_DATA_PATH
 
         if os.path.exists(merged_path):
-            df = pd.read_csv(merged_path)
-            print(f"Loaded merged data: {len(df)} players, {len(df.columns)} columns from {merged_path}")
+            source_path, source_label = merged_path, "merged"
         elif os.path.exists(standard_path):
-            df = pd.read_csv(standard_path)
-            print(f"Loaded standard data: {len(df)} players, {len(df.columns)} columns from {standard_path}")
+            source_path, source_label = standard_path, "standard"
         else:
-            print(f"CRITICAL: No data files found at expected locations:")
-            print(f" - Searched for: {os.path.abspath(merged_path)}")
-            print(f" - Searched for: {os.path.abspath(standard_path)}")
+            logger.critical("No data files found at expected locations: %s, %s",
+                            os.path.abspath(merged_path), os.path.abspath(standard_path))
             return pd.DataFrame(columns=['Player', 'Pos', 'Squad', 'Age', 'Min', 'Gls', 'Ast', 'MP', 'U23', 'Cmp', 'Tkl', 'Tkl%']) # Add expected cols
 
-        print("First 10 columns found:", df.columns[:10].tolist())
-
-        # --- Column Mapping & Cleaning ---
-        column_mapping_attempts = {
-            'Player': ['Player', 'Player Name'], 'Squad': ['Squad', 'Team'], 'Age': ['Age'],
-            'Min': ['Min', 'Playing Time Min', 'Minutes Played'], 'Gls': ['Gls', 'Performance Gls', 'Goals'],
-            'Ast': ['Ast', 'Performance Ast', 'Assists'], 'MP': ['MP', 'Playing Time MP', 'Matches Played'],
-            'Sh': ['Sh', 'Standard Sh', 'Shots'], 'SoT': ['SoT', 'Standard SoT', 'Shots on Target'],
-            'SoT%': ['SoT%', 'Standard SoT%', 'Shot Accuracy %'], 'G/Sh': ['G/Sh', 'Standard G/Sh', 'Goals per Shot'],
-            'Pos': ['Pos', 'Position'], '90s': ['90s', 'Playing Time 90s'],
-            'xG': ['xG', 'Expected Goals'], 'KP': ['KP', 'Key Passes'], 'xA': ['xA', 'Expected Assists'],
-            # Add potential names for new stats
-            'Cmp': ['Cmp', 'Passes Completed', 'Total Cmp'], # Passes Completed
-            'Tkl': ['Tkl', 'Tackles', 'Tackles Tkl'], # Tackles Won
-            'Tkl%': ['Tkl%', 'Tackles Won %', 'TklW%'] # Tackle Success Rate
-        }
-        actual_mapping = {}
-        found_columns = []
-        for target_col, potential_names in column_mapping_attempts.items():
-            found = False
-            for potential_name in potential_names:
-                if potential_name in df.columns:
-                    if potential_name != target_col:
-                         actual_mapping[potential_name] = target_col
-                    found_columns.append(target_col)
-                    found = True
-                    break
-            if not found:
-                 # Don't make missing optional columns like xG, KP, Cmp, Tkl fatal warnings
-                 if target_col not in ['xG', 'KP', 'xA', 'Cmp', 'Tkl', 'Tkl%']:
-                    print(f"Warning: Required column '{target_col}' not found using potential names: {potential_names}")
-                 else:
-                    print(f"Info: Optional column '{target_col}' not found.")
-
-        if actual_mapping:
-            print("Applying column mapping:", actual_mapping)
-            df = df.rename(columns=actual_mapping)
-        print("Columns after potential renaming:", df.columns.tolist())
-
-        # --- Ensure Numeric Types ---
-        numeric_targets = ['Age', 'Min', 'Gls', 'Ast', 'MP', 'Sh', 'SoT', 'SoT%', 'G/Sh', '90s', 'xG', 'KP', 'xA', 'Cmp', 'Tkl', 'Tkl%']
-        for col in numeric_targets:
-            if col in df.columns:
-                try:
-                    # Special handling for percentages which might have '%' sign
-                    if '%' in col and df[col].dtype == 'object':
-                        df[col] = df[col].str.replace('%', '', regex=False)
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                    print(f"Converted '{col}' to numeric.")
-                except Exception as e:
-                    print(f"Error converting '{col}' to numeric: {e}. Check data.")
-
-        # --- Ensure U23 Flag ---
-        if 'Age' in df.columns:
-            if 'U23' not in df.columns:
-                df['U23'] = df['Age'] < 23
-                u23_count = df['U23'].sum()
-                print(f"Added 'U23' flag based on 'Age'. Found {u23_count} players under 23.")
-            else:
-                 df['U23'] = df['U23'].astype(bool)
-                 print("'U23' column already exists. Ensured boolean type.")
-        elif 'U23' not in df.columns:
-            print("Warning: 'Age' column not found. Cannot create 'U23' flag.")
-            df['U23'] = False
+        if use_snapshot:
+            df = read_snapshot(source_path)
+            if df is not None:
+                return df
 
-        print(f"Data loading complete. Final DataFrame shape: {df.shape}")
+        df = pd.read_csv(source_path)
+        logger.info("Loaded %s data: %d players, %d columns from %s", source_label, len(df), len(df.columns), source_path)
+        df = clean_player_data(df)
+        if use_snapshot:
+            write_snapshot(df, source_path)
         return df
 
     except FileNotFoundError as e:
-         print(f"Error: Data file not found. {e}")
+         logger.error("Data file not found. %s", e)
          return pd.DataFrame(columns=['Player', 'Pos', 'Squad', 'Age', 'Min', 'Gls', 'Ast', 'MP', 'U23', 'Cmp', 'Tkl', 'Tkl%'])
     except Exception as e:
-        print(f"An unexpected error occurred during data loading: {e}")
+        logger.exception("An unexpected error occurred during data loading: %s", e)
         return pd.DataFrame(columns=['Player', 'Pos', 'Squad', 'Age', 'Min', 'Gls', 'Ast', 'MP', 'U23', 'Cmp', 'Tkl', 'Tkl%'])
 
+def clean_player_data(df):
+    """Map FBref column names to the dashboard's, coerce numeric columns and add the U23 flag"""
+    logger.debug("First 10 columns found: %s", df.columns[:10].tolist())
+
+    # --- Column Mapping & Cleaning ---
+    column_mapping_attempts = {
+        'Player': ['Player', 'Player Name'], 'Squad': ['Squad', 'Team'], 'Age': ['Age'],
+        'Min': ['Min', 'Playing Time Min', 'Minutes Played'], 'Gls': ['Gls', 'Performance Gls', 'Goals'],
+        'Ast': ['Ast', 'Performance Ast', 'Assists'], 'MP': ['MP', 'Playing Time MP', 'Matches Played'],
+        'Sh': ['Sh', 'Standard Sh', 'Shots'], 'SoT': ['SoT', 'Standard SoT', 'Shots on Target'],
+        'SoT%': ['SoT%', 'Standard SoT%', 'Shot Accuracy %'], 'G/Sh': ['G/Sh', 'Standard G/Sh', 'Goals per Shot'],
+        'Pos': ['Pos', 'Position'], '90s': ['90s', 'Playing Time 90s'],
+        'xG': ['xG', 'Expected Goals'], 'KP': ['KP', 'Key Passes'], 'xA': ['xA', 'Expected Assists'],
+        # Add potential names for new stats
+        'Cmp': ['Cmp', 'Passes Completed', 'Total Cmp'], # Passes Completed
+        'Tkl': ['Tkl', 'Tackles', 'Tackles Tkl'], # Tackles Won
+        'Tkl%': ['Tkl%', 'Tackles Won %', 'TklW%'] # Tackle Success Rate
+    }
+    actual_mapping = {}
+    found_columns = []
+    for target_col, potential_names in column_mapping_attempts.items():
+        found = False
+        for potential_name in potential_names:
+            if potential_name in df.columns:
+                if potential_name != target_col:
+                     actual_mapping[potential_name] = target_col
+                found_columns.append(target_col)
+                found = True
+                break
+        if not found:
+             # Don't make missing optional columns like xG, KP, Cmp, Tkl fatal warnings
+             if target_col not in ['xG', 'KP', 'xA', 'Cmp', 'Tkl', 'Tkl%']:
+                logger.warning("Required column '%s' not found using potential names: %s", target_col, potential_names)
+             else:
+                logger.info("Optional column '%s' not found.", target_col)
+
+    if actual_mapping:
+        logger.debug("Applying column mapping: %s", actual_mapping)
+        df = df.rename(columns=actual_mapping)
+    logger.debug("Columns after potential renaming: %s", df.columns.tolist())
+
+    # --- Ensure Numeric Types ---
+    numeric_targets = ['Age', 'Min', 'Gls', 'Ast', 'MP', 'Sh', 'SoT', 'SoT%', 'G/Sh', '90s', 'xG', 'KP', 'xA', 'Cmp', 'Tkl', 'Tkl%']
+    for col in numeric_targets:
+        if col in df.columns:
+            try:
+                # Special handling for percentages which might have '%' sign
+                if '%' in col and df[col].dtype == 'object':
+                    df[col] = df[col].str.replace('%', '', regex=False)
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+                logger.debug("Converted '%s' to numeric.", col)
+            except Exception as e:
+                logger.error("Error converting '%s' to numeric: %s. Check data.", col, e)
+
+    # --- Ensure U23 Flag ---
+    if 'Age' in df.columns:
+        if 'U23' not in df.columns:
+            df['U23'] = df['Age'] < 23
+            u23_count = df['U23'].sum()
+            logger.info("Added 'U23' flag based on 'Age'. Found %d players under 23.", u23_count)
+        else:
+             df['U23'] = df['U23'].astype(bool)
+             logger.debug("'U23' column already exists. Ensured boolean type.")
+    elif 'U23' not in df.columns:
+        logger.warning("'Age' column not found. Cannot create 'U23' flag.")
+        df['U23'] = False
+
+    df = apply_player_schema(df)
+    logger.info("Data loading complete. Final DataFrame shape: %s", df.shape)
+    return df
+
+
+# --- Player Name Index ---
+# Player search matches accent-folded name tokens ('Đurić' -> 'duric', so 'duric' finds it
+# and 'ĐURIĆ' finds 'Duric'). Each word of the search must match a word of the name: equal, a
+# prefix of it, or (3+ letters) inside it. A search word that matches no name word at all is
+# taken as a typo and matched within typo_limit edits instead. Results are ranked
+# by how closely each word matched.
+#
+# The index is built once per table: unique names are folded once, every distinct word is
+# listed in sorted order (a prefix is one bisect) and under each of its padded trigrams (the
+# infix and typo candidates are the words sharing enough trigrams with the search word, which
+# are then checked directly). Words map to names and names to rows as integer arrays.
+SEARCH_MATCH_SCORES = {'exact': 1.0, 'prefix': 0.9, 'infix': 0.75}
+
+def typo_limit(length):
+    """Edits tolerated in a search word of length letters"""
+    return 0 if length < 4 else 1 if length < 8 else 2
+
+def _trigrams(word):
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _edit_distance(a, b, limit):
+    """Optimal string alignment distance of a and b, or limit + 1 once it must exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+class NameIndex:
+    """Accent-folded word index over a column of player names"""
+
+    def __init__(self, names):
+        name_codes, unique_names = pd.factorize(names.astype(object), use_na_sentinel=True)
+        folded = [fold_name(name) for name in unique_names]
+        # Names that fold the same (e.g. 'José' and 'Jose') share one entry; rows without a name get -1
+        folded_codes, self.names = pd.factorize(pd.Series(folded, dtype=object))
+        self.row_names = np.append(folded_codes, -1)[name_codes]
+        word_ids, word_names = {}, []
+        for name_id, name in enumerate(self.names):
+            for word in set(name.split()):
+                word_names.append((word_ids.setdefault(word, len(word_ids)), name_id))
+        self.words = list(word_ids)
+        pairs = np.array(word_names, dtype=np.int64).reshape(-1, 2)
+        pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+        self._word_names = pairs[:, 1] # names of word w: _word_names[_word_starts[w]:_word_starts[w + 1]]
+        self._word_starts = np.searchsorted(pairs[:, 0], np.arange(len(self.words) + 1))
+        self._sorted_words = sorted(self.words)
+        self._sorted_word_ids = np.array([word_ids[word] for word in self._sorted_words], dtype=np.int64)
+        trigram_words = {}
+        for word_id, word in enumerate(self.words):
+            for trigram in _trigrams(word):
+                trigram_words.setdefault(trigram, []).append(word_id)
+        self._trigram_words = {trigram: np.array(ids, dtype=np.int64) for trigram, ids in trigram_words.items()}
+
+    def match_word(self, query):
+        """{word id: score} of the index words matching one folded search word"""
+        matches = {}
+        start = bisect_left(self._sorted_words, query)
+        stop = bisect_left(self._sorted_words, query + "\uffff", start)
+        for word_id in self._sorted_word_ids[start:stop].tolist():
+            matches[word_id] = SEARCH_MATCH_SCORES['exact' if self.words[word_id] == query else 'prefix']
+        if len(query) < 3:
+            return matches
+        postings = [self._trigram_words[t] for t in _trigrams(query) if t in self._trigram_words]
+        if not postings:
+            return matches
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.words))
+        # A word containing query has all of its len - 2 inner trigrams
+        for word_id in np.flatnonzero(shared >= len(query) - 2).tolist():
+            if word_id not in matches and query in self.words[word_id]:
+                matches[word_id] = SEARCH_MATCH_SCORES['infix']
+        limit = typo_limit(len(query))
+        if matches or not limit:
+            return matches
+        # No word matches as typed. An edit changes at most 3 of a word's trigrams (a transposition
+        # 4), so words within limit edits share at least len - 4 * limit of them
+        for word_id in np.flatnonzero(shared >= max(1, len(query) - 4 * limit)).tolist():
+            distance = _edit_distance(query, self.words[word_id], limit)
+            if distance <= limit:
+                matches[word_id] = SEARCH_MATCH_SCORES['infix'] * (1 - distance / (limit + 1))
+        return matches
+
+    def search(self, term):
+        """(name ids, scores) of the names matching every word of term, best first"""
+        words = fold_name(term).split()
+        if not words:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        scores = np.zeros(len(self.names))
+        matched = np.ones(len(self.names), dtype=bool)
+        for word in words:
+            word_scores = np.zeros(len(self.names))
+            # Assigned lowest score first, so a name matched by several words keeps its best
+            for word_id, score in sorted(self.match_word(word).items(), key=lambda item: item[1]):
+                word_scores[self._word_names[self._word_starts[word_id]:self._word_starts[word_id + 1]]] = score
+            matched &= word_scores > 0
+            scores += word_scores
+        name_ids = np.flatnonzero(matched)
+        order = np.argsort(-scores[name_ids], kind='stable')
+        return name_ids[order], scores[name_ids[order]] / len(words)
+
+    def row_scores(self, term):
+        """Score of every row's name for term, 0 where it doesn't match"""
+        name_ids, scores = self.search(term)
+        name_scores = np.zeros(len(self.names) + 1) # last slot for rows without a name
+        name_scores[name_ids] = scores
+        return name_scores[self.row_names]
+
+# --- Entity Registry ---
+# Clubs and players are keyed by small integers instead of by name. Every club has a fixed id in
+# CLUBS with its display name, competition, colour and the aliases FBref exports have used for it
+# ('WS Wanderers', 'W Sydney'); aliases are matched on folded names. A club that isn't listed
+# is given the next free id the first time it is seen. Players take the player_id that
+# player_linkage.py stores in the merged CSV and the crosswalk; a row without one gets an id per
+# (Player, club), shared with any linked row of that name at that club. Interned ids are only
+# stable within a process; linked ids are stable across runs.
+#
+# Loaded partitions carry int16 club_id and int32 player_id columns (-1 where a row has no
+# Squad or Player), so team totals, club scopes and colour lookups work on the ids and a club
+# that changed its name between seasons is one team.
+PLAYER_CROSSWALK_PATH = "a_league_data/player_crosswalk.csv"
+INTERNED_PLAYER_ID_START = 2**30 # above any player_linkage id, so an interned id never meets a linked one
+DEFAULT_TEAM_COLOR = '#808080'
+# (club_id, name, competition, colour, other names it appears under)
+CLUBS = [
+    (1, 'Adelaide United', 'A-League Men', '#9b2633', ['Adelaide']),
+    (2, 'Auckland FC', 'A-League Men', '#145a7d', []),
+    (3, 'Brisbane Roar', 'A-League Men', '#b76d10', ['Brisbane']),
+    (4, 'Central Coast Mariners', 'A-League Men', '#d0af4c', ['Central Coast']),
+    (5, 'Macarthur FC', 'A-League Men', '#313131', []),
+    (6, 'Melbourne City', 'A-League Men', '#6295c3', ['Melb City']),
+    (7, 'Melbourne Victory', 'A-League Men', '#1a3a7c', ['Melb Victory']),
+    (8, 'Newcastle Jets', 'A-League Men', '#d1a03e', ['Newcastle']),
+    (9, 'Perth Glory', 'A-League Men', '#4f2c7d', ['Perth']),
+    (10, 'Sydney FC', 'A-League Men', '#4b77b8', ['Sydney']),
+    (11, 'Wellington Phoenix', 'A-League Men', '#c3a023', ['Wellington']),
+    (12, 'Western Sydney Wanderers', 'A-League Men', '#bc3034', ['WS Wanderers', 'W Sydney']),
+    (13, 'Western United', 'A-League Men', '#2d5234', []),
+]
+
+class ClubRegistry:
+    """Club id <-> name, competition and colour, with alias resolution"""
+
+    def __init__(self, clubs):
+        self._lock = Lock()
+        self.names, self.competitions, self.colors = {}, {}, {}
+        self._ids = {} # folded name or alias -> club_id
+        for club_id, name, competition, color, aliases in clubs:
+            self.names[club_id], self.competitions[club_id], self.colors[club_id] = name, competition, color
+            for alias in [name] + aliases:
+                self._ids[fold_name(alias)] = club_id
+        self._next_id = max(self.names, default=0) + 1
+
+    def club_id(self, name, competition=None):
+        """Id of a club name or alias (-1 for a missing name); a new name is added"""
+        if name is None or (not isinstance(name, str) and pd.isna(name)):
+            return -1
+        key = fold_name(name)
+        club_id = self._ids.get(key)
+        if club_id is None:
+            with self._lock:
+                club_id = self._ids.get(key)
+                if club_id is None:
+                    club_id, self._next_id = self._next_id, self._next_id + 1
+                    self.names[club_id], self.competitions[club_id], self.colors[club_id] = str(name), competition, DEFAULT_TEAM_COLOR
+                    self._ids[key] = club_id
+                    logger.info("Club '%s' isn't in the registry; added as id %d.", name, club_id)
+        return club_id
+
+    def club_ids(self, names, competition=None):
+        """int16 club id of every value in a column of names"""
+        codes, uniques = pd.factorize(pd.Series(names).astype(object))
+        ids = np.array([self.club_id(name, competition) for name in uniques] + [-1], dtype='int16')
+        return ids[codes]
+
+    def name_list(self, club_ids):
+        """Display names of club ids (None for -1)"""
+        return [self.names.get(club_id) for club_id in np.asarray(club_ids).tolist()]
+
+    def color(self, club_id):
+        return self.colors.get(club_id, DEFAULT_TEAM_COLOR)
+
+club_registry = ClubRegistry(CLUBS)
 
-# --- Team Color Function (keep as is) ---
 def get_team_color(team):
-    team_map = {
-        'Adelaide United': 'Adelaide', 'Adelaide': 'Adelaide', 'Brisbane Roar': 'Brisbane', 'Brisbane': 'Brisbane',
-        'Central Coast Mariners': 'Central Coast', 'Central Coast': 'Central Coast', 'Macarthur FC': 'Macarthur FC',
-        'Melbourne City': 'Melb City', 'Melb City': 'Melb City', 'Melbourne Victory': 'Melb Victory', 'Melb Victory': 'Melb Victory',
-        'Newcastle Jets': 'Newcastle', 'Newcastle': 'Newcastle', 'Perth Glory': 'Perth Glory', 'Perth': 'Perth Glory',
-        'Sydney FC': 'Sydney FC', 'Sydney': 'Sydney FC', 'Wellington Phoenix': 'Wellington', 'Wellington': 'Wellington',
-        'Western Sydney Wanderers': 'W Sydney', 'WS Wanderers': 'W Sydney', 'W Sydney': 'W Sydney',
-        'Western United': 'Western United', 'Auckland FC': 'Auckland FC',
-    }
-    normalized_team = team_map.get(team, team)
-    team_colors = {
-        'Adelaide': '#9b2633', 'Auckland FC': '#145a7d', 'Brisbane': '#b76d10', 'Central Coast': '#d0af4c',
-        'Macarthur FC': '#313131', 'Melb City': '#6295c3', 'Melb Victory': '#1a3a7c', 'Newcastle': '#d1a03e',
-        'Perth Glory': '#4f2c7d', 'Sydney FC': '#4b77b8', 'W Sydney': '#bc3034', 'Wellington': '#c3a023',
-        'Western United': '#2d5234',
-    }
-    default_color = '#808080'
-    return team_colors.get(normalized_team, default_color)
+    return club_registry.color(club_registry.club_id(team))
+
+def build_team_color_map(df):
+    """Squad and club name -> colour for every club in the loaded data, so charts never re-resolve names"""
+    if 'club_id' not in df.columns:
+        return {}
+    pairs = df[['Squad', 'club_id']].drop_duplicates()
+    pairs = pairs[pairs['club_id'].to_numpy() >= 0]
+    color_map = {club_registry.names[club_id]: club_registry.color(club_id) for club_id in pairs['club_id'].unique().tolist()}
+    color_map.update((str(squad), club_registry.color(club_id)) for squad, club_id in zip(pairs['Squad'].astype(object), pairs['club_id'].tolist()))
+    return color_map
+
+def _pair_index(first, second):
+    """MultiIndex of two aligned arrays, without the level sort pd.MultiIndex.from_arrays does"""
+    codes, levels = zip(*(pd.factorize(values) for values in (first, second)))
+    return pd.MultiIndex(levels=list(levels), codes=list(codes), verify_integrity=False)
+
+class PlayerRegistry:
+    """player_id of every loaded row: linked ids from player_linkage, else one interned per (Player, club)"""
+
+    def __init__(self, crosswalk_path=PLAYER_CROSSWALK_PATH):
+        self._lock = Lock()
+        self._records = pd.DataFrame(columns=['competition', 'season', 'Player', 'Squad', 'player_id'])
+        self._players = pd.Series([], dtype='int64', index=pd.MultiIndex.from_arrays([[], []])) # (Player, club_id) -> player_id
+        self._next_id = INTERNED_PLAYER_ID_START
+        if os.path.exists(crosswalk_path):
+            crosswalk = pd.read_csv(crosswalk_path, dtype={'season': str}, usecols=self._records.columns.tolist())
+            self._records = crosswalk.drop_duplicates(['competition', 'season', 'Player', 'Squad'])
+            self._register(self._records['Player'].to_numpy(dtype=object), club_registry.club_ids(self._records['Squad']),
+                           self._records['player_id'].to_numpy(dtype='float64'))
+            logger.info("Loaded player crosswalk %s: %d records.", crosswalk_path, len(self._records))
+
+    def _register(self, players, club_ids, ids):
+        """Record (Player, club) -> id for rows with an id; the first id seen for a pair is kept"""
+        linked = ~np.isnan(ids)
+        pairs = _pair_index(players[linked], club_ids[linked])
+        new = ~pairs.duplicated() & (self._players.index.get_indexer(pairs) < 0)
+        if new.any():
+            self._players = pd.concat([self._players, pd.Series(ids[linked][new].astype('int64'), index=pairs[new])])
+
+    def player_ids(self, frame, club_ids, competition, season):
+        """int32 player_id of every row of one competition season"""
+        ids = (pd.to_numeric(frame['player_id'], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+               if 'player_id' in frame.columns else np.full(len(frame), np.nan))
+        players = frame['Player'].astype(object).to_numpy()
+        named = pd.notna(players)
+        with self._lock:
+            # Rows the crosswalk linked in this competition season
+            missing = np.flatnonzero(np.isnan(ids) & named)
+            records = self._records[(self._records['competition'] == competition) & (self._records['season'] == str(season))]
+            if len(missing) and len(records):
+                squads = frame['Squad'].astype(object).to_numpy()[missing] if 'Squad' in frame.columns else np.full(len(missing), None)
+                found = _pair_index(records['Player'].to_numpy(dtype=object), records['Squad'].to_numpy(dtype=object)).get_indexer(_pair_index(players[missing], squads))
+                ids[missing[found >= 0]] = records['player_id'].to_numpy(dtype='float64')[found[found >= 0]]
+            self._register(players, club_ids, ids)
+            # The rest by (Player, club), interning pairs not seen before
+            missing = np.flatnonzero(np.isnan(ids) & named)
+            if len(missing):
+                pairs = _pair_index(players[missing], club_ids[missing])
+                new = pairs[(self._players.index.get_indexer(pairs) < 0)].unique()
+                if len(new):
+                    self._players = pd.concat([self._players, pd.Series(np.arange(self._next_id, self._next_id + len(new)), index=new)])
+                    self._next_id += len(new)
+                ids[missing] = self._players.to_numpy()[self._players.index.get_indexer(pairs)]
+        return np.nan_to_num(ids, nan=-1).astype('int32')
+
+def add_entity_keys(frame, competition, season, players):
+    """frame with club_id and player_id columns for one competition season"""
+    if 'Player' not in frame.columns:
+        return frame
+    club_ids = club_registry.club_ids(frame['Squad'], competition) if 'Squad' in frame.columns else np.full(len(frame), -1, dtype='int16')
+    return frame.assign(club_id=club_ids, player_id=players.player_ids(frame, club_ids, competition, season))
+
+# --- Filter Index ---
+class FilterIndex:
+    """Row masks for the dashboard filters, built once per loaded DataFrame.
+
+    The callback combines these boolean masks instead of copying the table and re-running
+    astype/to_numeric/str.contains on every request.
+    """
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.all_rows = np.ones(self.n_rows, dtype=bool)
+
+        # Position: factorize once, then every mask is a lookup over the handful of unique values.
+        # A selected value matches any Pos containing it, so "DF" also selects "DF,MF" and "MF,DF".
+        if 'Pos' in df.columns:
+            pos_codes, pos_uniques = pd.factorize(df['Pos'], use_na_sentinel=True)
+            self._pos_codes = pos_codes
+            self._pos_uniques = np.array([str(p).lower() for p in pos_uniques], dtype=object)
+            self.position_values = sorted(str(p) for p in pos_uniques if str(p) != 'nan')
+            tokens = {t.strip() for p in self.position_values for t in p.split(',') if t.strip()}
+        else:
+            self._pos_codes = None
+            self.position_values, tokens = [], set()
+        # Bitmaps for every dropdown value plus each single position inside multi-position values.
+        # Any other value a client sends is computed per request and not kept, so the masks held
+        # per dataset stay bounded by the data, not by what callers post.
+        self._position_masks = {value: self._build_position_mask(value) for value in set(self.position_values) | tokens}
+
+        # Minutes: row order sorted by Min, so a threshold is one binary search.
+        if 'Min' in df.columns:
+            minutes = pd.to_numeric(df['Min'], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            self._min_order = np.argsort(minutes, kind='stable') # NaN sorts last
+            self._min_sorted = minutes[self._min_order]
+            self._min_valid = int(np.count_nonzero(~np.isnan(minutes)))
+        else:
+            self._min_order = None
+        self._minutes_masks = {minutes: self._build_minutes_mask(minutes) for minutes in MINUTES_THRESHOLDS if minutes > 0}
+
+        # U23 flag
+        if 'U23' in df.columns:
+            self.u23_mask = df['U23'].fillna(False).to_numpy(dtype=bool)
+        else:
+            self.u23_mask = np.zeros(self.n_rows, dtype=bool)
+
+        # Folded name words for the search box
+        self.name_index = NameIndex(df['Player']) if 'Player' in df.columns else None
+
+    def position_mask(self, position):
+        mask = self._position_masks.get(position)
+        return mask if mask is not None else self._build_position_mask(position)
+
+    def _build_position_mask(self, position):
+        if self._pos_codes is None:
+            mask = np.zeros(self.n_rows, dtype=bool)
+        else:
+            needle = str(position).lower()
+            matches_unique = np.array([needle in p for p in self._pos_uniques], dtype=bool)
+            mask = np.zeros(self.n_rows, dtype=bool)
+            has_pos = self._pos_codes >= 0
+            mask[has_pos] = matches_unique[self._pos_codes[has_pos]]
+        return mask
+
+    def minutes_mask(self, min_minutes):
+        mask = self._minutes_masks.get(min_minutes)
+        return mask if mask is not None else self._build_minutes_mask(min_minutes)
+
+    def _build_minutes_mask(self, min_minutes):
+        mask = np.zeros(self.n_rows, dtype=bool)
+        if self._min_order is not None:
+            start = np.searchsorted(self._min_sorted[:self._min_valid], min_minutes, side='left')
+            mask[self._min_order[start:self._min_valid]] = True
+        return mask
+
+    def search_mask(self, search_term):
+        if self.name_index is None:
+            return np.zeros(self.n_rows, dtype=bool)
+        return self.name_index.row_scores(search_term) > 0
+
+    def select(self, position, min_minutes, search_term):
+        """Boolean row mask for the position / minutes / search filters"""
+        mask = self.all_rows
+        if position and position != "all":
+            mask = mask & self.position_mask(position)
+        if min_minutes and min_minutes > 0:
+            mask = mask & self.minutes_mask(min_minutes)
+        if search_term:
+            mask = mask & self.search_mask(search_term)
+        return mask
+
+# --- Result Cache ---
+RESULT_CACHE_SIZE = 256
+RESULT_CACHE_TTL_SECONDS = 15 * 60
+
+class ResultCache:
+    """Bounded LRU cache with per-entry TTL and hit/miss counters"""
+
+    def __init__(self, maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict() # key -> (expires_at, value), oldest first
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return (True, value) on a fresh hit, (False, None) otherwise"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def evict_where(self, predicate):
+        """Drop the entries whose key predicate(key) is true; returns how many were dropped"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            self.evictions += len(keys)
+            return len(keys)
+
+    def values(self):
+        """The cached values, oldest first (expired entries included until they are looked up)"""
+        with self._lock:
+            return [value for _, value in self._entries.values()]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries), "maxsize": self.maxsize, "ttl": self.ttl,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+# --- Maintained Aggregates ---
+# Summary-card and team totals kept per (Squad, Pos, U23) cell: players, summed goals and
+# assists (with their non-missing counts) and the age sum/count behind the average age.
+# Any position filter and either scope is a sum over a few hundred cells instead of a pass over
+# every player row. Store partitions persist their cells next to the Parquet file, and a
+# matchweek ingest adjusts them by the changed players' before/after rows only. The filter
+# cube takes its no-minimum-minutes totals and team goals from these cells; a Dataset resolves
+# each cell's Squad to a club_id once when it is loaded.
+AGGREGATE_KEYS = ['Squad', 'Pos', 'U23']
+AGGREGATE_VALUES = ['Gls', 'Ast', 'Age']
+
+def cell_aggregates(frame):
+    """Per-(Squad, Pos, U23) totals of frame; missing Squad/Pos are kept as ''"""
+    cells = pd.DataFrame({
+        'Squad': frame['Squad'].astype(object).where(frame['Squad'].notna(), '') if 'Squad' in frame.columns else '',
+        'Pos': frame['Pos'].astype(object).where(frame['Pos'].notna(), '') if 'Pos' in frame.columns else '',
+        'U23': frame['U23'].fillna(False).astype(bool) if 'U23' in frame.columns else False,
+        'players': 1,
+    }, index=frame.index)
+    for col in AGGREGATE_VALUES:
+        values = pd.to_numeric(frame[col], errors='coerce').astype('float64') if col in frame.columns else np.nan
+        cells[f'{col}_sum'] = values
+        cells[f'{col}_n'] = pd.notna(values) if col in frame.columns else 0
+    return cells.groupby(AGGREGATE_KEYS, sort=True).sum(min_count=0)
+
+def combine_aggregates(*aggregates, subtract=None):
+    """Sum cell tables (minus an optional one), dropping cells left without players"""
+    combined = pd.concat(aggregates).groupby(level=AGGREGATE_KEYS, sort=True).sum()
+    if subtract is not None:
+        combined = combined.sub(subtract, fill_value=0)
+    return combined[combined['players'] > 0]
+
+def aggregate_cells(aggregates, position, u23_only=False):
+    """The cells matching a position-filter value (same substring rule as FilterIndex)"""
+    cells = aggregates
+    if position and position != "all":
+        pos = cells.index.get_level_values('Pos').str.lower()
+        cells = cells[pos.str.contains(str(position).lower(), regex=False)]
+    if u23_only:
+        cells = cells[cells.index.get_level_values('U23')]
+    return cells
+
+def with_club_ids(aggregates):
+    """Cells with the club_id of their Squad ('' is -1)"""
+    squads = aggregates.index.get_level_values('Squad').to_series().replace('', None)
+    return aggregates.assign(club_id=club_registry.club_ids(squads))
+
+def aggregate_totals(cells):
+    """(players, goals, assists, average age) over a set of cells"""
+    totals = cells[['players', 'Gls_sum', 'Ast_sum', 'Age_sum', 'Age_n']].sum()
+    avg_age = totals['Age_sum'] / totals['Age_n'] if totals['Age_n'] else np.nan
+    return int(totals['players']), totals['Gls_sum'], totals['Ast_sum'], avg_age
+
+def aggregate_team_goals(cells):
+    """Goals by club id over a set of cells (with_club_ids), ascending, for clubs with at least
+    one recorded goal tally; level totals keep club id order"""
+    teams = cells[cells['club_id'] >= 0].groupby('club_id', sort=True)[['Gls_sum', 'Gls_n']].sum()
+    return teams.loc[teams['Gls_n'] > 0, 'Gls_sum'].sort_values(kind='stable')
+
+# --- Partitioned Data Store ---
+# Each competition/season is its own Parquet partition under a_league_data/store, e.g.
+# store/a-league-men/2024-2025.parquet, listed in store/catalog.json. Partitions are read only
+# when a dashboard scope needs them, and only the DASHBOARD_COLUMNS are read from disk.
+# Without a catalog, the single CSV found by load_data is served as one partition.
+STORE_DIR = "a_league_data/store"
+CATALOG_FILE = "catalog.json"
+LEGACY_COMPETITION = "A-League Men"
+LEGACY_SEASON = "2024-2025"
+PARTITION_CACHE_SIZE = 16
+# Every column the dashboard reads; anything else in a partition stays on disk
+DASHBOARD_COLUMNS = ['Player', 'Pos', 'Squad', 'Age', 'MP', 'Min', 'Gls', 'Ast', 'Sh', 'SoT', 'SoT%', 'G/Sh', '90s', 'xG', 'KP', 'xA', 'Cmp', 'Tkl', 'Tkl%', 'U23', 'player_id']
+EMPTY_PLAYER_COLUMNS = ['Player', 'Pos', 'Squad', 'Age', 'Min', 'Gls', 'Ast', 'MP', 'U23', 'Sh', 'SoT', 'SoT%', 'G/Sh', 'KP', 'xA', 'xG', 'Cmp', 'Tkl', 'Tkl%']
+
+# Matchweek delta files have one row per player per match; these columns are added to the
+# season totals (MP counts the rows with minutes if the file has no MP column)
+DELTA_SUM_COLUMNS = ['MP', 'Min', 'Gls', 'Ast', 'Sh', 'SoT', 'KP', 'Cmp', 'Tkl', 'xG', 'xA']
+DERIVED_RATE_COLUMNS = ['90s', 'SoT%', 'G/Sh']
+
+def read_matchweek_delta(delta_path):
+    """Per-(Player, Squad) totals of a matchweek delta file"""
+    delta = pd.read_csv(delta_path).rename(columns={'Team': 'Squad', 'Minutes': 'Min', 'Goals': 'Gls', 'Assists': 'Ast'})
+    missing = [col for col in ['Player', 'Squad', 'Min'] if col not in delta.columns]
+    if missing:
+        raise ValueError(f"{delta_path} is missing columns {missing}")
+    sum_cols = [col for col in DELTA_SUM_COLUMNS if col in delta.columns]
+    delta[sum_cols] = delta[sum_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
+    if 'MP' not in delta.columns:
+        delta['MP'] = (delta['Min'] > 0).astype(int)
+        sum_cols.append('MP')
+    if 'Age' in delta.columns:
+        delta['Age'] = pd.to_numeric(delta['Age'], errors='coerce')
+    first_cols = {col: 'first' for col in ['Pos', 'Age'] if col in delta.columns}
+    return delta.groupby(['Player', 'Squad'], sort=False).agg({**{col: 'sum' for col in sum_cols}, **first_cols}).reset_index()
+
+def derive_rate_columns(frame, rows):
+    """Recompute 90s, SoT% and G/Sh from the totals for the given row positions"""
+    def column(col):
+        return frame[col].iloc[rows].to_numpy(dtype='float64', na_value=np.nan) if col in frame.columns else np.full(len(rows), np.nan)
+    minutes, shots, on_target, goals = column('Min'), column('Sh'), column('SoT'), column('Gls')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        derived = {
+            '90s': np.round(minutes / 90, 1),
+            'SoT%': np.where(shots > 0, np.round(on_target / shots * 100, 1), np.nan),
+            'G/Sh': np.where(shots > 0, np.round(goals / shots, 2), np.nan),
+        }
+    for col, values in derived.items():
+        if col in frame.columns:
+            frame.iloc[rows, frame.columns.get_loc(col)] = values
+    return frame
+
+class DataCatalog:
+    """Catalog of competition/season partitions with lazy, column-projected loading"""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.catalog_path = os.path.join(root, CATALOG_FILE)
+        self.partitions = []
+        if os.path.exists(self.catalog_path):
+            with open(self.catalog_path) as f:
+                self.partitions = json.load(f).get("partitions", [])
+            logger.info("Opened data store %s: %d partitions.", root, len(self.partitions))
+        else:
+            logger.info("No data store catalog at %s. Serving the single-season file.", self.catalog_path)
+        self._frames = ResultCache(maxsize=PARTITION_CACHE_SIZE, ttl=float('inf'))
+        self.players = PlayerRegistry()
+
+    @property
+    def is_legacy(self):
+        return not self.partitions
+
+    def competitions(self):
+        if self.is_legacy:
+            return [LEGACY_COMPETITION]
+        return sorted({p["competition"] for p in self.partitions})
+
+    def seasons(self, competition):
+        """Seasons available for a competition, latest first"""
+        if self.is_legacy:
+            return [LEGACY_SEASON] if competition == LEGACY_COMPETITION else []
+        return sorted({p["season"] for p in self.partitions if p["competition"] == competition}, reverse=True)
+
+    def default_scope(self):
+        """(competition, (latest season,)) for the first competition"""
+        competitions = self.competitions()
+        competition = LEGACY_COMPETITION if LEGACY_COMPETITION in competitions else competitions[0]
+        seasons = self.seasons(competition)
+        return competition, tuple(seasons[:1])
+
+    def _find(self, competition, season):
+        for partition in self.partitions:
+            if partition["competition"] == competition and partition["season"] == season:
+                return partition
+        return None
+
+    def load_partition(self, competition, season, columns=None):
+        """Load one partition, reading only the requested columns that it has"""
+        cache_key = (competition, season, tuple(columns) if columns else None)
+        hit, frame = self._frames.get(cache_key)
+        if hit:
+            return frame
+        if self.is_legacy:
+            frame = load_data()
+            if columns:
+                frame = frame[[col for col in columns if col in frame.columns]]
+        else:
+            partition = self._find(competition, season)
+            if partition is None:
+                logger.warning("No partition for %s %s.", competition, season)
+                return pd.DataFrame(columns=EMPTY_PLAYER_COLUMNS)
+            read_columns = [col for col in columns if col in partition["columns"]] if columns else None
+            frame = pd.read_parquet(os.path.join(self.root, partition["path"]), columns=read_columns)
+            logger.info("Loaded partition %s %s: %d players, %d columns.", competition, season, len(frame), len(frame.columns))
+        frame = add_entity_keys(frame, competition, season, self.players)
+        self._frames.put(cache_key, frame)
+        return frame
+
+    def load_aggregates(self, competition, seasons):
+        """Summed maintained aggregates of the given seasons, or None if any partition has none"""
+        if self.is_legacy:
+            return None
+        tables = []
+        for season in seasons:
+            partition = self._find(competition, season)
+            if partition is None:
+                continue
+            if "aggregates_path" not in partition:
+                return None
+            table = pd.read_parquet(os.path.join(self.root, partition["aggregates_path"]))
+            tables.append(table.set_index(AGGREGATE_KEYS))
+        return combine_aggregates(*tables) if tables else None
+
+    def load_scope(self, competition, seasons, columns=None):
+        """Concatenate the partitions of one competition for the given seasons.
+
+        When more than one season is loaded, a 'Season' column tells the rows apart.
+        """
+        frames = [self.load_partition(competition, season, columns) for season in seasons]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=EMPTY_PLAYER_COLUMNS)
+        if len(frames) == 1:
+            return apply_player_schema(frames[0])
+        frames = [frame.assign(Season=season) for frame, season in zip(frames, seasons)]
+        # Categories differ between seasons, so the concatenated columns are re-typed
+        return apply_player_schema(pd.concat(frames, ignore_index=True))
+
+    def load_all(self, columns=None):
+        """Every partition in the store, with 'Competition' and 'Season' columns"""
+        frames = []
+        for competition in self.competitions():
+            for season in self.seasons(competition):
+                frame = self.load_partition(competition, season, columns)
+                if not frame.empty:
+                    frames.append(frame.assign(Competition=competition, Season=season))
+        if not frames:
+            return pd.DataFrame(columns=EMPTY_PLAYER_COLUMNS + ['Competition', 'Season'])
+        return pd.concat(frames, ignore_index=True)
+
+    def add_partition(self, csv_path, competition, season):
+        """Clean one season export and add (or replace) its partition in the store"""
+        logger.info("Adding partition %s %s from %s", competition, season, csv_path)
+        frame = clean_player_data(pd.read_csv(csv_path))
+        rel_path = os.path.join(slugify(competition), f"{slugify(season)}.parquet")
+        entry = {
+            "competition": competition, "season": season, "path": rel_path,
+            "source": os.path.abspath(csv_path), "source_sha256": _file_sha256(csv_path),
+        }
+        self._write_partition(entry, frame, cell_aggregates(frame))
+        logger.info("Wrote %s (%d players). Catalog now has %d partitions.", entry["path"], len(frame), len(self.partitions))
+        return entry
+
+    def _write_partition(self, entry, frame, aggregates):
+        """Write a partition's rows and aggregates, then record entry in the catalog"""
+        path = os.path.join(self.root, entry["path"])
+        entry["aggregates_path"] = entry["path"].replace(".parquet", ".aggregates.parquet")
+        aggregates_path = os.path.join(self.root, entry["aggregates_path"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        frame.to_parquet(path + ".tmp", index=False)
+        aggregates.reset_index().to_parquet(aggregates_path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+        os.replace(aggregates_path + ".tmp", aggregates_path)
+        entry.update(rows=len(frame), columns=frame.columns.tolist())
+        key = (entry["competition"], entry["season"])
+        self.partitions = [p for p in self.partitions if (p["competition"], p["season"]) != key] + [entry]
+        self.partitions.sort(key=lambda p: (p["competition"], p["season"]))
+        os.makedirs(self.root, exist_ok=True)
+        _write_json_atomic(self.catalog_path, {"partitions": self.partitions})
+        self._frames.clear()
+
+    def ingest_matchweek(self, delta_path, competition, season, matchweek=None):
+        """Add one matchweek's per-player match rows to a season partition's totals.
+
+        Only the players in the delta file are recomputed, and the partition's aggregates are
+        adjusted by those players' before/after rows. A delta file already applied to the
+        partition (same content hash) is skipped.
+        """
+        partition = self._find(competition, season)
+        if partition is None:
+            raise ValueError(f"No partition for {competition} {season}; add the season with add-partition first.")
+        delta_sha256 = _file_sha256(delta_path)
+        applied = partition.get("matchweeks", [])
+        if any(m["source_sha256"] == delta_sha256 for m in applied):
+            logger.warning("%s was already ingested into %s %s; skipping.", delta_path, competition, season)
+            return partition
+
+        delta = read_matchweek_delta(delta_path)
+        frame = pd.read_parquet(os.path.join(self.root, partition["path"]))
+        aggregates = (pd.read_parquet(os.path.join(self.root, partition["aggregates_path"])).set_index(AGGREGATE_KEYS)
+                      if "aggregates_path" in partition else cell_aggregates(frame))
+
+        # Line the delta up with the season rows by (Player, Squad); unknown players are appended
+        season_keys = pd.MultiIndex.from_arrays([frame['Player'].astype(object), frame['Squad'].astype(object)])
+        rows = season_keys.get_indexer(pd.MultiIndex.from_frame(delta[['Player', 'Squad']]))
+        is_new = rows < 0
+        before = frame.iloc[rows[~is_new]]
+        if is_new.any():
+            new_players = delta.loc[is_new, [col for col in ['Player', 'Squad', 'Pos', 'Age'] if col in delta.columns]]
+            if 'Age' in new_players.columns:
+                new_players = new_players.assign(U23=new_players['Age'] < 23)
+            rows[is_new] = np.arange(len(frame), len(frame) + is_new.sum())
+            frame = pd.concat([frame, new_players], ignore_index=True)
+            if 'U23' in frame.columns:
+                frame['U23'] = frame['U23'].fillna(False).astype(bool)
+
+        sum_cols = [col for col in DELTA_SUM_COLUMNS if col in delta.columns]
+        frame = frame.astype({col: 'float64' for col in sum_cols + DERIVED_RATE_COLUMNS if col in frame.columns})
+        for col in sum_cols:
+            if col not in frame.columns:
+                frame[col] = np.nan
+            col_pos = frame.columns.get_loc(col)
+            frame.iloc[rows, col_pos] = np.nan_to_num(frame.iloc[rows, col_pos].to_numpy(dtype='float64')) + delta[col].to_numpy(dtype='float64')
+        frame = apply_player_schema(derive_rate_columns(frame, rows))
+
+        aggregates = combine_aggregates(aggregates, cell_aggregates(frame.iloc[rows]), subtract=cell_aggregates(before))
+        entry = dict(partition, matchweeks=applied + [{
+            "matchweek": matchweek, "source": os.path.abspath(delta_path), "source_sha256": delta_sha256,
+            "rows": len(delta), "new_players": int(is_new.sum()),
+        }])
+        self._write_partition(entry, frame, aggregates)
+        logger.info("Ingested %s into %s %s: %d players updated, %d new.",
+                    delta_path, competition, season, int((~is_new).sum()), int(is_new.sum()))
+        return entry
+
+# --- Datasets ---
+class Dataset:
+    """The player rows for one scope plus everything precomputed from them"""
+
+    def __init__(self, df, aggregates=None):
+        self.df = df
+        self.filter_index = FilterIndex(df)
+        self.team_color_map = build_team_color_map(df)
+        # Maintained store aggregates when the partitions have them, else computed once here
+        self.aggregates = with_club_ids(aggregates if aggregates is not None else cell_aggregates(df))
+        self._cube = None
+        self._cube_lock = Lock()
+
+    def filter_cube(self):
+        """FilterCube of this dataset, built on first use"""
+        with self._cube_lock:
+            if self._cube is None:
+                with timed("cube"):
+                    self._cube = FilterCube(self.df, self.filter_index, self.aggregates)
+                logger.info("Built filter cube: %d cells, %.1f KiB.", len(self._cube), self._cube.nbytes / 1024)
+            return self._cube
+
+ALL_POSITIONS_OPTION = {"label": "All Positions", "value": "all"}
+
+def position_options(dataset):
+    return [ALL_POSITIONS_OPTION] + [{"label": pos, "value": pos} for pos in dataset.filter_index.position_values]
+
+# --- Player Profiles ---
+# Per-90 rates and per-position percentiles for every player in the store (all competitions and
+# seasons), built once per data version. A percentile ranks a player among the same primary
+# position in the same competition and season, so players from different leagues and years sit
+# on one 0-1 scale. "Similar players" is the cosine similarity of the centred percentile
+# vectors: rows are L2-normalized and sorted by position, so a query is one matrix-vector
+# product over its position's slice plus an argpartition for the top k.
+PER90_COLUMNS = ['Gls', 'Ast', 'Sh', 'SoT', 'KP', 'xG', 'xA', 'Cmp', 'Tkl']
+PROFILE_INFO_COLUMNS = ['Player', 'Squad', 'Competition', 'Season', 'Pos', 'Age', 'Min']
+PROFILE_MIN_MINUTES = 270 # below this, per-90 rates are mostly noise
+SIMILAR_PLAYERS_K = 10
+PROFILE_SEARCH_LIMIT = 50
+
+class PlayerProfiles:
+    """Per-90 matrix, percentile matrix and similarity vectors of the players with enough minutes"""
+
+    def __init__(self, frame):
+        minutes = pd.to_numeric(frame['Min'], errors='coerce') if 'Min' in frame.columns else pd.Series(np.nan, index=frame.index)
+        frame = frame[(minutes >= PROFILE_MIN_MINUTES).to_numpy()]
+        position = frame['Pos'].astype(str).str.split(',').str[0].str.strip().to_numpy(dtype=object)
+        order = np.argsort(position, kind='stable')
+        frame, position = frame.iloc[order].reset_index(drop=True), position[order]
+
+        self.info = frame[[col for col in PROFILE_INFO_COLUMNS if col in frame.columns]]
+        self.u23 = frame['U23'].fillna(False).to_numpy(dtype=bool) if 'U23' in frame.columns else np.zeros(len(frame), dtype=bool)
+        self.stats = [col for col in PER90_COLUMNS if col in frame.columns]
+        nineties = frame['Min'].to_numpy(dtype='float64', na_value=np.nan) / 90
+        totals = frame[self.stats].apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        self.per90 = pd.DataFrame(totals / nineties[:, None], columns=self.stats).astype('float32')
+        peers = [frame['Competition'].astype(object), frame['Season'].astype(object), pd.Series(position)]
+        self.percentiles = self.per90.groupby(peers, sort=False).rank(pct=True).astype('float32')
+
+        # A stat missing for a player (or a whole league) counts as median: it adds nothing to the similarity
+        vectors = self.percentiles.fillna(0.5).to_numpy() - np.float32(0.5)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+        positions, starts = np.unique(position, return_index=True)
+        bounds = list(starts) + [len(position)]
+        self._position_slices = {pos: (bounds[i], bounds[i + 1]) for i, pos in enumerate(positions)}
+        self._position = position
+        # The same player's other seasons aren't "similar players"
+        self._player_codes = (frame['player_id'].to_numpy() if 'player_id' in frame.columns
+                              else pd.factorize(frame['Player'].astype(object))[0])
+        self._names = NameIndex(frame['Player'])
+        self.keys = (frame['Competition'].astype(str) + '|' + frame['Season'].astype(str) + '|'
+                     + frame['Player'].astype(str) + '|' + frame['Squad'].astype(str)).to_numpy(dtype=object)
+        self._rows = {key: row for row, key in enumerate(self.keys)}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def row(self, key):
+        return self._rows.get(key)
+
+    def label(self, row):
+        info = self.info.iloc[row]
+        return f"{info['Player']} ({info['Squad']}, {info['Competition']} {info['Season']})"
+
+    def search(self, term, limit=PROFILE_SEARCH_LIMIT):
+        """Rows whose player name matches term (see NameIndex), best match then most minutes first"""
+        scores = self._names.row_scores(term)
+        rows = np.flatnonzero(scores > 0)
+        minutes = self.info['Min'].to_numpy(dtype='float64', na_value=0)[rows]
+        return rows[np.lexsort((-minutes, -scores[rows]))[:limit]]
+
+    def similar(self, row, k=SIMILAR_PLAYERS_K, u23_only=False):
+        """(rows, similarities) of the k most similar profiles at row's primary position"""
+        start, stop = self._position_slices[self._position[row]]
+        scores = self.vectors[start:stop] @ self.vectors[row]
+        excluded = self._player_codes[start:stop] == self._player_codes[row]
+        if u23_only:
+            excluded |= ~self.u23[start:stop]
+        scores[excluded] = -np.inf
+        k = min(k, int(np.count_nonzero(~excluded)))
+        if k <= 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype='float32')
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return top + start, scores[top]
 
 # --- Load Data ---
-df = load_data()
-if df.empty:
-    print("WARNING: Data loading failed. Dashboard will show 'No Data'.")
-    # Ensure fallback df has columns for the new cards too
-    df = pd.DataFrame(columns=['Player', 'Pos', 'Squad', 'Age', 'Min', 'Gls', 'Ast', 'MP', 'U23', 'Sh', 'SoT', 'SoT%', 'G/Sh', 'KP', 'xA', 'xG', 'Cmp', 'Tkl', 'Tkl%'])
+# The loaded data is one DataState: a catalog plus the version number it was loaded as. A reload
+# builds and validates a new DataState off the request path and then swaps the data_state
+# reference in one assignment. Scope keys carry the version they were normalized under, so a
+# callback that started before a swap keeps reading the same version until it returns, and
+# cached results of an older version are never served for the new one. The first DataState
+# (catalog.json and the player crosswalk) is opened by get_state() on first use, not on import.
+RETAINED_DATA_STATES = 2 # the current version plus the one in-flight requests may still hold
+REQUIRED_COLUMNS = ['Player', 'Pos', 'Squad', 'Min', 'Gls']
+
+class DataState:
+    """One loaded version of the data"""
+
+    def __init__(self, version, catalog):
+        self.version = version
+        self.catalog = catalog
+        self.loaded_at = time.time()
+        self._profiles = None
+        self._profiles_lock = Lock()
+
+    def player_profiles(self):
+        """PlayerProfiles of every partition in the store, built on first use"""
+        with self._profiles_lock:
+            if self._profiles is None:
+                with timed("profiles"):
+                    self._profiles = PlayerProfiles(self.catalog.load_all(DASHBOARD_COLUMNS))
+                logger.info("Built player profiles: %d players with %d+ minutes.", len(self._profiles), PROFILE_MIN_MINUTES)
+            return self._profiles
+
+data_state = None # the DataState being served; opened by get_state()
+data_states = OrderedDict() # version -> DataState, oldest first
+data_state_lock = Lock()
+dataset_cache = ResultCache(maxsize=8, ttl=float('inf'))
+
+def get_state():
+    """The DataState being served, opening the data store on first use"""
+    global data_state
+    if data_state is None:
+        with data_state_lock:
+            if data_state is None:
+                state = DataState(1, DataCatalog())
+                data_states[state.version] = state
+                data_state = state
+    return data_state
+
+def state_for(version):
+    """DataState of a version; LookupError once that version has been dropped, so data of the
+    current version is never cached under an old version's key"""
+    get_state()
+    state = data_states.get(version)
+    if state is None:
+        raise LookupError(f"data version {version} is no longer loaded")
+    return state
+
+def normalize_scope(competition, seasons, state=None):
+    """Map the competition/season selectors to a (data version, competition, seasons) scope key"""
+    state = state or get_state()
+    catalog = state.catalog
+    if competition not in catalog.competitions():
+        competition = catalog.default_scope()[0]
+    available = catalog.seasons(competition)
+    if isinstance(seasons, str):
+        seasons = [seasons]
+    seasons = tuple(sorted((s for s in (seasons or []) if s in available), reverse=True))
+    return state.version, competition, (seasons or tuple(available[:1]))
+
+def load_dataset(state, competition, seasons):
+    frame = state.catalog.load_scope(competition, seasons, columns=DASHBOARD_COLUMNS)
+    if frame.empty:
+        logger.warning("No data for %s %s. Dashboard will show 'No Data'.", competition, ", ".join(seasons))
+        # Ensure fallback df has columns for the new cards too
+        frame = pd.DataFrame(columns=EMPTY_PLAYER_COLUMNS)
+        return Dataset(frame)
+    return Dataset(frame, state.catalog.load_aggregates(competition, seasons))
+
+def club_scope(scope, club):
+    """A normalized scope narrowed to one club's players (club: any of its names)"""
+    return scope[:3] + (club_registry.club_id(club),)
+
+dataset_load_lock = RLock() # one load at a time, so concurrent first requests don't load a scope twice
+
+def get_dataset(scope):
+    """Dataset for a normalized scope, loading only the partitions it covers"""
+    hit, dataset = dataset_cache.get(scope)
+    if hit:
+        return dataset
+    with dataset_load_lock:
+        hit, dataset = dataset_cache.get(scope)
+        if hit:
+            return dataset
+        if len(scope) > 3:
+            df = get_dataset(scope[:3]).df
+            dataset = Dataset(df[df['club_id'].to_numpy() == scope[3]].reset_index(drop=True) if 'club_id' in df.columns else df.iloc[0:0])
+        else:
+            version, competition, seasons = scope
+            dataset = load_dataset(state_for(version), competition, seasons)
+        dataset_cache.put(scope, dataset)
+    return dataset
+
+dashboard_cache = ResultCache()
+
+def normalize_filters(position, min_minutes, search_term, u23_scope):
+    """Map equivalent filter inputs to one cache key (e.g. None and 'all', search case)"""
+    position = position if position else "all"
+    min_minutes = min_minutes if min_minutes and min_minutes > 0 else 0
+    search_term = search_term.lower() if search_term else ""
+    u23_scope = "u23" if u23_scope == "u23" else "all"
+    return position, min_minutes, search_term, u23_scope
+
+def validate_dataset(dataset):
+    """Raise ValueError if a freshly loaded dataset can't replace the current one"""
+    missing = [col for col in REQUIRED_COLUMNS if col not in dataset.df.columns]
+    if missing:
+        raise ValueError(f"missing columns {missing}")
+    if dataset.df.empty:
+        raise ValueError("no player rows")
+
+def reload_data(retain=RETAINED_DATA_STATES):
+    """Load the data store again and swap it in if it validates; return the current version.
+
+    The new default scope (with its filter cube) and the player profiles are loaded, indexed
+    and validated before the swap, so the first request after a reload doesn't pay for them. On failure the old
+    data keeps being served. retain is how many versions (the new one included) stay loaded.
+    """
+    global data_state
+    get_state()
+    with data_state_lock, timed("reload"):
+        state = DataState(data_state.version + 1, DataCatalog())
+        scope = normalize_scope(None, None, state)
+        try:
+            dataset = load_dataset(state, *scope[1:])
+            validate_dataset(dataset)
+            dataset.filter_cube()
+            state.player_profiles()
+        except Exception as e:
+            logger.error("Reload rejected, still serving version %d: %s", data_state.version, e)
+            return data_state.version
+        dataset_cache.put(scope, dataset)
+        data_states[state.version] = state
+        while len(data_states) > retain:
+            data_states.popitem(last=False)
+        data_state = state
+        # Entries of older versions can no longer be hit; drop them to free memory
+        dataset_cache.evict_where(lambda scope: scope[0] not in data_states)
+        dashboard_cache.clear()
+        selection_cache.clear()
+    logger.info("Reloaded data (version %d).", state.version)
+    return state.version
+
+# --- Startup ---
+# Importing the module loads no data, so a fresh process can answer requests right away.
+# warm_data loads the default scope, its filter cube, the player profiles and the chart
+# templates; the servers run it in a background thread at startup (serve runs it in the
+# gunicorn master, before the workers are forked) and /ready reports when it has finished.
+# Requests that arrive earlier load what they need themselves.
+data_ready = Event()
+warm_lock = Lock()
+startup_seconds = {} # phase -> seconds since STARTED_AT
+
+def warm_data():
+    """Load everything the first page view needs; runs once, later calls return at once"""
+    with warm_lock:
+        if data_ready.is_set():
+            return
+        with timed("warm"):
+            get_dataset(normalize_scope(None, None)).filter_cube()
+            get_state().player_profiles()
+            chart_templates()
+        startup_seconds["ready"] = time.perf_counter() - STARTED_AT
+        data_ready.set()
+    logger.info("Data warm %.2fs after start.", startup_seconds["ready"])
+
+def start_warmup():
+    Thread(target=warm_data, name="data-warmup", daemon=True).start()
+
+# --- Data Watcher ---
+# Polls the files the data is loaded from and reloads when they change. A change is only acted
+# on once two polls in a row see the same file sizes and mtimes, so a file that is still being
+# copied into place isn't loaded half-written.
+DATA_WATCH_INTERVAL_SECONDS = 5
+
+def data_source_signature():
+    """(path, mtime_ns, size) of every file the data store is loaded from"""
+    catalog_path = os.path.join(STORE_DIR, CATALOG_FILE)
+    paths = [catalog_path, MERGED_DATA_PATH, STANDARD_DATA_PATH]
+    if os.path.exists(catalog_path):
+        try:
+            with open(catalog_path) as f:
+                paths += [os.path.join(STORE_DIR, p["path"]) for p in json.load(f).get("partitions", [])]
+        except (OSError, ValueError):
+            pass # mid-write; the next poll will see it complete
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+class DataWatcher(Thread):
+    """Daemon thread that calls reload (reload_data) when the data files change, then
+    on_reload(version) if a new version was swapped in"""
+
+    def __init__(self, interval=DATA_WATCH_INTERVAL_SECONDS, on_reload=None, reload=reload_data):
+        super().__init__(name="data-watcher", daemon=True)
+        self.interval = interval
+        self.on_reload = on_reload
+        self.reload = reload
+        self.loaded_signature = data_source_signature()
+
+    def run(self):
+        pending = None
+        while True:
+            time.sleep(self.interval)
+            signature = data_source_signature()
+            if signature == self.loaded_signature:
+                pending = None
+            elif signature != pending:
+                pending = signature # changed; wait one more poll for it to settle
+            else:
+                logger.info("Data files changed, reloading.")
+                previous = get_state().version
+                version = self.reload()
+                self.loaded_signature, pending = signature, None
+                if self.on_reload and version != previous:
+                    self.on_reload(version)
+
+def start_data_watcher(interval=DATA_WATCH_INTERVAL_SECONDS, on_reload=None, reload=reload_data):
+    if not interval:
+        return None
+    watcher = DataWatcher(interval, on_reload, reload)
+    watcher.start()
+    logger.info("Watching data files every %ss for changes.", interval)
+    return watcher
+
+# --- Top Performer Cards ---
+# Each leader card is one registry entry: the metric that ranks U23 players, the tie-breakers
+# used when the metric is level, and the stats shown under the player's name. Output ids are
+# '<id>-name' and '<id>-<field key>'. Adding a card is adding an entry here.
+# Field formats: 'int' whole number, 'decimal' one decimal, 'percent' one decimal with %, 'text' as is.
+LEADER_CARDS = [
+    {
+        'id': 'top-scorer', 'title': 'Top Goal Scorer', 'metric': 'Gls', 'tiebreakers': ['Min'],
+        'fields': [('goals', 'Goals', 'Gls', 'int'), ('xg', 'xG', 'xG', 'decimal'), ('age', 'Age', 'Age', 'int')],
+    },
+    {
+        'id': 'best-playmaker', 'title': 'Best Playmaker', 'metric': 'Ast', 'tiebreakers': ['KP', 'Min'],
+        'fields': [('assists', 'Assists', 'Ast', 'int'), ('key-passes', 'Key Passes', 'KP', 'int'), ('xa', 'xA', 'xA', 'decimal')],
+    },
+    {
+        'id': 'most-passes', 'title': 'Most Passes', 'metric': 'Cmp', 'tiebreakers': ['Min'],
+        'fields': [('total', 'Passes', 'Cmp', 'int'), ('position', 'Position', 'Pos', 'text'), ('age', 'Age', 'Age', 'int')],
+    },
+    {
+        'id': 'most-tackles', 'title': 'Most Tackles', 'metric': 'Tkl', 'tiebreakers': ['Min'],
+        'fields': [('total', 'Tackles', 'Tkl', 'int'), ('success', 'Success %', 'Tkl%', 'percent'), ('position', 'Position', 'Pos', 'text')],
+    },
+]
+
+def compute_leaders(frame, cards=LEADER_CARDS):
+    """Return {card id: row position of the leader, or None} for every card.
+
+    All ranking columns are pulled into one float matrix and their maxima taken in a single
+    vectorized pass. Each card then narrows its candidates key by key (metric, then each
+    tie-breaker), which is a lexicographic argmax: the same player the old descending
+    sort_values(...).iloc[0] picked, with NaN ranked last and the first row winning exact ties.
+    """
+    leaders = {card['id']: None for card in cards}
+    key_cols = list(dict.fromkeys(col for card in cards for col in [card['metric']] + card['tiebreakers'] if col in frame.columns))
+    if frame.empty or not key_cols:
+        return leaders
+    matrix = frame[key_cols].to_numpy(dtype='float64', na_value=np.nan) # columns are numeric after load_data
+    col_pos = {col: i for i, col in enumerate(key_cols)}
+    with np.errstate(invalid='ignore'):
+        has_value = ~np.isnan(matrix)
+        col_max = np.where(has_value.any(axis=0), np.nanmax(np.where(has_value, matrix, -np.inf), axis=0), np.nan)
+
+    for card in cards:
+        metric = card['metric']
+        if metric not in col_pos or np.isnan(col_max[col_pos[metric]]):
+            continue
+        candidates = np.flatnonzero(matrix[:, col_pos[metric]] == col_max[col_pos[metric]])
+        for col in card['tiebreakers']:
+            if len(candidates) == 1:
+                break
+            if col not in col_pos:
+                continue
+            values = matrix[candidates, col_pos[col]]
+            if np.isnan(values).all():
+                continue
+            candidates = candidates[values == np.nanmax(values)]
+        leaders[card['id']] = int(candidates[0])
+    return leaders
+
+def format_leader_value(value, fmt):
+    if value is None or pd.isna(value):
+        return "--"
+    if fmt == 'int':
+        return int(value)
+    if fmt == 'decimal':
+        return f"{value:.1f}"
+    if fmt == 'percent':
+        return f"{value:.1f}%"
+    return value
+
+def leader_card_outputs(cards=LEADER_CARDS):
+    """Output list for the performer cards, in registry order"""
+    outputs = []
+    for card in cards:
+        outputs.append(Output(f"{card['id']}-name", 'children'))
+        outputs.extend(Output(f"{card['id']}-{key}", 'children') for key, _, _, _ in card['fields'])
+    return outputs
+
+def leader_card_layout(card):
+    return html.Div([
+        html.Div(html.H3(card['title'], style={'fontSize': '16px', 'fontWeight': '600', 'color': '#4285F4', 'marginBottom': '10px', 'textAlign': 'center'}),
+                 style={'borderBottom': '1px solid var(--border)', 'paddingBottom': '8px', 'marginBottom': '15px'}),
+        html.Div(id=f"{card['id']}-name", children="--",
+                 style={'fontSize': '18px', 'fontWeight': 'bold', 'textAlign': 'center', 'marginBottom': '15px', 'color': 'var(--text)'}),
+        html.Div([
+            html.Div([ html.Div(label, className="perf-label"), html.Div(id=f"{card['id']}-{key}", children="--", className="perf-value") ])
+            for key, label, _, _ in card['fields']
+        ], className="perf-stats-row"), # Use new class for flex layout
+    ], className="performer-card") # Standard card class
 
 # --- Create Dash App ---
+TABLE_PAGE_SIZE = 15 # rows per page of the players table
+MINUTES_THRESHOLDS = [0, 90, 270, 450, 900] # min-minutes-filter values
+# DASHBOARD_CLIENTSIDE=1 sends small scopes to the browser and filters them there (see Client-side Filtering)
+CLIENTSIDE_FILTERING = os.environ.get("DASHBOARD_CLIENTSIDE", "").lower() in ("1", "true", "yes")
+CLIENTSIDE_MAX_ROWS = 5000 # larger scopes stay on the server
 app = dash.Dash(__name__, suppress_callback_exceptions=True)
 server = app.server
 
 # --- App Layout ---
-app.layout = html.Div([
-    # -- Page Title --
-    html.H1(
-        "A-League Advanced Analytics Dashboard (U23 Players)",
-        style={
-            'textAlign': 'center',
-            'color': '#4285F4',
-            'marginBottom': '30px',
-            'fontSize': '32px',
-            'fontWeight': '600',
-            # Font family will be inherited from body
-        }
-    ),
+# The layout is a function, so importing the module doesn't load any data: it only reads the
+# catalog for the competition and season selectors. The position options are filled in by
+# update_position_options once the page's scope is known.
+def serve_layout():
+    scope = normalize_scope(None, None)
+    catalog = state_for(scope[0]).catalog
+    return html.Div([
+        # -- Page Title --
+        html.H1(
+            "A-League Advanced Analytics Dashboard (U23 Players)",
+            style={
+                'textAlign': 'center',
+                'color': '#4285F4',
+                'marginBottom': '30px',
+                'fontSize': '32px',
+                'fontWeight': '600',
+                # Font family will be inherited from body
+            }
+        ),
 
-    # -- Tabs --
-    html.Div([
-        html.Div("Overview", id="tab-overview", className="tab active", **{'data-tab': 'overview'}),
-    ], className="tabs", style={'borderBottom': '2px solid #e0e0e0', 'marginBottom': '30px'}),
+        # -- Tabs --
+        html.Div([
+            html.Div("Overview", id="tab-overview", className="tab active", **{'data-tab': 'overview'}),
+        ], className="tabs", style={'borderBottom': '2px solid #e0e0e0', 'marginBottom': '30px'}),
 
-    # -- Overview Tab Content --
-    html.Div([
-        # -- Summary Stats Row --
+        # -- Overview Tab Content --
         html.Div([
-             # Card 1: Total U23 Players
-            html.Div([
-                html.Div("Total Young Players", className="metric-title"),
-                html.Div(id="total-players-u23", className="metric-value", children="--"),
-                html.Div(id="total-players-pct", className="metric-subtitle", children="--% of -- players"),
-            ], className="metric-card"),
-            # Card 2: Average Age U23
+            # -- Summary Stats Row --
             html.Div([
-                html.Div("Average Age - U23", className="metric-title"),
-                html.Div(id="avg-age-u23", className="metric-value", children="--"),
-                html.Div(id="avg-age-all", className="metric-subtitle", children="vs. -- overall"),
-            ], className="metric-card"),
-            # Card 3: Goals by U23
-            html.Div([
-                html.Div("Goals by U23 Players", className="metric-title"),
-                html.Div(id="total-goals-u23", className="metric-value", children="--"),
-                html.Div(id="total-goals-pct", className="metric-subtitle", children="--% of -- goals"),
-            ], className="metric-card"),
-            # Card 4: Assists by U23
+                 # Card 1: Total U23 Players
+                html.Div([
+                    html.Div("Total Young Players", className="metric-title"),
+                    html.Div(id="total-players-u23", className="metric-value", children="--"),
+                    html.Div(id="total-players-pct", className="metric-subtitle", children="--% of -- players"),
+                ], className="metric-card"),
+                # Card 2: Average Age U23
+                html.Div([
+                    html.Div("Average Age - U23", className="metric-title"),
+                    html.Div(id="avg-age-u23", className="metric-value", children="--"),
+                    html.Div(id="avg-age-all", className="metric-subtitle", children="vs. -- overall"),
+                ], className="metric-card"),
+                # Card 3: Goals by U23
+                html.Div([
+                    html.Div("Goals by U23 Players", className="metric-title"),
+                    html.Div(id="total-goals-u23", className="metric-value", children="--"),
+                    html.Div(id="total-goals-pct", className="metric-subtitle", children="--% of -- goals"),
+                ], className="metric-card"),
+                # Card 4: Assists by U23
+                html.Div([
+                    html.Div("Assists by U23 Players", className="metric-title"),
+                    html.Div(id="total-assists-u23", className="metric-value", children="--"),
+                    html.Div(id="total-assists-pct", className="metric-subtitle", children="--% of -- assists"),
+                ], className="metric-card"),
+            ], className="metrics-row"), # This class defines the 4-column grid
+
+            # -- Top Young Performers Section Title --
+            # Wrap title in a Div for alignment control
             html.Div([
-                html.Div("Assists by U23 Players", className="metric-title"),
-                html.Div(id="total-assists-u23", className="metric-value", children="--"),
-                html.Div(id="total-assists-pct", className="metric-subtitle", children="--% of -- assists"),
-            ], className="metric-card"),
-        ], className="metrics-row"), # This class defines the 4-column grid
-
-        # -- Top Young Performers Section Title --
-        # Wrap title in a Div for alignment control
-        html.Div([
-            html.H2("Top Young Performers By Category",
-               style={'fontSize': '24px', 'fontWeight': '600', 'color': '#333',
-                      'marginTop': '40px', 'marginBottom': '25px',
-                      'paddingLeft': '2px', # Small left padding
-                      'textAlign': 'left' # Ensure text aligns left within container
-                      })
-        ], style={'maxWidth': '1200px', 'margin': '0 auto', 'padding': '0 15px'}), # Container matching card row below
+                html.H2("Top Young Performers By Category",
+                   style={'fontSize': '24px', 'fontWeight': '600', 'color': '#333',
+                          'marginTop': '40px', 'marginBottom': '25px',
+                          'paddingLeft': '2px', # Small left padding
+                          'textAlign': 'left' # Ensure text aligns left within container
+                          })
+            ], style={'maxWidth': '1200px', 'margin': '0 auto', 'padding': '0 15px'}), # Container matching card row below
 
 
-        # -- Performer Cards (Single Row of 4) --
-        # Reuse 'metrics-row' class for the 4-column layout
-        html.Div([
-            # Card 1: Top Goal Scorer (Updated Style)
+            # -- Performer Cards (one per LEADER_CARDS entry) --
+            # Reuse 'metrics-row' class for the 4-column layout
             html.Div([
-                html.Div(html.H3("Top Goal Scorer", style={'fontSize': '16px', 'fontWeight': '600', 'color': '#4285F4', 'marginBottom': '10px', 'textAlign': 'center'}),
-                         style={'borderBottom': '1px solid var(--border)', 'paddingBottom': '8px', 'marginBottom': '15px'}),
-                html.Div(id="top-scorer-name", children="--",
-                         style={'fontSize': '18px', 'fontWeight': 'bold', 'textAlign': 'center', 'marginBottom': '15px', 'color': 'var(--text)'}),
-                html.Div([
-                    html.Div([ html.Div("Goals", className="perf-label"), html.Div(id="top-scorer-goals", children="--", className="perf-value") ]),
-                    html.Div([ html.Div("xG", className="perf-label"), html.Div(id="top-scorer-xg", children="--", className="perf-value") ]),
-                    html.Div([ html.Div("Age", className="perf-label"), html.Div(id="top-scorer-age", children="--", className="perf-value") ]),
-                ], className="perf-stats-row"), # Use new class for flex layout
-            ], className="performer-card"), # Standard card class
+                leader_card_layout(card) for card in LEADER_CARDS
+            ], className="metrics-row", style={'marginBottom': '30px'}), # Use metrics-row for 4 columns
 
-            # Card 2: Best Playmaker (Updated Style)
-            html.Div([
-                html.Div(html.H3("Best Playmaker", style={'fontSize': '16px', 'fontWeight': '600', 'color': '#4285F4', 'marginBottom': '10px', 'textAlign': 'center'}),
-                         style={'borderBottom': '1px solid var(--border)', 'paddingBottom': '8px', 'marginBottom': '15px'}),
-                html.Div(id="best-playmaker-name", children="--",
-                         style={'fontSize': '18px', 'fontWeight': 'bold', 'textAlign': 'center', 'marginBottom': '15px', 'color': 'var(--text)'}),
-                html.Div([
-                    html.Div([ html.Div("Assists", className="perf-label"), html.Div(id="best-playmaker-assists", children="--", className="perf-value") ]),
-                    html.Div([ html.Div("Key Passes", className="perf-label"), html.Div(id="best-playmaker-key-passes", children="--", className="perf-value") ]),
-                    html.Div([ html.Div("xA", className="perf-label"), html.Div(id="best-playmaker-xa", children="--", className="perf-value") ]),
-                ], className="perf-stats-row"),
-            ], className="performer-card"),
 
-            # Card 3: Most Passes (New)
+            # -- Filters --
             html.Div([
-                html.Div(html.H3("Most Passes", style={'fontSize': '16px', 'fontWeight': '600', 'color': '#4285F4', 'marginBottom': '10px', 'textAlign': 'center'}),
-                         style={'borderBottom': '1px solid var(--border)', 'paddingBottom': '8px', 'marginBottom': '15px'}),
-                html.Div(id="most-passes-name", children="--",
-                         style={'fontSize': '18px', 'fontWeight': 'bold', 'textAlign': 'center', 'marginBottom': '15px', 'color': 'var(--text)'}),
+                # Left group
                 html.Div([
-                    html.Div([ html.Div("Passes", className="perf-label"), html.Div(id="most-passes-total", children="--", className="perf-value") ]),
-                    html.Div([ html.Div("Position", className="perf-label"), html.Div(id="most-passes-position", children="--", className="perf-value") ]),
-                    html.Div([ html.Div("Age", className="perf-label"), html.Div(id="most-passes-age", children="--", className="perf-value") ]),
-                ], className="perf-stats-row"),
-            ], className="performer-card"),
-
-            # Card 4: Most Tackles (New)
-            html.Div([
-                html.Div(html.H3("Most Tackles", style={'fontSize': '16px', 'fontWeight': '600', 'color': '#4285F4', 'marginBottom': '10px', 'textAlign': 'center'}),
-                         style={'borderBottom': '1px solid var(--border)', 'paddingBottom': '8px', 'marginBottom': '15px'}),
-                html.Div(id="most-tackles-name", children="--",
-                         style={'fontSize': '18px', 'fontWeight': 'bold', 'textAlign': 'center', 'marginBottom': '15px', 'color': 'var(--text)'}),
+                    html.Label("Competition:", style={'marginRight': '5px', 'fontWeight': '500'}),
+                    dcc.Dropdown(
+                        id="competition-filter",
+                        options=[{"label": competition, "value": competition} for competition in catalog.competitions()],
+                        value=scope[1], clearable=False, style={'width': '180px', 'marginRight': '15px'}
+                    ),
+                    html.Label("Season:", style={'marginRight': '5px', 'fontWeight': '500'}),
+                    dcc.Dropdown(
+                        id="season-filter",
+                        options=[{"label": season, "value": season} for season in catalog.seasons(scope[1])],
+                        value=list(scope[2]), multi=True, clearable=False, style={'minWidth': '160px', 'marginRight': '15px'}
+                    ),
+                    html.Label("Position:", style={'marginRight': '5px', 'fontWeight': '500'}),
+                    dcc.Dropdown(
+                        id="position-filter",
+                        options=[ALL_POSITIONS_OPTION],
+                        value="all", clearable=False, style={'width': '180px', 'marginRight': '15px'}
+                    ),
+                    html.Label("Min Minutes:", style={'marginRight': '5px', 'fontWeight': '500'}),
+                    dcc.Dropdown(
+                        id="min-minutes-filter",
+                        options=[{"label": f"{minutes}+" if minutes else "Any", "value": minutes} for minutes in MINUTES_THRESHOLDS],
+                        value=0, clearable=False, style={'width': '120px', 'marginRight': '15px'}
+                    ),
+                     html.Label("Scope:", style={'marginRight': '5px', 'fontWeight': '500'}),
+                     dcc.RadioItems( # Using RadioItems for better U23 toggle
+                         id='u23-filter-toggle', # Changed ID slightly
+                         options=[{'label': 'All Players', 'value': 'all'}, {'label': 'U23 Only', 'value': 'u23'}],
+                         value='all', labelStyle={'display': 'inline-block', 'marginRight': '10px'}, inputStyle={'marginRight': '3px'}
+                    ),
+                ], className="filter-group-left"),
+                # Right group
                 html.Div([
-                    html.Div([ html.Div("Tackles", className="perf-label"), html.Div(id="most-tackles-total", children="--", className="perf-value") ]),
-                    html.Div([ html.Div("Success %", className="perf-label"), html.Div(id="most-tackles-success", children="--", className="perf-value") ]),
-                    html.Div([ html.Div("Position", className="perf-label"), html.Div(id="most-tackles-position", children="--", className="perf-value") ]),
-                ], className="perf-stats-row"),
-            ], className="performer-card"),
+                    dcc.Input(
+                        id="player-search", type="text", placeholder="Search player name...", debounce=True,
+                        style={'padding': '8px 12px', 'width': '220px', 'borderRadius': '4px', 'border': '1px solid var(--border)'}
+                    ),
+                ], className="filter-group-right"),
+            ], className="filter-container"),
 
-        ], className="metrics-row", style={'marginBottom': '30px'}), # Use metrics-row for 4 columns
+            # -- Client-side Filtering Stores --
+            # The scope's rows (or a fallback marker) and the filters the server has to answer
+            *([dcc.Store(id="client-data"), dcc.Store(id="server-filters")] if CLIENTSIDE_FILTERING else []),
 
 
-        # -- Filters --
-        html.Div([
-            # Left group
-            html.Div([
-                html.Label("Position:", style={'marginRight': '5px', 'fontWeight': '500'}),
-                dcc.Dropdown(
-                    id="position-filter",
-                    options=[{"label": "All Positions", "value": "all"}] +
-                            ([{"label": pos, "value": pos} for pos in sorted(df["Pos"].astype(str).unique()) if pd.notna(pos) and pos != 'nan'] if "Pos" in df.columns else []),
-                    value="all", clearable=False, style={'width': '180px', 'marginRight': '15px'}
-                ),
-                html.Label("Min Minutes:", style={'marginRight': '5px', 'fontWeight': '500'}),
-                dcc.Dropdown(
-                    id="min-minutes-filter",
-                    options=[{"label": "Any", "value": 0},{"label": "90+", "value": 90},{"label": "270+", "value": 270},{"label": "450+", "value": 450},{"label": "900+", "value": 900}],
-                    value=0, clearable=False, style={'width': '120px', 'marginRight': '15px'}
-                ),
-                 html.Label("Scope:", style={'marginRight': '5px', 'fontWeight': '500'}),
-                 dcc.RadioItems( # Using RadioItems for better U23 toggle
-                     id='u23-filter-toggle', # Changed ID slightly
-                     options=[{'label': 'All Players', 'value': 'all'}, {'label': 'U23 Only', 'value': 'u23'}],
-                     value='all', labelStyle={'display': 'inline-block', 'marginRight': '10px'}, inputStyle={'marginRight': '3px'}
-                ),
-            ], className="filter-group-left"),
-            # Right group
+            # -- Charts Section (2x2 Grid) --
             html.Div([
-                dcc.Input(
-                    id="player-search", type="text", placeholder="Search player name...", debounce=True,
-                    style={'padding': '8px 12px', 'width': '220px', 'borderRadius': '4px', 'border': '1px solid var(--border)'}
-                ),
-            ], className="filter-group-right"),
-        ], className="filter-container"),
+                html.Div([dcc.Graph(id="goals-chart", config={'displayModeBar': False})], className="chart-container"),
+                html.Div([dcc.Graph(id="assisters-chart", config={'displayModeBar': False})], className="chart-container"),
+                html.Div([dcc.Graph(id="minutes-chart", config={'displayModeBar': False})], className="chart-container"),
+                html.Div([dcc.Graph(id="teams-chart", config={'displayModeBar': False})], className="chart-container"),
+            ], className="charts-grid"),
 
-
-        # -- Charts Section (2x2 Grid) --
-        html.Div([
-            html.Div([dcc.Graph(id="goals-chart", config={'displayModeBar': False})], className="chart-container"),
-            html.Div([dcc.Graph(id="assisters-chart", config={'displayModeBar': False})], className="chart-container"),
-            html.Div([dcc.Graph(id="minutes-chart", config={'displayModeBar': False})], className="chart-container"),
-            html.Div([dcc.Graph(id="teams-chart", config={'displayModeBar': False})], className="chart-container"),
-        ], className="charts-grid"),
-
-        # -- Player Statistics Table --
-        html.Div([
-            html.H2("Player Statistics", style={'fontSize': '20px', 'fontWeight': '600', 'color': '#333', 'marginBottom': '15px', 'borderBottom': '1px solid #eee', 'paddingBottom': '10px'}),
-            dash_table.DataTable(
-                id="players-table", columns=[], data=[],
-                style_table={'overflowX': 'auto', 'minWidth': '100%'},
-                style_header={
-                    'backgroundColor': 'var(--background)', 'fontWeight': 'bold', 'border': '1px solid var(--border)',
-                    'padding': '10px', 'textAlign': 'left'
-                },
-                style_cell={
-                    'padding': '10px', 'border': '1px solid var(--border)', 'textAlign': 'left',
-                    'fontSize': '14px', 'minWidth': '80px', 'width': '120px', 'maxWidth': '180px',
-                    'whiteSpace': 'normal', 'height': 'auto',
-                },
-                 style_cell_conditional=[
-                    {'if': {'column_id': c}, 'textAlign': 'right'} for c in ['Age', 'MP', 'Min', 'Gls', 'Ast', 'Sh', 'SoT', 'SoT%', 'G/Sh', '90s', 'xG', 'KP', 'xA', 'Cmp', 'Tkl', 'Tkl%'] # Added new numeric cols
-                 ],
-                style_data={'border': '1px solid var(--border)'},
-                style_data_conditional=[{'if': {'row_index': 'odd'}, 'backgroundColor': 'rgb(248, 248, 250)'}],
-                page_size=15, sort_action='native', filter_action='native',
-            )
-        ], className="table-container"),
-
-    ], id="content-overview", className="tab-content active"),
-], style={'maxWidth': '1400px', 'margin': '0 auto', 'padding': '20px'})
+            # -- Player Statistics Table --
+            html.Div([
+                html.H2("Player Statistics", style={'fontSize': '20px', 'fontWeight': '600', 'color': '#333', 'marginBottom': '15px', 'borderBottom': '1px solid #eee', 'paddingBottom': '10px'}),
+                dash_table.DataTable(
+                    id="players-table", columns=[], data=[],
+                    style_table={'overflowX': 'auto', 'minWidth': '100%'},
+                    style_header={
+                        'backgroundColor': 'var(--background)', 'fontWeight': 'bold', 'border': '1px solid var(--border)',
+                        'padding': '10px', 'textAlign': 'left'
+                    },
+                    style_cell={
+                        'padding': '10px', 'border': '1px solid var(--border)', 'textAlign': 'left',
+                        'fontSize': '14px', 'minWidth': '80px', 'width': '120px', 'maxWidth': '180px',
+                        'whiteSpace': 'normal', 'height': 'auto',
+                    },
+                     style_cell_conditional=[
+                        {'if': {'column_id': c}, 'textAlign': 'right'} for c in ['Age', 'MP', 'Min', 'Gls', 'Ast', 'Sh', 'SoT', 'SoT%', 'G/Sh', '90s', 'xG', 'KP', 'xA', 'Cmp', 'Tkl', 'Tkl%'] # Added new numeric cols
+                     ],
+                    style_data={'border': '1px solid var(--border)'},
+                    style_data_conditional=[{'if': {'row_index': 'odd'}, 'backgroundColor': 'rgb(248, 248, 250)'}],
+                    page_current=0, page_size=TABLE_PAGE_SIZE, page_action='custom',
+                    sort_action='custom', sort_mode='single', sort_by=[], filter_action='custom', filter_query='',
+                )
+            ], className="table-container"),
+
+            # -- Similar Players --
+            html.Div([
+                html.H2("Similar Players", style={'fontSize': '20px', 'fontWeight': '600', 'color': '#333', 'marginBottom': '15px', 'borderBottom': '1px solid #eee', 'paddingBottom': '10px'}),
+                html.Div([
+                    dcc.Dropdown(
+                        id="similar-player", options=[], placeholder="Type a player name...",
+                        style={'minWidth': '360px', 'marginRight': '15px'}
+                    ),
+                    dcc.RadioItems(
+                        id='similar-u23-toggle',
+                        options=[{'label': 'All Players', 'value': 'all'}, {'label': 'U23 Only', 'value': 'u23'}],
+                        value='u23', labelStyle={'display': 'inline-block', 'marginRight': '10px'}, inputStyle={'marginRight': '3px'}
+                    ),
+                ], className="filter-group-left", style={'marginBottom': '15px'}),
+                dash_table.DataTable(
+                    id="similar-table", columns=[], data=[],
+                    style_table={'overflowX': 'auto', 'minWidth': '100%'},
+                    style_header={
+                        'backgroundColor': 'var(--background)', 'fontWeight': 'bold', 'border': '1px solid var(--border)',
+                        'padding': '10px', 'textAlign': 'left'
+                    },
+                    style_cell={
+                        'padding': '10px', 'border': '1px solid var(--border)', 'textAlign': 'left',
+                        'fontSize': '14px', 'minWidth': '80px', 'width': '120px', 'maxWidth': '180px',
+                        'whiteSpace': 'normal', 'height': 'auto',
+                    },
+                    style_cell_conditional=[
+                        {'if': {'column_id': c}, 'textAlign': 'right'} for c in ['Similarity', 'Age', 'Min'] + PER90_COLUMNS
+                    ],
+                    style_data={'border': '1px solid var(--border)'},
+                    style_data_conditional=[{'if': {'row_index': 'odd'}, 'backgroundColor': 'rgb(248, 248, 250)'}],
+                )
+            ], className="table-container"),
+
+        ], id="content-overview", className="tab-content active"),
+    ], style={'maxWidth': '1400px', 'margin': '0 auto', 'padding': '20px'})
+
+app.layout = serve_layout
 
 
 # --- Custom CSS ---
@@ -451,92 +1839,76 @@ app.index_string = '''
 '''
 
 # --- Callbacks ---
-# NOTE: The debug callback is removed as it wasn't present in the user's original final code block
-@app.callback(
-    [
-        # Summary stats Outputs (8)
-        Output('total-players-u23', 'children'), Output('total-players-pct', 'children'),
-        Output('avg-age-u23', 'children'), Output('avg-age-all', 'children'),
-        Output('total-goals-u23', 'children'), Output('total-goals-pct', 'children'),
-        Output('total-assists-u23', 'children'), Output('total-assists-pct', 'children'),
-        # Top scorer Outputs (4)
-        Output('top-scorer-name', 'children'), Output('top-scorer-goals', 'children'),
-        Output('top-scorer-xg', 'children'), Output('top-scorer-age', 'children'),
-        # Best playmaker Outputs (4)
-        Output('best-playmaker-name', 'children'), Output('best-playmaker-assists', 'children'),
-        Output('best-playmaker-key-passes', 'children'), Output('best-playmaker-xa', 'children'),
-        # Most passes Outputs (4) - NEW
-        Output('most-passes-name', 'children'), Output('most-passes-total', 'children'),
-        Output('most-passes-position', 'children'), Output('most-passes-age', 'children'),
-        # Most tackles Outputs (4) - NEW
-        Output('most-tackles-name', 'children'), Output('most-tackles-total', 'children'),
-        Output('most-tackles-success', 'children'), Output('most-tackles-position', 'children'),
-        # Chart Outputs (4)
-        Output('goals-chart', 'figure'), Output('assisters-chart', 'figure'),
-        Output('minutes-chart', 'figure'), Output('teams-chart', 'figure'),
-        # Table Outputs (2)
-        Output('players-table', 'data'), Output('players-table', 'columns'),
-    ],
-    [
-        # Use the RadioItems ID for U23 scope
-        Input('position-filter', 'value'), Input('min-minutes-filter', 'value'),
-        Input('player-search', 'value'), Input('u23-filter-toggle', 'value'),
-    ]
-)
-def update_dashboard(position, min_minutes, search_term, u23_scope): # Changed last input name
-    # --- Input Validation & Data Check ---
+# The dashboard is split into independently triggered callbacks that share one cached
+# row-selection step. The summary and performer cards always describe the U23 subset of the
+# filtered rows, so they don't listen to the scope toggle; switching between All and U23 only
+# re-renders the charts and the table.
+selection_cache = ResultCache(maxsize=64)
+
+def select_rows(scope, position, min_minutes, search_term):
+    """Return (filtered_df, u23_subset_df) for the position / minutes / search filters"""
+    cache_key = (scope, position, min_minutes, search_term)
+    hit, selection = selection_cache.get(cache_key)
+    if hit:
+        return selection
+
+    dataset = get_dataset(scope)
+    df, filter_index = dataset.df, dataset.filter_index
+    # --- Apply Filters (precomputed masks, no copy of the full table) ---
+    with timed("filter"):
+        row_mask = filter_index.select(position, min_minutes, search_term)
+        filtered_df = df if row_mask.all() else df[row_mask]
+
+        u23_subset_df = pd.DataFrame()
+        if 'U23' in df.columns:
+            u23_subset_df = df[row_mask & filter_index.u23_mask]
+        else:
+            logger.warning("'U23' column missing.")
+
+    selection = (filtered_df, u23_subset_df)
+    selection_cache.put(cache_key, selection)
+    return selection
+
+def cached_result(group, args, builder):
+    """Memoize one output group's result on the scope (which includes the data version) and normalized filters"""
+    cache_key = (group,) + args
+    hit, result = dashboard_cache.get(cache_key)
+    if not hit:
+        result = builder(*args)
+        dashboard_cache.put(cache_key, result)
+    return result
+
+def frame_totals(frame):
+    """(players, goals, assists, average age) over the rows of frame"""
+    return (
+        len(frame), pd.to_numeric(frame.get('Gls'), errors='coerce').sum(),
+        pd.to_numeric(frame.get('Ast'), errors='coerce').sum(), pd.to_numeric(frame.get('Age'), errors='coerce').mean(),
+    )
+
+@timed("aggregate")
+def build_summary_cards(scope, position, min_minutes, search_term):
+    """Compute the 8 summary card values"""
+    df = get_dataset(scope).df
     if df is None or df.empty:
-        print("Callback triggered but DataFrame is empty.")
-        empty_fig = go.Figure(layout={'title': 'No Data Available'})
-        empty_fig.update_layout(font_family='"IBM Plex Sans", sans-serif')
-        empty_table_cols = [{"name": "Info", "id": "info"}]
-        empty_table_data = [{"info": "No data loaded to display."}]
-        # Ensure return tuple length matches number of outputs (8+4+4+4+4+4+2 = 30)
-        return ['--'] * 24 + [empty_fig] * 4 + [empty_table_data, empty_table_cols]
-
-    print(f"\n--- Callback Update ---")
-    print(f"Filters: Position='{position}', Min Minutes={min_minutes}, Search='{search_term}', Scope='{u23_scope}'")
-    filtered_df = df.copy()
-
-    # --- Apply Filters ---
-    # Position
-    if position and position != "all" and "Pos" in filtered_df.columns:
-        filtered_df['Pos'] = filtered_df['Pos'].astype(str)
-        filtered_df = filtered_df[filtered_df["Pos"].str.contains(position, case=False, na=False)]
-    # Minutes
-    if min_minutes and min_minutes > 0 and "Min" in filtered_df.columns:
-        filtered_df['Min'] = pd.to_numeric(filtered_df['Min'], errors='coerce')
-        filtered_df = filtered_df[filtered_df["Min"] >= min_minutes]
-    # Search
-    if search_term and "Player" in filtered_df.columns:
-        filtered_df['Player'] = filtered_df['Player'].astype(str)
-        filtered_df = filtered_df[filtered_df["Player"].str.contains(search_term, case=False, na=False)]
-
-    # --- Calculate U23 Subset & Overall Stats ---
-    if filtered_df.empty:
-        print("Filtered DataFrame is empty.")
-        empty_fig = go.Figure(layout={'title': 'No Matching Data'})
-        empty_fig.update_layout(font_family='"IBM Plex Sans", sans-serif')
-        empty_table_cols = [{"name": "Info", "id": "info"}]
-        empty_table_data = [{"info": f"No players match the selected filters."}]
-        return ['--'] * 24 + [empty_fig] * 4 + [empty_table_data, empty_table_cols]
-
-    u23_subset_df = pd.DataFrame()
-    if 'U23' in filtered_df.columns:
-        u23_subset_df = filtered_df[filtered_df["U23"] == True].copy()
+        logger.debug("Callback triggered but DataFrame is empty.")
+        return ['--'] * 8
+
+    cell = get_dataset(scope).filter_cube().cell(position, min_minutes) if not search_term else None
+    if cell is not None:
+        # Search-free filters are a lookup in the filter cube
+        (total_players_filtered, total_goals_filtered, total_assists_filtered, avg_age_filtered), \
+            (total_players_u23, total_goals_u23, total_assists_u23, avg_age_u23) = cell['totals']
+        if not total_players_u23:
+            avg_age_u23 = 0
     else:
-        print("Warning: 'U23' column missing.")
-
-    # Overall stats
-    total_players_filtered = len(filtered_df)
-    total_goals_filtered = pd.to_numeric(filtered_df.get('Gls'), errors='coerce').sum()
-    total_assists_filtered = pd.to_numeric(filtered_df.get('Ast'), errors='coerce').sum()
-    avg_age_filtered = pd.to_numeric(filtered_df.get('Age'), errors='coerce').mean()
-    # U23 stats
-    total_players_u23 = len(u23_subset_df)
-    total_goals_u23 = pd.to_numeric(u23_subset_df.get('Gls'), errors='coerce').sum()
-    total_assists_u23 = pd.to_numeric(u23_subset_df.get('Ast'), errors='coerce').sum()
-    avg_age_u23 = pd.to_numeric(u23_subset_df.get('Age'), errors='coerce').mean() if not u23_subset_df.empty else 0
+        filtered_df, u23_subset_df = select_rows(scope, position, min_minutes, search_term)
+        total_players_filtered, total_goals_filtered, total_assists_filtered, avg_age_filtered = frame_totals(filtered_df)
+        total_players_u23, total_goals_u23, total_assists_u23, avg_age_u23 = frame_totals(u23_subset_df)
+        if u23_subset_df.empty:
+            avg_age_u23 = 0
+    if not total_players_filtered:
+        logger.debug("Filtered DataFrame is empty.")
+        return ['--'] * 8
 
     # Format strings
     players_pct_str = f"{(total_players_u23 / total_players_filtered * 100):.1f}% of {total_players_filtered}" if total_players_filtered > 0 else "0% of 0"
@@ -545,228 +1917,1145 @@ def update_dashboard(position, min_minutes, search_term, u23_scope): # Changed l
     avg_age_u23_str = f"{avg_age_u23:.1f}" if pd.notna(avg_age_u23) and avg_age_u23 > 0 else "--"
     avg_age_all_str = f"vs. {avg_age_filtered:.1f} overall" if pd.notna(avg_age_filtered) and avg_age_filtered > 0 else "vs. --"
 
-    # --- Top U23 Performers ---
-    top_scorer = {"name": "--", "goals": "--", "xg": "--", "age": "--"}
-    best_playmaker = {"name": "--", "assists": "--", "key_passes": "--", "xa": "--"}
-    most_passes = {"name": "--", "total": "--", "position": "--", "age": "--"}
-    most_tackles = {"name": "--", "total": "--", "success": "--", "position": "--"}
+    return [
+        f"{total_players_u23}", players_pct_str, avg_age_u23_str, avg_age_all_str,
+        f"{int(total_goals_u23)}", goals_pct_str, f"{int(total_assists_u23)}", assists_pct_str,
+    ]
 
-    if not u23_subset_df.empty:
-        # Top Scorer
-        if 'Gls' in u23_subset_df.columns and u23_subset_df['Gls'].notna().any():
-            try:
-                sort_cols = ['Gls'] + (['Min'] if 'Min' in u23_subset_df.columns else [])
-                scorer_data = u23_subset_df.sort_values(by=sort_cols, ascending=[False]*len(sort_cols), na_position='last').iloc[0]
-                top_scorer["name"] = scorer_data.get("Player", "--")
-                top_scorer["goals"] = int(scorer_data.get("Gls", 0)) if pd.notna(scorer_data.get("Gls")) else 0
-                top_scorer["xg"] = f"{scorer_data.get('xG', 0):.1f}" if pd.notna(scorer_data.get("xG")) else "--"
-                top_scorer["age"] = int(scorer_data.get("Age", 0)) if pd.notna(scorer_data.get("Age")) else "--"
-            except IndexError: print("IndexError finding top scorer.")
-            except Exception as e: print(f"Error finding top scorer: {e}")
-
-        # Best Playmaker
-        if 'Ast' in u23_subset_df.columns and u23_subset_df['Ast'].notna().any():
-            try:
-                sort_cols = ['Ast'] + (['KP'] if 'KP' in u23_subset_df.columns else []) + (['Min'] if 'Min' in u23_subset_df.columns else [])
-                playmaker_data = u23_subset_df.sort_values(by=sort_cols, ascending=[False]*len(sort_cols), na_position='last').iloc[0]
-                best_playmaker["name"] = playmaker_data.get("Player", "--")
-                best_playmaker["assists"] = int(playmaker_data.get("Ast", 0)) if pd.notna(playmaker_data.get("Ast")) else 0
-                best_playmaker["key_passes"] = int(playmaker_data.get("KP", 0)) if pd.notna(playmaker_data.get("KP")) else "--"
-                best_playmaker["xa"] = f"{playmaker_data.get('xA', 0):.1f}" if pd.notna(playmaker_data.get("xA")) else "--"
-            except IndexError: print("IndexError finding best playmaker.")
-            except Exception as e: print(f"Error finding best playmaker: {e}")
-
-        # Most Passes (** ADJUST 'Cmp' IF YOUR COLUMN NAME IS DIFFERENT **)
-        passes_col = 'Cmp' # <---- *** CHECK YOUR CSV FOR PASSES COLUMN NAME ***
-        if passes_col in u23_subset_df.columns and u23_subset_df[passes_col].notna().any():
-            try:
-                sort_cols = [passes_col] + (['Min'] if 'Min' in u23_subset_df.columns else [])
-                passer_data = u23_subset_df.sort_values(by=sort_cols, ascending=[False]*len(sort_cols), na_position='last').iloc[0]
-                most_passes["name"] = passer_data.get("Player", "--")
-                most_passes["total"] = int(passer_data.get(passes_col, 0)) if pd.notna(passer_data.get(passes_col)) else 0
-                most_passes["position"] = passer_data.get("Pos", "--")
-                most_passes["age"] = int(passer_data.get("Age", 0)) if pd.notna(passer_data.get("Age")) else "--"
-            except IndexError: print(f"IndexError finding most passes ({passes_col}).")
-            except Exception as e: print(f"Error finding most passes: {e}")
-        else:
-             print(f"Column '{passes_col}' not found or no data for Most Passes card.")
-
-        # Most Tackles (** ADJUST 'Tkl' AND 'Tkl%' IF NEEDED **)
-        tackles_col = 'Tkl'     # <---- *** CHECK YOUR CSV FOR TACKLES COLUMN NAME ***
-        tackles_pct_col = 'Tkl%' # <---- *** CHECK YOUR CSV FOR TACKLE % COLUMN NAME ***
-        if tackles_col in u23_subset_df.columns and u23_subset_df[tackles_col].notna().any():
-             try:
-                sort_cols = [tackles_col] + (['Min'] if 'Min' in u23_subset_df.columns else [])
-                tackler_data = u23_subset_df.sort_values(by=sort_cols, ascending=[False]*len(sort_cols), na_position='last').iloc[0]
-                most_tackles["name"] = tackler_data.get("Player", "--")
-                most_tackles["total"] = int(tackler_data.get(tackles_col, 0)) if pd.notna(tackler_data.get(tackles_col)) else 0
-                # Format percentage if available
-                if tackles_pct_col in tackler_data and pd.notna(tackler_data.get(tackles_pct_col)):
-                    most_tackles["success"] = f"{tackler_data.get(tackles_pct_col):.1f}%"
+@timed("performer_cards")
+def build_performer_cards(scope, position, min_minutes, search_term):
+    """Compute the top U23 performer card values, in leader_card_outputs() order"""
+    dataset = get_dataset(scope)
+    cell = dataset.filter_cube().cell(position, min_minutes) if not search_term else None
+    if cell is not None:
+        # Leaders from the filter cube are row positions in the whole table
+        rows_df, leaders = dataset.df, cell['leaders']
+    else:
+        rows_df = pd.DataFrame()
+        if not dataset.df.empty:
+            filtered_df, rows_df = select_rows(scope, position, min_minutes, search_term)
+        leaders = compute_leaders(rows_df)
+    values = []
+    for card in LEADER_CARDS:
+        row_pos = leaders[card['id']]
+        if row_pos is None:
+            if not rows_df.empty:
+                logger.debug("Column '%s' not found or no data for %s card.", card['metric'], card['title'])
+            values.extend(["--"] * (1 + len(card['fields'])))
+            continue
+        leader = rows_df.iloc[row_pos]
+        values.append(leader.get("Player", "--"))
+        values.extend(format_leader_value(leader.get(col), fmt) for _, _, col, fmt in card['fields'])
+    return values
+
+def viz_status(n_rows, n_filtered, n_viz, u23_scope):
+    """(has rows, chart title suffix or empty-state message) for the charts and table"""
+    if not n_rows:
+        return False, 'No Data Available'
+    if not n_filtered:
+        return False, 'No Matching Data'
+    if not n_viz:
+        logger.debug("Viz DataFrame ('%s') empty.", u23_scope)
+        return False, f'No Data for Scope: {u23_scope}'
+    return True, " (U23 Only)" if u23_scope == 'u23' else " (Filtered)"
+
+def select_viz_rows(scope, position, min_minutes, search_term, u23_scope):
+    """Return (viz_df, chart_title_suffix) for the charts and table, or (None, message) if empty"""
+    if get_dataset(scope).df.empty:
+        return None, viz_status(0, 0, 0, u23_scope)[1]
+    filtered_df, u23_subset_df = select_rows(scope, position, min_minutes, search_term)
+    viz_df = u23_subset_df if u23_scope == 'u23' else filtered_df
+    has_rows, message = viz_status(1, len(filtered_df), len(viz_df), u23_scope)
+    return (viz_df if has_rows else None), message
+
+# --- Chart Templates ---
+# Each chart is a single horizontal bar trace coloured per bar by team. The figure skeletons
+# (layout, fonts, margins, hover template, "no data" annotation) are built once, on first use;
+# a request only fills in the x/y/customdata/colour arrays and the title. Because every state
+# of a chart has the same structure, later updates are sent as a Patch of just those parts.
+chart_height = 350
+chart_margin = dict(l=10, r=10, t=60, b=10)
+plotly_font = dict(family='"IBM Plex Sans", sans-serif')
+CHART_VALUE_DECIMALS = 2 # bar values are sent rounded to this many decimals
+
+# Chart definitions: (metrics name, value column, title, axis label, player chart?)
+CHART_SPECS = [
+    ('goals', 'Gls', 'Top 10 Goal Scorers', 'Goals', True),
+    ('assists', 'Ast', 'Top 10 Assist Providers', 'Assists', True),
+    ('minutes', 'Min', 'Top 10 Minutes Played', 'Minutes', True),
+    ('teams', 'Gls', 'Total Goals by Team', 'Total Goals', False),
+]
+
+def build_chart_template(title, label, is_player_chart):
+    """Figure dict for one chart with empty data arrays"""
+    import plotly.graph_objects as go # building the first figure loads plotly's validators
+    if is_player_chart:
+        hovertemplate = f'<b>%{{y}}</b><br>Squad: %{{customdata}}<br>{label}: %{{x}}<extra></extra>'
+    else:
+        hovertemplate = f'<b>%{{y}}</b><br>{label}: %{{x}}<extra></extra>'
+    fig = go.Figure(
+        data=[go.Bar(x=[], y=[], customdata=[], orientation='h', marker={'color': []}, hovertemplate=hovertemplate)],
+        layout=go.Layout(
+            title={'text': title}, height=chart_height, margin=chart_margin, font=plotly_font, showlegend=False,
+            xaxis={'title': {'text': label}}, yaxis={'title': {'text': ''}, 'categoryorder': 'total ascending'},
+            annotations=[dict(text="No data for this chart", xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False, font=dict(size=14), visible=False)],
+        ),
+    )
+    return trim_figure_template(fig.to_plotly_json())
+
+# plotly.py's default template styles every trace type and subplot kind (~7.5 KB per figure).
+# The charts are bar charts on one x/y pair, so only these parts of it affect them.
+TEMPLATE_TRACE_TYPES = ['bar']
+TEMPLATE_LAYOUT_KEYS = ['autotypenumbers', 'colorway', 'font', 'hovermode', 'hoverlabel', 'paper_bgcolor', 'plot_bgcolor', 'title', 'xaxis', 'yaxis']
+
+def trim_figure_template(fig):
+    """fig with its layout template cut down to what the dashboard's charts use"""
+    template = fig['layout'].get('template')
+    if template:
+        fig['layout']['template'] = {
+            'data': {key: value for key, value in template.get('data', {}).items() if key in TEMPLATE_TRACE_TYPES},
+            'layout': {key: value for key, value in template.get('layout', {}).items() if key in TEMPLATE_LAYOUT_KEYS},
+        }
+    return fig
+
+def quantize(values, decimals=CHART_VALUE_DECIMALS):
+    """Floats rounded to decimals places, so they serialize as short as they are displayed"""
+    return [round(value, decimals) if isinstance(value, float) else value for value in values]
+
+_chart_templates = []
+_chart_templates_lock = Lock()
+
+def chart_templates():
+    """The CHART_SPECS figure skeletons, built on first use"""
+    with _chart_templates_lock:
+        if not _chart_templates:
+            _chart_templates.extend(build_chart_template(title, label, is_player_chart) for _, _, title, label, is_player_chart in CHART_SPECS)
+        return _chart_templates
+
+def fill_chart(template, title, y_values, x_values, squads, show_customdata, team_color_map):
+    """Copy of a chart template with its data arrays and title filled in.
+
+    Only the trace and the changed layout keys are new dicts; the rest of the layout
+    (including the template) is shared with the skeleton and must not be mutated.
+    """
+    trace = dict(template['data'][0])
+    trace.update(x=quantize(x_values), y=y_values, customdata=squads if show_customdata else [],
+                 marker=dict(trace.get('marker', {}), color=[team_color_map.get(s, DEFAULT_TEAM_COLOR) for s in squads]))
+    layout = dict(template['layout'])
+    layout['title'] = dict(layout['title'], text=title)
+    layout['annotations'] = [dict(layout['annotations'][0], visible=len(x_values) == 0)]
+    return {'data': [trace], 'layout': layout}
+
+def figure_patch(fig):
+    """Patch that turns the chart already on the page into fig"""
+    trace = fig['data'][0]
+    patch = Patch()
+    patch['data'][0]['x'] = trace['x']
+    patch['data'][0]['y'] = trace['y']
+    patch['data'][0]['customdata'] = trace['customdata']
+    patch['data'][0]['marker']['color'] = trace['marker']['color']
+    patch['layout']['title']['text'] = fig['layout']['title']['text']
+    patch['layout']['annotations'][0]['visible'] = fig['layout']['annotations'][0]['visible']
+    return patch
+
+def build_charts(scope, position, min_minutes, search_term, u23_scope):
+    """Build the four chart figures"""
+    dataset = get_dataset(scope)
+    cell = dataset.filter_cube().cell(position, min_minutes) if not search_term else None
+    if cell is not None:
+        # Search-free filters: the chart series are a lookup in the filter cube
+        chart_title_suffix, cube_series = cell['charts'][u23_scope]
+    else:
+        viz_df, chart_title_suffix = select_viz_rows(scope, position, min_minutes, search_term, u23_scope)
+        if viz_df is None:
+            viz_df, chart_title_suffix = dataset.df.iloc[0:0], f" - {chart_title_suffix}"
+
+    figures = []
+    for i, (template, (chart_name, value_col, title, label, is_player_chart)) in enumerate(zip(chart_templates(), CHART_SPECS)):
+        with timed(f"chart.{chart_name}"):
+            title = f'{title}{chart_title_suffix}'
+            y_values, x_values, squads = [], [], []
+            if cell is not None:
+                y_values, x_values, squads = cube_series[i]
+            elif value_col in viz_df.columns and 'Squad' in viz_df.columns and viz_df[value_col].notna().sum() > 0:
+                if is_player_chart:
+                    # Top 10 players, ascending so the largest bar is on top
+                    chart_data = viz_df[['Player', value_col, 'Squad']].dropna(subset=[value_col]).nlargest(10, value_col).sort_values(value_col, ascending=True)
+                    y_values, squads = chart_data['Player'].tolist(), chart_data['Squad'].tolist()
                 else:
-                    most_tackles["success"] = "--"
-                most_tackles["position"] = tackler_data.get("Pos", "--")
-             except IndexError: print(f"IndexError finding most tackles ({tackles_col}).")
-             except Exception as e: print(f"Error finding most tackles: {e}")
+                    # Team totals
+                    chart_data = viz_df[viz_df['club_id'].to_numpy() >= 0].dropna(subset=[value_col]).groupby('club_id')[value_col].sum().sort_values(ascending=True)
+                    y_values = squads = club_registry.name_list(chart_data.index)
+                x_values = (chart_data[value_col] if is_player_chart else chart_data).tolist()
+            figures.append(fill_chart(template, title, y_values, x_values, squads, is_player_chart, dataset.team_color_map))
+    return figures
+
+def build_chart_outputs(scope, position, min_minutes, search_term, u23_scope):
+    """Figures for the first render plus the equivalent Patches for later updates"""
+    figures = build_charts(scope, position, min_minutes, search_term, u23_scope)
+    return figures, [figure_patch(fig) for fig in figures]
+
+# --- Filter Cube ---
+# Apart from the name search, the filters only take a few values: the dataset's position
+# dropdown values, MINUTES_THRESHOLDS and the two scopes. The cube holds, for every
+# (position, minutes) cell, the summary-card totals, the performer-card leaders (as row
+# positions in the dataset's table) and, for each scope, the chart title suffix and the
+# (y, x, squads) series of every chart. It is built once per Dataset, so a data reload builds
+# a new one, and search-free requests are answered from it without touching the rows.
+#
+# Each chart column is argsorted once (descending, stable); a cell's top 10 is then the first
+# ten rows of that order inside the cell's mask, the same rows nlargest(10) picks, re-sorted
+# ascending. Team totals are a bincount over club ids, except that the cells without a minutes
+# filter take their summary totals and team goals from the maintained aggregates.
+def _cube_values(values):
+    """Python numbers of a float array, whole numbers as int"""
+    if len(values) and np.array_equal(values, np.round(values)):
+        return values.astype('int64').tolist()
+    return values.tolist()
+
+def _deep_sizeof(obj, seen=None):
+    """Approximate bytes held by nested dicts, lists and tuples and what they contain"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(key, seen) + _deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    return size
+
+class FilterCube:
+    """Precomputed dashboard values for every search-free filter combination. Without a minutes
+    filter, the totals and team goals are sums over the maintained aggregate cells."""
+
+    def __init__(self, df, filter_index, aggregates):
+        n_rows = len(df)
+        column = lambda col: (pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+                              if col in df.columns else np.full(n_rows, np.nan))
+        players = df['Player'].astype(object).to_numpy() if 'Player' in df.columns else np.full(n_rows, None, dtype=object)
+        squad_codes, squad_names = pd.factorize(df['Squad'].astype(object), sort=True) if 'Squad' in df.columns else (np.full(n_rows, -1), pd.Index([]))
+        squad_values = np.asarray(squad_names, dtype=object)
+        squads = np.full(n_rows, None, dtype=object)
+        squads[squad_codes >= 0] = squad_values[squad_codes[squad_codes >= 0]]
+        club_ids = df['club_id'].to_numpy() if 'club_id' in df.columns else np.full(n_rows, -1)
+        clubs, club_codes = np.unique(club_ids, return_inverse=True)
+        club_names = np.asarray(club_registry.name_list(clubs), dtype=object)
+        has_chart_columns = {value_col: value_col in df.columns and 'Squad' in df.columns for _, value_col, _, _, _ in CHART_SPECS}
+        chart_values = {value_col: column(value_col) for _, value_col, _, _, _ in CHART_SPECS}
+        # Rows with a value, highest first; ties keep table order as nlargest does
+        chart_orders = {}
+        for value_col, values in chart_values.items():
+            order = np.argsort(-values, kind='stable')
+            chart_orders[value_col] = order[~np.isnan(values[order])]
+        leader_cols = list(dict.fromkeys(col for card in LEADER_CARDS for col in [card['metric']] + card['tiebreakers'] if col in df.columns))
+        leader_frame = df[leader_cols]
+        totals_frame = df[[col for col in ('Gls', 'Ast', 'Age') if col in df.columns]]
+
+        self.cells = {}
+        for position in ['all'] + filter_index.position_values:
+            for min_minutes in MINUTES_THRESHOLDS:
+                mask = filter_index.select(position, min_minutes, "")
+                u23_mask = mask & filter_index.u23_mask
+                u23_rows = np.flatnonzero(u23_mask)
+                from_aggregates = not min_minutes
+                if from_aggregates:
+                    cells = {'all': aggregate_cells(aggregates, position), 'u23': aggregate_cells(aggregates, position, u23_only=True)}
+                leaders = compute_leaders(leader_frame.iloc[u23_rows])
+                charts = {}
+                for u23_scope, viz_mask in (('all', mask), ('u23', u23_mask)):
+                    n_viz = int(np.count_nonzero(viz_mask))
+                    has_rows, suffix = viz_status(n_rows, int(np.count_nonzero(mask)), n_viz, u23_scope)
+                    series = []
+                    for _, value_col, _, _, is_player_chart in CHART_SPECS:
+                        values = chart_values[value_col]
+                        if not has_rows or not has_chart_columns[value_col]:
+                            series.append(([], [], []))
+                        elif is_player_chart:
+                            order = chart_orders[value_col]
+                            top = order[np.flatnonzero(viz_mask[order])[:10]]
+                            top = top[np.argsort(values[top], kind='stable')] # ascending, largest bar on top
+                            series.append((players[top].tolist(), _cube_values(values[top]), squads[top].tolist()))
+                        elif from_aggregates and value_col == 'Gls':
+                            goals = aggregate_team_goals(cells[u23_scope])
+                            teams = club_registry.name_list(goals.index)
+                            series.append((teams, _cube_values(goals.to_numpy(dtype='float64')), teams))
+                        else:
+                            counted = viz_mask & ~np.isnan(values) & (club_ids >= 0)
+                            team_rows = np.bincount(club_codes[counted], minlength=len(clubs))
+                            team_totals = np.bincount(club_codes[counted], weights=values[counted], minlength=len(clubs))
+                            teams = np.flatnonzero(team_rows)
+                            teams = teams[np.argsort(team_totals[teams], kind='stable')]
+                            series.append((club_names[teams].tolist(), _cube_values(team_totals[teams]), club_names[teams].tolist()))
+                    charts[u23_scope] = (suffix if has_rows else f" - {suffix}", series)
+                self.cells[(position, min_minutes)] = {
+                    'totals': ((aggregate_totals(cells['all']), aggregate_totals(cells['u23'])) if from_aggregates
+                               else (frame_totals(totals_frame[mask]), frame_totals(totals_frame[u23_mask]))),
+                    'leaders': {card: (None if row is None else int(u23_rows[row])) for card, row in leaders.items()},
+                    'charts': charts,
+                }
+        self.nbytes = _deep_sizeof(self.cells)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def cell(self, position, min_minutes):
+        """The cell of normalized filters, or None if they aren't in the cube"""
+        return self.cells.get((position, min_minutes))
+
+
+# --- Players Table (server-side paging, sorting and filtering) ---
+# The DataTable runs with page_action/sort_action/filter_action='custom': the server filters and
+# sorts the typed columns and sends back only the visible page. Number formatting is done in the
+# browser from the column format specs instead of string-formatting every cell in Python.
+TABLE_COLS_ORDERED = ['Player', 'Pos', 'Squad', 'Season', 'Age', 'MP', 'Min', 'Gls', 'Ast', 'Sh', 'SoT', 'SoT%', 'G/Sh', 'xG', 'KP', 'xA', '90s', 'Cmp', 'Tkl', 'Tkl%']
+TABLE_TEXT_COLS = ['Player', 'Pos', 'Squad', 'Season']
+TABLE_DECIMAL_COLS = ['SoT%', 'G/Sh', 'xG', 'xA', '90s', 'Tkl%'] # shown with 1 decimal, the rest as whole numbers
+TABLE_INFO_COLUMNS = [{"name": "Info", "id": "info"}]
+
+def table_column_spec(col):
+    """DataTable column definition with type and display format"""
+    if col in TABLE_TEXT_COLS:
+        return {"name": col, "id": col, "type": "text"}
+    if col == 'Tkl%':
+        fmt = Format(precision=1, scheme=Scheme.fixed).symbol(Symbol.yes).symbol_suffix('%')
+    elif col in TABLE_DECIMAL_COLS:
+        fmt = Format(precision=1, scheme=Scheme.fixed)
+    else:
+        fmt = Format(precision=0, scheme=Scheme.fixed)
+    return {"name": col, "id": col, "type": "numeric", "format": fmt.to_plotly_json()}
+
+# DataTable filter_query operators: the word forms, and the symbols the filter row also accepts
+FILTER_OPERATORS = ['ge', 'le', 'lt', 'gt', 'ne', 'eq', 'contains', 'datestartswith']
+FILTER_OPERATOR_SYMBOLS = {'>=': 'ge', '<=': 'le', '<': 'lt', '>': 'gt', '!=': 'ne', '=': 'eq'}
+FILTER_PART_PATTERN = re.compile(r'\s*\{(.+?)\}\s*([<>!]=|[<>=]|[a-z]+\b)\s*(.*)$')
+
+def split_filter_part(filter_part):
+    """Split one '{col} op value' clause of a filter_query into (col, op, value).
+
+    The operator is the token right after the column, so an operator word inside a quoted value
+    ('{Player} contains "Jorge Silva"') isn't taken for the operator.
+    """
+    match = FILTER_PART_PATTERN.match(filter_part)
+    if match is None:
+        return None, None, None
+    name, operator, value_part = match.groups()
+    operator = FILTER_OPERATOR_SYMBOLS.get(operator, operator)
+    if operator not in FILTER_OPERATORS:
+        return None, None, None
+    value_part = value_part.strip()
+    if not value_part:
+        return name, operator, None
+    quote = value_part[0]
+    if quote == value_part[-1] and quote in ("'", '"', '`') and len(value_part) > 1:
+        value = value_part[1:-1].replace('\\' + quote, quote)
+    else:
+        try:
+            value = float(value_part)
+        except ValueError:
+            value = value_part
+    return name, operator, value
+
+def apply_table_filter(rows_df, filter_query):
+    """Apply a DataTable filter_query to the typed rows"""
+    mask = np.ones(len(rows_df), dtype=bool)
+    for filter_part in filter_query.split(' && '):
+        col, op, value = split_filter_part(filter_part)
+        if col not in rows_df.columns or value is None:
+            continue
+        series = rows_df[col]
+        if op in ('contains', 'datestartswith'):
+            text = series.astype(str)
+            part_mask = text.str.startswith(str(value)) if op == 'datestartswith' else text.str.contains(str(value), regex=False)
+        elif isinstance(value, str) or col in TABLE_TEXT_COLS:
+            # Text comparison; a number typed into a text column is compared as written (7.0 -> '7')
+            if isinstance(value, float):
+                value = f"{value:g}"
+            part_mask = getattr(series.astype(str), op)(value)
         else:
-             print(f"Column '{tackles_col}' not found or no data for Most Tackles card.")
+            series = pd.to_numeric(series, errors='coerce')
+            if series.dtype == 'float32':
+                value = np.float32(value) # so '{xG} = 1.1' matches the stored float32 1.1
+            part_mask = getattr(series, op)(value)
+        mask &= part_mask.fillna(False).to_numpy(dtype=bool)
+    return rows_df[mask]
+
+@timed("table.view")
+def build_table_view(scope, position, min_minutes, search_term, u23_scope, sort_key, filter_query):
+    """Return (rows_df, columns) for the table, filtered and sorted but not yet paged.
+
+    rows_df is None when there is nothing to show; columns then holds the info message row.
+    """
+    viz_df, message = select_viz_rows(scope, position, min_minutes, search_term, u23_scope)
+    if viz_df is None:
+        info = {
+            'No Data Available': "No data loaded to display.",
+            'No Matching Data': "No players match the selected filters.",
+        }.get(message, f"No players match filters in '{u23_scope}' scope.")
+        return None, [{"info": info}]
+
+    table_cols_display = [col for col in TABLE_COLS_ORDERED if col in viz_df.columns]
+    if not table_cols_display:
+        return None, [{"info": "No displayable columns found."}]
+    rows_df = viz_df[table_cols_display]
+
+    if filter_query:
+        rows_df = apply_table_filter(rows_df, filter_query)
+
+    # Sorting (default sort by Gls or fallback)
+    if not sort_key:
+        default_col = 'Gls' if 'Gls' in rows_df.columns else ('Min' if 'Min' in rows_df.columns else table_cols_display[0])
+        sort_key = ((default_col, 'desc'),)
+    sort_key = [(col, direction) for col, direction in sort_key if col in rows_df.columns]
+    if sort_key:
+        rows_df = rows_df.sort_values(
+            by=[col for col, _ in sort_key], ascending=[direction == 'asc' for _, direction in sort_key],
+            kind='mergesort', na_position='last',
+        )
+    return rows_df, [table_column_spec(col) for col in table_cols_display]
+
+def quantize_column(values, decimals):
+    values = values.astype('float64').round(decimals)
+    return values.astype('Int64') if decimals == 0 else values
+
+def build_table(scope, position, min_minutes, search_term, u23_scope, page_current=0, page_size=TABLE_PAGE_SIZE, sort_by=None, filter_query=''):
+    """Return (page_data, table_columns, page_count) for one page of the players table"""
+    filters = normalize_filters(position, min_minutes, search_term, u23_scope)
+    sort_key = tuple((s['column_id'], s['direction']) for s in (sort_by or []))
+    view_args = (scope,) + filters + (sort_key, filter_query or '')
+    return cached_result('table_page', view_args + (page_current or 0, page_size or TABLE_PAGE_SIZE), build_table_page)
+
+def build_table_page(scope, position, min_minutes, search_term, u23_scope, sort_key, filter_query, page_current, page_size):
+    """Serialized records of one page of the (cached) sorted and filtered table view"""
+    rows_df, columns = cached_result('table', (scope, position, min_minutes, search_term, u23_scope, sort_key, filter_query), build_table_view)
+    if rows_df is None:
+        return columns, TABLE_INFO_COLUMNS, 1
+
+    with timed("table.serialize"):
+        page_count = max(1, -(-len(rows_df) // page_size))
+        page_df = rows_df.iloc[page_current * page_size:(page_current + 1) * page_size]
+        # Float columns go out at their display precision (table_column_spec): one decimal, or
+        # whole numbers as integers (1.1 and 3, not 1.100000023841858 and 3.0)
+        float_cols = [col for col in page_df.columns if pd.api.types.is_float_dtype(page_df[col])]
+        if float_cols:
+            page_df = page_df.assign(**{col: quantize_column(page_df[col], 1 if col in TABLE_DECIMAL_COLS else 0) for col in float_cols})
+        # Missing values go out as null; the column formats handle display
+        page_data = page_df.astype(object).where(page_df.notna(), None).to_dict('records')
+    return page_data, columns, page_count
+
+def update_dashboard(position, min_minutes, search_term, u23_scope, competition=None, seasons=None):
+    """All dashboard outputs for one set of filters, in layout order.
+
+    The Dash callbacks below serve the same values group by group; this entry point is for
+    running the dashboard computations without the server. competition/seasons default to
+    the latest season of the default competition.
+    """
+    scope = normalize_scope(competition, seasons)
+    filters = normalize_filters(position, min_minutes, search_term, u23_scope)
+    figures, _ = cached_result('charts', (scope,) + filters, build_chart_outputs)
+    table_data, table_columns, _ = build_table(scope, *filters)
+    return (
+        cached_result('summary', (scope,) + filters[:3], build_summary_cards)
+        + cached_result('performers', (scope,) + filters[:3], build_performer_cards)
+        + list(figures) + [table_data, table_columns]
+    )
 
+SCOPE_INPUTS = [Input('competition-filter', 'value'), Input('season-filter', 'value')]
+FILTER_INPUTS = SCOPE_INPUTS + [
+    Input('position-filter', 'value'), Input('min-minutes-filter', 'value'),
+    Input('player-search', 'value'),
+]
+FILTER_KEYS = ['competition', 'seasons', 'position', 'min_minutes', 'search_term', 'u23_scope']
+
+def filter_callback(outputs, with_u23_scope=False, states=()):
+    """Register a callback on the filter inputs (plus the scope toggle if with_u23_scope).
+
+    In client-side mode the filters are handled in the browser and the server callback only
+    answers the scopes too large to send there: it is triggered by the 'server-filters' store
+    instead, and shares its outputs with the clientside callback. The states are only passed in
+    server mode; in client-side mode their arguments are left at their defaults.
+    """
+    if not CLIENTSIDE_FILTERING:
+        return app.callback(outputs, FILTER_INPUTS + ([Input('u23-filter-toggle', 'value')] if with_u23_scope else []), list(states))
+    keys = FILTER_KEYS if with_u23_scope else FILTER_KEYS[:-1]
+
+    def register(func):
+        app.callback(
+            [Output(output.component_id, output.component_property, allow_duplicate=True) for output in outputs],
+            Input('server-filters', 'data'), prevent_initial_call=True,
+        )(lambda filters: func(*(filters[key] for key in keys)))
+        return func
+    return register
 
-    # --- Determine Data for Charts & Table ---
-    if u23_scope == 'u23':
-        viz_df = u23_subset_df
-        chart_title_suffix = " (U23 Only)"
-    else:
-        viz_df = filtered_df
-        chart_title_suffix = " (Filtered)"
-
-    plotly_font = dict(family='"IBM Plex Sans", sans-serif')
-
-    if viz_df.empty:
-         print(f"Viz DataFrame ('{u23_scope}') empty.")
-         empty_fig = go.Figure(layout={'title': f'No Data for Scope: {u23_scope}'})
-         empty_fig.update_layout(font=plotly_font)
-         empty_table_cols = [{"name": "Info", "id": "info"}]
-         empty_table_data = [{"info": f"No players match filters in '{u23_scope}' scope."}]
-         return (
-             total_players_u23, players_pct_str, avg_age_u23_str, avg_age_all_str,
-             int(total_goals_u23), goals_pct_str, int(total_assists_u23), assists_pct_str,
-             top_scorer["name"], top_scorer["goals"], top_scorer["xg"], top_scorer["age"],
-             best_playmaker["name"], best_playmaker["assists"], best_playmaker["key_passes"], best_playmaker["xa"],
-             most_passes["name"], most_passes["total"], most_passes["position"], most_passes["age"], # Pass values
-             most_tackles["name"], most_tackles["total"], most_tackles["success"], most_tackles["position"], # Tackle values
-             empty_fig, empty_fig, empty_fig, empty_fig,
-             empty_table_data, empty_table_cols
-         )
-
-    # --- Create Charts ---
-    chart_height = 350
-    chart_margin = dict(l=10, r=10, t=60, b=10)
-    hover_template_player = '<b>%{y}</b><br>Squad: %{customdata[0]}<br>%{label}: %{x}<extra></extra>'
-    unique_teams = viz_df["Squad"].unique() if "Squad" in viz_df.columns else []
-    color_map = {team: get_team_color(team) for team in unique_teams}
-
-    def create_empty_figure(title):
-        fig = go.Figure()
-        fig.add_annotation(text="No data for this chart", xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False, font=dict(size=14))
-        fig.update_layout(title=title, height=chart_height, margin=chart_margin, font=plotly_font)
-        return fig
-
-    # Define assist column for charts
-    assist_col_chart = 'Ast' if 'Ast' in viz_df.columns else None
-
-    # 1. Goals Chart
-    goals_fig = create_empty_figure(f'Top 10 Goal Scorers{chart_title_suffix}')
-    if 'Gls' in viz_df.columns and viz_df['Gls'].notna().sum() > 0:
-        goals_data = viz_df[['Player', 'Gls', 'Squad']].dropna(subset=['Gls']).nlargest(10, 'Gls').sort_values('Gls', ascending=True)
-        if not goals_data.empty:
-             goals_fig = px.bar(goals_data, x='Gls', y='Player', orientation='h', title=f'Top 10 Goal Scorers{chart_title_suffix}',
-                                color='Squad', color_discrete_map=color_map, labels={'Gls': 'Goals', 'Player': ''}, height=chart_height, custom_data=['Squad'])
-             goals_fig.update_traces(hovertemplate=hover_template_player.replace('%{label}', 'Goals'))
-             goals_fig.update_layout(margin=chart_margin, yaxis={'categoryorder':'total ascending'}, font=plotly_font)
-
-    # 2. Assists Chart
-    assisters_fig = create_empty_figure(f'Top 10 Assist Providers{chart_title_suffix}')
-    if assist_col_chart and viz_df[assist_col_chart].notna().sum() > 0:
-        assists_data = viz_df[['Player', assist_col_chart, 'Squad']].dropna(subset=[assist_col_chart]).nlargest(10, assist_col_chart).sort_values(assist_col_chart, ascending=True)
-        if not assists_data.empty:
-            assisters_fig = px.bar(assists_data, x=assist_col_chart, y='Player', orientation='h', title=f'Top 10 Assist Providers{chart_title_suffix}',
-                                   color='Squad', color_discrete_map=color_map, labels={assist_col_chart: 'Assists', 'Player': ''}, height=chart_height, custom_data=['Squad'])
-            assisters_fig.update_traces(hovertemplate=hover_template_player.replace('%{label}', 'Assists'))
-            assisters_fig.update_layout(margin=chart_margin, yaxis={'categoryorder':'total ascending'}, font=plotly_font)
-
-    # 3. Minutes Chart
-    minutes_fig = create_empty_figure(f'Top 10 Minutes Played{chart_title_suffix}')
-    if 'Min' in viz_df.columns and viz_df['Min'].notna().sum() > 0:
-        minutes_data = viz_df[['Player', 'Min', 'Squad']].dropna(subset=['Min']).nlargest(10, 'Min').sort_values('Min', ascending=True)
-        if not minutes_data.empty:
-            minutes_fig = px.bar(minutes_data, x='Min', y='Player', orientation='h', title=f'Top 10 Minutes Played{chart_title_suffix}',
-                                 color='Squad', color_discrete_map=color_map, labels={'Min': 'Minutes', 'Player': ''}, height=chart_height, custom_data=['Squad'])
-            minutes_fig.update_traces(hovertemplate=hover_template_player.replace('%{label}', 'Minutes'))
-            minutes_fig.update_layout(margin=chart_margin, yaxis={'categoryorder':'total ascending'}, font=plotly_font)
-
-    # 4. Team Goals Chart
-    teams_fig = create_empty_figure(f'Total Goals by Team{chart_title_suffix}')
-    if 'Gls' in viz_df.columns and 'Squad' in viz_df.columns and viz_df['Gls'].notna().sum() > 0:
-        team_goals_data = viz_df.dropna(subset=['Squad', 'Gls']).groupby('Squad')['Gls'].sum().reset_index().sort_values('Gls', ascending=True)
-        if not team_goals_data.empty:
-             teams_fig = px.bar(team_goals_data, x='Gls', y='Squad', orientation='h', title=f'Total Goals by Team{chart_title_suffix}',
-                           color='Squad', color_discrete_map=color_map, labels={'Gls': 'Total Goals', 'Squad': ''}, height=chart_height)
-             teams_fig.update_traces(hovertemplate='<b>%{y}</b><br>Total Goals: %{x}<extra></extra>')
-             teams_fig.update_layout(margin=chart_margin, yaxis={'categoryorder':'total ascending'}, font=plotly_font)
-
-    # --- Prepare Table Data ---
-    table_cols_ordered = ['Player', 'Pos', 'Squad', 'Age', 'MP', 'Min', 'Gls', 'Ast', 'Sh', 'SoT', 'SoT%', 'G/Sh', 'xG', 'KP', 'xA', '90s', 'Cmp', 'Tkl', 'Tkl%'] # Added new cols
-    table_cols_display = [col for col in table_cols_ordered if col in viz_df.columns]
-    table_data = []
-    table_columns = [{"name": "Info", "id": "info"}]
-
-    if table_cols_display:
-        table_data_df = viz_df[table_cols_display].copy()
-        # Formatting (keep as before, add new cols)
-        for col in ['SoT%', 'G/Sh', 'xG', 'xA', '90s', 'Tkl%']: # Added Tkl%
-             if col in table_data_df.columns:
-                 # Ensure numeric before formatting
-                 table_data_df[col] = pd.to_numeric(table_data_df[col], errors='coerce')
-                 table_data_df[col] = table_data_df[col].map('{:.1f}'.format, na_action='ignore')
-                 # Re-add % sign if needed
-                 if col == 'Tkl%':
-                      table_data_df[col] = table_data_df[col].astype(str) + '%'
-        for col in ['Age', 'MP', 'Min', 'Gls', 'Ast', 'Sh', 'SoT', 'KP', 'Cmp', 'Tkl']: # Added Cmp, Tkl
-             if col in table_data_df.columns:
-                 table_data_df[col] = pd.to_numeric(table_data_df[col], errors='coerce').astype('Int64').map('{:.0f}'.format, na_action='ignore')
-
-        # Sorting (keep default sort by Gls or fallback)
-        sort_column = 'Gls' if 'Gls' in table_data_df.columns else ('Min' if 'Min' in table_data_df.columns else table_cols_display[0])
-        sort_ascending = False
-        sort_column_numeric = sort_column + '_sort'
-        if sort_column in table_data_df.columns:
-             # Sort using original numeric data before formatting
-             table_data_df[sort_column_numeric] = pd.to_numeric(viz_df[sort_column], errors='coerce')
-             table_data_sorted = table_data_df.sort_values(by=sort_column_numeric, ascending=sort_ascending, na_position='last').drop(columns=[sort_column_numeric])
-        else:
-             table_data_sorted = table_data_df
+@app.callback(
+    [Output('season-filter', 'options'), Output('season-filter', 'value')],
+    Input('competition-filter', 'value'),
+    State('season-filter', 'value'),
+)
+@timed("callback.update_season_options")
+def update_season_options(competition, seasons):
+    version, competition, default_seasons = normalize_scope(competition, None)
+    available = state_for(version).catalog.seasons(competition)
+    kept = [season for season in (seasons or []) if season in available]
+    return [{"label": season, "value": season} for season in available], (kept or list(default_seasons))
+
+@app.callback(Output('position-filter', 'options'), SCOPE_INPUTS)
+@timed("callback.update_position_options")
+def update_position_options(competition, seasons):
+    return position_options(get_dataset(normalize_scope(competition, seasons)))
+
+SUMMARY_OUTPUTS = [
+    Output('total-players-u23', 'children'), Output('total-players-pct', 'children'),
+    Output('avg-age-u23', 'children'), Output('avg-age-all', 'children'),
+    Output('total-goals-u23', 'children'), Output('total-goals-pct', 'children'),
+    Output('total-assists-u23', 'children'), Output('total-assists-pct', 'children'),
+]
+CHART_OUTPUTS = [
+    Output('goals-chart', 'figure'), Output('assisters-chart', 'figure'),
+    Output('minutes-chart', 'figure'), Output('teams-chart', 'figure'),
+]
+
+@filter_callback(SUMMARY_OUTPUTS)
+@timed("callback.update_summary_cards")
+def update_summary_cards(competition, seasons, position, min_minutes, search_term):
+    scope = normalize_scope(competition, seasons)
+    filters = normalize_filters(position, min_minutes, search_term, None)[:3]
+    return cached_result('summary', (scope,) + filters, build_summary_cards)
+
+@filter_callback(leader_card_outputs())
+@timed("callback.update_performer_cards")
+def update_performer_cards(competition, seasons, position, min_minutes, search_term):
+    scope = normalize_scope(competition, seasons)
+    filters = normalize_filters(position, min_minutes, search_term, None)[:3]
+    return cached_result('performers', (scope,) + filters, build_performer_cards)
+
+@filter_callback(CHART_OUTPUTS, with_u23_scope=True, states=[State('goals-chart', 'figure'), State('teams-chart', 'figure')])
+@timed("callback.update_charts")
+def update_charts(competition, seasons, position, min_minutes, search_term, u23_scope, goals_figure=None, teams_figure=None):
+    scope = normalize_scope(competition, seasons)
+    filters = normalize_filters(position, min_minutes, search_term, u23_scope)
+    figures, patches = cached_result('charts', (scope,) + filters, build_chart_outputs)
+    # Full figures until the charts have been drawn, then only the changed parts. The first call
+    # can't be told by ctx.triggered_id: on page load update_season_options sets the seasons,
+    # which fires this callback again before any figure exists. In client-side mode the browser
+    # may have redrawn the charts since, so they are sent whole.
+    return patches if goals_figure and teams_figure and not CLIENTSIDE_FILTERING else figures
+
+@app.callback(
+    [
+        Output('players-table', 'data'), Output('players-table', 'columns'),
+        Output('players-table', 'page_count'), Output('players-table', 'page_current'),
+    ],
+    FILTER_INPUTS + [
+        Input('u23-filter-toggle', 'value'),
+        Input('players-table', 'page_current'), Input('players-table', 'page_size'),
+        Input('players-table', 'sort_by'), Input('players-table', 'filter_query'),
+    ],
+    State('players-table', 'columns'),
+)
+@timed("callback.update_table")
+def update_table(competition, seasons, position, min_minutes, search_term, u23_scope, page_current, page_size, sort_by, filter_query, current_columns):
+    # Anything other than turning the page starts again from the first page
+    requested_page = page_current or 0
+    if 'players-table.page_current' not in ctx.triggered_prop_ids:
+        requested_page = 0
+    table_data, table_columns, page_count = build_table(
+        normalize_scope(competition, seasons), position, min_minutes, search_term, u23_scope,
+        requested_page, page_size, sort_by, filter_query)
+    return (
+        table_data,
+        no_update if table_columns == current_columns else table_columns,
+        page_count,
+        no_update if requested_page == page_current else requested_page,
+    )
 
-        table_data = table_data_sorted.to_dict('records')
-        table_columns = [{"name": col, "id": col} for col in table_cols_display]
+# --- Client-side Filtering ---
+# With DASHBOARD_CLIENTSIDE=1 a scope of up to CLIENTSIDE_MAX_ROWS rows is sent to the browser
+# once, as typed columns in the 'client-data' store, together with the leader card registry,
+# the chart specs and templates and the team colours. A clientside callback then recomputes
+# the summary cards, performer cards and charts on every filter change without a request.
+# For a larger scope the store only holds a fallback marker: the clientside callback copies the
+# filters into 'server-filters' and the server callbacks answer as in the default mode. The
+# players table is paged on the server in both modes.
+CLIENTSIDE_TEXT_COLUMNS = ['Player', 'Pos', 'Squad', 'Club']
+
+def client_column_values(series):
+    """JSON-ready list of one column, with None for missing values"""
+    if series.name == 'U23':
+        return series.fillna(False).to_numpy(dtype=bool).tolist()
+    if series.name in CLIENTSIDE_TEXT_COLUMNS:
+        return series.astype(object).where(series.notna(), None).tolist()
+    values = pd.to_numeric(series, errors='coerce')
+    if values.dtype == 'float32':
+        # The shortest repr of a float32 is the value as written in the source data
+        values = values.to_numpy().astype(str).astype('float64')
     else:
-        table_data = [{"info": "No displayable columns found."}]
+        values = values.to_numpy(dtype='float64', na_value=np.nan)
+    return [None if np.isnan(value) else value for value in values.tolist()]
+
+@timed("client_data")
+def build_client_data(scope):
+    """Payload of the 'client-data' store for a scope"""
+    dataset = get_dataset(scope)
+    payload = {
+        'cards': LEADER_CARDS,
+        'charts': [{'column': value_col, 'title': title, 'player_chart': is_player_chart, 'template': template}
+                   for template, (_, value_col, title, _, is_player_chart) in zip(chart_templates(), CHART_SPECS)],
+        'default_color': DEFAULT_TEAM_COLOR, 'team_colors': dataset.team_color_map,
+        'n_rows': len(dataset.df), 'columns': None,
+    }
+    if len(dataset.df) > CLIENTSIDE_MAX_ROWS:
+        logger.debug("Scope %s has %d rows; filtering it on the server.", scope, len(dataset.df))
+        return payload
+    needed = ['Player', 'Pos', 'Squad', 'Age', 'Min', 'Gls', 'Ast', 'U23'] + [value_col for _, value_col, _, _, _ in CHART_SPECS]
+    needed += [col for card in LEADER_CARDS for col in [card['metric']] + card['tiebreakers'] + [field[2] for field in card['fields']]]
+    payload['columns'] = {col: client_column_values(dataset.df[col]) for col in dict.fromkeys(needed) if col in dataset.df.columns}
+    if 'club_id' in dataset.df.columns:
+        # Team totals are per club, under the club's registry name
+        payload['columns']['Club'] = club_registry.name_list(dataset.df['club_id'])
+    name_index = dataset.filter_index.name_index
+    if name_index is not None:
+        # Folded names, so the browser matches search words the way NameIndex does
+        payload['folded_names'] = [name_index.names[code] if code >= 0 else None for code in name_index.row_names.tolist()]
+    return payload
+
+# The browser side of build_summary_cards, build_performer_cards (compute_leaders) and build_charts
+CLIENTSIDE_FILTER_JS = r"""
+function(data, position, minMinutes, searchTerm, u23Scope, competition, seasons) {
+    if (!data) {
+        throw window.dash_clientside.PreventUpdate;
+    }
+    const noUpdate = window.dash_clientside.no_update;
+    const nDisplay = 8 + data.cards.reduce((n, card) => n + 1 + card.fields.length, 0) + data.charts.length;
+    const serverFallback = () => Array(nDisplay).fill(noUpdate).concat([{
+        competition: competition, seasons: seasons, position: position, min_minutes: minMinutes,
+        search_term: searchTerm, u23_scope: u23Scope,
+    }]);
+    if (!data.columns) {
+        return serverFallback();
+    }
 
+    const cols = data.columns;
+    const nRows = data.n_rows;
+    const col = (name) => cols[name] || Array(nRows).fill(null);
+    const pos = col('Pos'), minutes = col('Min'), player = col('Player'), u23 = col('U23');
+    const needle = (position && position !== 'all') ? String(position).toLowerCase() : null;
+    const threshold = minMinutes && minMinutes > 0 ? minMinutes : 0;
+
+    // Name search as in NameIndex: every search word equal to, a prefix of or (3+ letters) inside
+    // a word of the folded name. Typo matching is left to the server.
+    const fold = (text) => text.replace(/Đ/g, 'D').replace(/đ/g, 'd').normalize('NFKD').replace(/\p{M}/gu, '')
+        .toLowerCase().split(/[^\p{L}\p{N}]+/u).filter(word => word);
+    const queryWords = searchTerm ? fold(String(searchTerm)) : [];
+    let nameMatches = null;
+    if (queryWords.length) {
+        const nameWords = (data.folded_names || Array(nRows).fill(null)).map(name => name ? name.split(' ') : []);
+        nameMatches = Array(nRows).fill(true);
+        for (const query of queryWords) {
+            let anyMatch = false;
+            nameWords.forEach((words, i) => {
+                const match = words.some(word => word.startsWith(query) || (query.length >= 3 && word.includes(query)));
+                anyMatch = anyMatch || match;
+                nameMatches[i] = nameMatches[i] && match;
+            });
+            if (!anyMatch) {
+                return serverFallback();
+            }
+        }
+    }
 
-    print("Dashboard update complete.")
+    const rows = [], u23Rows = [];
+    for (let i = 0; i < nRows; i++) {
+        if (needle !== null && (pos[i] === null || !String(pos[i]).toLowerCase().includes(needle))) continue;
+        if (threshold > 0 && !(minutes[i] >= threshold)) continue;
+        if (nameMatches !== null && !nameMatches[i]) continue;
+        rows.push(i);
+        if (u23[i]) u23Rows.push(i);
+    }
 
-    # Return all values in the correct order matching the Outputs list
-    return (
-        # Summary Stats (8)
-        f"{total_players_u23}", players_pct_str, avg_age_u23_str, avg_age_all_str,
-        f"{int(total_goals_u23)}", goals_pct_str, f"{int(total_assists_u23)}", assists_pct_str,
-        # Top scorer (4)
-        top_scorer["name"], top_scorer["goals"], top_scorer["xg"], top_scorer["age"],
-        # Best playmaker (4)
-        best_playmaker["name"], best_playmaker["assists"], best_playmaker["key_passes"], best_playmaker["xa"],
-        # Most passes (4)
-        most_passes["name"], most_passes["total"], most_passes["position"], most_passes["age"],
-        # Most tackles (4)
-        most_tackles["name"], most_tackles["total"], most_tackles["success"], most_tackles["position"],
-        # Charts (4)
-        goals_fig, assisters_fig, minutes_fig, teams_fig,
-        # Table (2)
-        table_data, table_columns
+    const sum = (name, subset) => { const v = col(name); return subset.reduce((t, i) => t + (v[i] === null ? 0 : v[i]), 0); };
+    const mean = (name, subset) => {
+        const v = col(name); let t = 0, n = 0;
+        subset.forEach(i => { if (v[i] !== null) { t += v[i]; n++; } });
+        return n ? t / n : NaN;
+    };
+
+    // Summary cards
+    let summary;
+    if (!nRows || !rows.length) {
+        summary = Array(8).fill('--');
+    } else {
+        const goals = sum('Gls', rows), assists = sum('Ast', rows), age = mean('Age', rows);
+        const goalsU23 = sum('Gls', u23Rows), assistsU23 = sum('Ast', u23Rows);
+        const ageU23 = u23Rows.length ? mean('Age', u23Rows) : 0;
+        summary = [
+            String(u23Rows.length), `${(u23Rows.length / rows.length * 100).toFixed(1)}% of ${rows.length}`,
+            ageU23 > 0 ? ageU23.toFixed(1) : '--', age > 0 ? `vs. ${age.toFixed(1)} overall` : 'vs. --',
+            String(Math.trunc(goalsU23)), goals > 0 ? `${(goalsU23 / goals * 100).toFixed(1)}% of ${Math.trunc(goals)}` : '0% of 0',
+            String(Math.trunc(assistsU23)), assists > 0 ? `${(assistsU23 / assists * 100).toFixed(1)}% of ${Math.trunc(assists)}` : '0% of 0',
+        ];
+    }
+
+    // Performer cards: lexicographic argmax over the metric and tie-breakers, first row wins ties
+    const formatValue = (value, fmt) => {
+        if (value === null || value === undefined) return '--';
+        if (fmt === 'int') return Math.trunc(value);
+        if (fmt === 'decimal') return value.toFixed(1);
+        if (fmt === 'percent') return `${value.toFixed(1)}%`;
+        return value;
+    };
+    const performers = [];
+    data.cards.forEach(card => {
+        let candidates = cols[card.metric] ? u23Rows.filter(i => cols[card.metric][i] !== null) : [];
+        [card.metric].concat(card.tiebreakers).forEach(name => {
+            const v = cols[name];
+            if (candidates.length <= 1 || !v) return;
+            const best = Math.max(...candidates.map(i => v[i] === null ? -Infinity : v[i]));
+            if (best !== -Infinity) candidates = candidates.filter(i => v[i] === best);
+        });
+        if (!candidates.length) {
+            performers.push(...Array(1 + card.fields.length).fill('--'));
+            return;
+        }
+        const leader = candidates[0];
+        performers.push(player[leader] === null ? '--' : player[leader]);
+        card.fields.forEach(([, , name, fmt]) => performers.push(formatValue(cols[name] ? cols[name][leader] : null, fmt)));
+    });
+
+    // Charts: fill the templates as fill_chart does
+    let vizRows = u23Scope === 'u23' ? u23Rows : rows;
+    let suffix = u23Scope === 'u23' ? ' (U23 Only)' : ' (Filtered)';
+    if (!nRows) {
+        vizRows = []; suffix = ' - No Data Available';
+    } else if (!rows.length) {
+        vizRows = []; suffix = ' - No Matching Data';
+    } else if (!vizRows.length) {
+        suffix = ` - No Data for Scope: ${u23Scope === 'u23' ? 'u23' : 'all'}`;
+    }
+    const squad = col('Squad'), club = col('Club');
+    const figures = data.charts.map(chart => {
+        const v = col(chart.column);
+        const withValue = vizRows.filter(i => v[i] !== null && (chart.player_chart || club[i] !== null));
+        let y = [], x = [], squads = [];
+        if (cols[chart.column] && cols.Squad && withValue.length) {
+            if (chart.player_chart) {
+                // Top 10, ascending so the largest bar is on top
+                const top = withValue.slice().sort((a, b) => v[b] - v[a] || a - b).slice(0, 10).reverse();
+                y = top.map(i => player[i]); x = top.map(i => v[i]); squads = top.map(i => squad[i]);
+            } else {
+                const totals = new Map();
+                withValue.forEach(i => totals.set(club[i], (totals.get(club[i]) || 0) + v[i]));
+                const teams = Array.from(totals.keys()).sort((a, b) => totals.get(a) - totals.get(b));
+                y = squads = teams; x = teams.map(t => totals.get(t));
+            }
+        }
+        const template = chart.template;
+        const trace = Object.assign({}, template.data[0], {
+            x: x, y: y, customdata: chart.player_chart ? squads : [],
+            marker: Object.assign({}, template.data[0].marker, {color: squads.map(s => data.team_colors[s] || data.default_color)}),
+        });
+        const layout = Object.assign({}, template.layout, {
+            title: Object.assign({}, template.layout.title, {text: chart.title + suffix}),
+            annotations: [Object.assign({}, template.layout.annotations[0], {visible: x.length === 0})],
+        });
+        return {data: [trace], layout: layout};
+    });
+
+    return summary.concat(performers, figures, [noUpdate]);
+}
+"""
+
+if CLIENTSIDE_FILTERING:
+    @app.callback(Output('client-data', 'data'), SCOPE_INPUTS)
+    @timed("callback.update_client_data")
+    def update_client_data(competition, seasons):
+        return cached_result('client_data', (normalize_scope(competition, seasons),), build_client_data)
+
+    app.clientside_callback(
+        CLIENTSIDE_FILTER_JS,
+        SUMMARY_OUTPUTS + leader_card_outputs() + CHART_OUTPUTS + [Output('server-filters', 'data')],
+        [Input('client-data', 'data'), Input('position-filter', 'value'), Input('min-minutes-filter', 'value'),
+         Input('player-search', 'value'), Input('u23-filter-toggle', 'value')],
+        [State('competition-filter', 'value'), State('season-filter', 'value')],
     )
 
+# --- Similar Players ---
+# The player dropdown is searched on the server: its options are the profiles whose name
+# contains what has been typed, keyed 'competition|season|player|squad' so a player's seasons
+# are separate entries. The results table shows the per-90 rates of the matches.
+SIMILAR_PLAYERS_MIN_SEARCH = 2 # characters typed before the dropdown is searched
+
+def similar_player_options(profiles, rows):
+    return [{"label": profiles.label(row), "value": profiles.keys[row]} for row in rows]
+
+def similar_table_column_spec(col):
+    if col == 'Competition':
+        return {"name": col, "id": col, "type": "text"}
+    if col == 'Similarity':
+        return {"name": col, "id": col, "type": "numeric", "format": Format(precision=1, scheme=Scheme.percentage).to_plotly_json()}
+    if col in PER90_COLUMNS:
+        return {"name": f"{col}/90", "id": col, "type": "numeric", "format": Format(precision=2, scheme=Scheme.fixed).to_plotly_json()}
+    return table_column_spec(col)
+
+def similar_players(player_key, k=SIMILAR_PLAYERS_K, u23_only=False):
+    """DataFrame of the k profiles most similar to player_key, most similar first.
+
+    player_key is 'competition|season|player|squad'. Returns None if the player isn't in the
+    profiles (unknown, or under PROFILE_MIN_MINUTES).
+    """
+    profiles = get_state().player_profiles()
+    row = profiles.row(player_key)
+    if row is None:
+        return None
+    with timed("similar"):
+        rows, scores = profiles.similar(row, k, u23_only)
+        result = profiles.info.iloc[rows].reset_index(drop=True)
+        result.insert(0, 'Similarity', scores.astype('float64'))
+        return pd.concat([result, profiles.per90.iloc[rows].reset_index(drop=True).astype('float64')], axis=1)
+
+@app.callback(
+    Output('similar-player', 'options'),
+    Input('similar-player', 'search_value'),
+    State('similar-player', 'value'),
+)
+@timed("callback.update_similar_options")
+def update_similar_options(search_value, selected_key):
+    profiles = get_state().player_profiles()
+    selected = profiles.row(selected_key) if selected_key else None
+    if not search_value or len(search_value) < SIMILAR_PLAYERS_MIN_SEARCH:
+        # Keep the current selection listed so the dropdown can still display it
+        return no_update if selected is None else similar_player_options(profiles, [selected])
+    rows = list(profiles.search(search_value))
+    if selected is not None and selected not in rows:
+        rows.insert(0, selected)
+    return similar_player_options(profiles, rows)
+
+@app.callback(
+    [Output('similar-table', 'data'), Output('similar-table', 'columns')],
+    [Input('similar-player', 'value'), Input('similar-u23-toggle', 'value')],
+)
+@timed("callback.update_similar_table")
+def update_similar_table(player_key, u23_scope):
+    result = similar_players(player_key, u23_only=(u23_scope == 'u23')) if player_key else None
+    if result is None:
+        return [], []
+    # Rounded to display precision: similarity as a one-decimal percentage, rates to 2 decimals
+    data = result.round({col: 3 if col == 'Similarity' else 2 for col in ['Similarity'] + PER90_COLUMNS if col in result.columns})
+    data = data.astype(object).where(data.notna(), None).to_dict('records')
+    return data, [similar_table_column_spec(col) for col in result.columns]
+
+# --- Response Compression ---
+# Responses are gzip-compressed (brotli when the optional brotli package is installed and the
+# browser accepts it) in an after_request hook. The component bundles under
+# /_dash-component-suites/ don't change while the server runs, so their compressed bodies are
+# cached. Every callback response's size before and after compression is logged at DEBUG and
+# counted in /metrics under the id of its first output.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = 512
+COMPRESS_MIMETYPES = {'application/json', 'application/javascript', 'text/javascript', 'text/html', 'text/css', 'text/plain'}
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+compressed_assets = ResultCache(maxsize=64, ttl=float('inf'))
+
+def accepted_encoding():
+    """The encoding to use for this request, or None"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def compress_body(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+def callback_name():
+    """Id of the first output of the callback being served"""
+    outputs = (request.get_json(silent=True) or {}).get('outputs')
+    first = outputs[0] if isinstance(outputs, list) and outputs else outputs
+    return str(first.get('id', 'unknown')) if isinstance(first, dict) else 'unknown'
+
+@server.after_request
+def compress_response(response):
+    is_callback = request.path == '/_dash-update-component'
+    if response.direct_passthrough or response.is_streamed:
+        return response
+    raw_bytes = response.content_length or 0
+    encoding = None
+    if (200 <= response.status_code < 300 and response.mimetype in COMPRESS_MIMETYPES
+            and 'Content-Encoding' not in response.headers and raw_bytes >= COMPRESS_MIN_BYTES):
+        encoding = accepted_encoding()
+    if encoding:
+        if request.path.startswith('/_dash-component-suites/'):
+            cache_key = (request.full_path, encoding)
+            hit, body = compressed_assets.get(cache_key)
+            if not hit:
+                body = compress_body(response.get_data(), encoding)
+                compressed_assets.put(cache_key, body)
+        else:
+            body = compress_body(response.get_data(), encoding)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+    if is_callback:
+        name = callback_name()
+        sent_bytes = response.content_length or 0
+        metrics.observe_payload(name, raw_bytes, sent_bytes)
+        logger.debug("callback %s response: %d bytes, %d sent (%s)", name, raw_bytes, sent_bytes, encoding or "identity")
+    return response
+
+# --- Metrics Endpoint ---
+@server.route('/metrics')
+def metrics_endpoint():
+    """Span latencies, cache counters and the data version in Prometheus text format"""
+    lines = metrics.prometheus_lines()
+    caches = {"dashboard": dashboard_cache, "selection": selection_cache, "dataset": dataset_cache}
+    cache_stats = {name: cache.stats() for name, cache in caches.items()}
+    for stat, kind in (("hits", "counter"), ("misses", "counter"), ("evictions", "counter"), ("size", "gauge")):
+        metric = f"dashboard_cache_{stat}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# TYPE {metric} {kind}")
+        lines += [f'{metric}{{cache="{name}"}} {stats[stat]}' for name, stats in cache_stats.items()]
+    lines += ["# TYPE dashboard_data_version gauge", f"dashboard_data_version {data_state.version if data_state else 0}"]
+    # Memory held by the filter cubes of the cached datasets (only the ones built so far)
+    cubes = [dataset._cube for dataset in dataset_cache.values() if dataset._cube is not None]
+    lines += ["# TYPE dashboard_filter_cube_bytes gauge", f"dashboard_filter_cube_bytes {sum(cube.nbytes for cube in cubes)}"]
+    lines += ["# TYPE dashboard_filter_cube_cells gauge", f"dashboard_filter_cube_cells {sum(len(cube) for cube in cubes)}"]
+    lines += ["# TYPE dashboard_ready gauge", f"dashboard_ready {int(data_ready.is_set())}", "# TYPE dashboard_startup_seconds gauge"]
+    lines += [f'dashboard_startup_seconds{{phase="{phase}"}} {seconds:.6f}' for phase, seconds in startup_seconds.items()]
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+@server.route('/ready')
+def ready_endpoint():
+    """200 once the default data is loaded and warm, 503 before that"""
+    payload = {"ready": data_ready.is_set(), "version": data_state.version if data_state else None, "startup_seconds": startup_seconds}
+    return payload, (200 if data_ready.is_set() else 503)
+
+@server.route('/data-version')
+def data_version_endpoint():
+    """Version number of the data being served; it changes whenever new data is swapped in"""
+    state = get_state()
+    return {"version": state.version, "loaded_at": state.loaded_at}
+
 # --- Function to open browser (keep as is) ---
 def open_browser(port=8051):
     try:
         webbrowser.open_new(f"http://127.0.0.1:{port}/")
     except Exception as e:
-        print(f"Could not automatically open browser: {e}")
+        logger.warning("Could not automatically open browser: %s", e)
+
+# --- Production Serving ---
+# `serve` runs the Flask server under gunicorn with preload_app: the master process imports this
+# module, loads the default dataset and warms the latest season of every competition, then
+# forks the workers. The DataFrames, filter masks and chart templates are inherited
+# copy-on-write, so every worker reads the master's single copy instead of running load_data
+# itself. gc.freeze() moves everything loaded so far out of the garbage collector's reach, so
+# collections in the workers don't write to (and thereby copy) the shared pages.
+# The data watcher runs in the master too (threads don't survive fork, and a watcher per worker
+# would give every worker a private copy of each new version). On a change the master unfreezes
+# the collector's permanent generation, reloads keeping only the new version and collects the
+# old one, then warms and freezes the new version and sends itself SIGHUP, so gunicorn forks
+# fresh workers that share the new data and retires the old ones gracefully.
+def warm_datasets():
+    """Load the latest season of every competition into the dataset cache"""
+    warm_data()
+    for competition in get_state().catalog.competitions():
+        get_dataset(normalize_scope(competition, None)).filter_cube()
+
+def reload_in_master():
+    """reload_data for the gunicorn master, which serves no requests and so keeps only the new
+    version. The frozen objects are unfrozen first, so the superseded state (and its cyclic
+    garbage) is collected rather than kept in the permanent generation."""
+    gc.unfreeze()
+    version = reload_data(retain=1)
+    gc.collect()
+    return version
+
+def roll_workers(arbiter):
+    """Warm the newly loaded data in the master, freeze it, then have gunicorn replace its
+    workers with fresh forks that share it"""
+    warm_datasets()
+    gc.collect()
+    gc.freeze()
+    os.kill(arbiter.pid, signal.SIGHUP)
+
+def serve(host="0.0.0.0", port=8051, workers=None, threads=1, timeout=60, watch_interval=DATA_WATCH_INTERVAL_SECONDS):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        logger.error("gunicorn is not installed; install it (pip install gunicorn) to use 'serve'.")
+        raise SystemExit(1)
+
+    class DashboardApplication(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{host}:{port}", "workers": workers or min(4, os.cpu_count() or 1),
+                "threads": threads, "timeout": timeout, "preload_app": True,
+                "when_ready": lambda arbiter: start_data_watcher(watch_interval, lambda version: roll_workers(arbiter), reload_in_master),
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            warm_datasets()
+            gc.collect()
+            gc.freeze()
+            return server
+
+    logger.info("--- Serving A-League Dashboard on http://%s:%d/ ---", host, port)
+    DashboardApplication().run()
+
+# --- Report Export ---
+# `export-reports` writes a static HTML page and a JSON file for every club x position x scope
+# preset of one competition/season scope, with the same card values, figures and table rows the
+# dashboard would show for those filters narrowed to the club. Clubs are spread over a process
+# pool; each worker loads the scope's dataset once (forked workers inherit the master's copy)
+# and writes all the presets of its clubs.
+REPORT_POSITIONS = ['all', 'GK', 'DF', 'MF', 'FW']
+REPORT_SCOPES = ['all', 'u23']
+REPORTS_DIR = "reports"
+
+def _init_report_worker(scope):
+    get_dataset(scope)
+
+def report_values(scope, position, min_minutes, u23_scope):
+    """Summary cards, performer cards, figures and all table rows for one set of filters"""
+    filters = normalize_filters(position, min_minutes, "", u23_scope)
+    figures, _ = cached_result('charts', (scope,) + filters, build_chart_outputs)
+    rows_df, _ = cached_result('table', (scope,) + filters + ((), ''), build_table_view)
+    summary_ids = [output.component_id for output in SUMMARY_OUTPUTS]
+    performer_ids = [output.component_id for output in leader_card_outputs()]
+    return {
+        'summary': dict(zip(summary_ids, cached_result('summary', (scope,) + filters[:3], build_summary_cards))),
+        'performers': dict(zip(performer_ids, cached_result('performers', (scope,) + filters[:3], build_performer_cards))),
+        'figures': figures,
+        'table': [] if rows_df is None else rows_df.astype(object).where(rows_df.notna(), None).to_dict('records'),
+    }
 
-# --- Run the App (keep as is) ---
-if __name__ == '__main__':
-    port = 8051
-    print(f"--- Starting A-League Dashboard ---")
-    print(f"Attempting to launch on: http://127.0.0.1:{port}/")
+def render_report_html(title, values):
+    cards = "".join(f"<div class='card'><div class='label'>{escape(key)}</div><div class='value'>{escape(str(value))}</div></div>"
+                    for key, value in list(values['summary'].items()) + list(values['performers'].items()))
+    import plotly.io as pio
+    charts = "".join(pio.to_html(fig, full_html=False, include_plotlyjs='cdn' if i == 0 else False)
+                     for i, fig in enumerate(values['figures']))
+    table = pd.DataFrame(values['table']).to_html(index=False, na_rep="", border=0) if values['table'] else "<p>No players.</p>"
+    return (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{escape(title)}</title>"
+        "<style>body{font-family:'IBM Plex Sans',sans-serif;margin:20px}.cards{display:flex;flex-wrap:wrap;gap:10px}"
+        ".card{border:1px solid #e2e8f0;border-radius:6px;padding:8px 12px}.label{font-size:12px;color:#718096}"
+        "table{border-collapse:collapse}td,th{border:1px solid #e2e8f0;padding:4px 8px}</style></head>"
+        f"<body><h1>{escape(title)}</h1><div class='cards'>{cards}</div>{charts}{table}</body></html>"
+    )
+
+def export_club_reports(scope, club, output_dir, positions=REPORT_POSITIONS, u23_scopes=REPORT_SCOPES, min_minutes=0):
+    """Write the HTML and JSON reports of one club; return the paths written"""
+    from plotly.io.json import to_json_plotly
+    version, competition, seasons = scope[:3]
+    scope = club_scope(scope, club)
+    club_dir = os.path.join(output_dir, slugify(club))
+    os.makedirs(club_dir, exist_ok=True)
+    paths = []
+    for position in positions:
+        for u23_scope in u23_scopes:
+            with timed("report"):
+                values = report_values(scope, position, min_minutes, u23_scope)
+                title = f"{club} - {competition} {', '.join(seasons)} - {'All Positions' if position == 'all' else position} - {'U23 Only' if u23_scope == 'u23' else 'All Players'}"
+                base = os.path.join(club_dir, f"{slugify(position)}_{u23_scope}")
+                with open(base + ".html", "w", encoding="utf-8") as f:
+                    f.write(render_report_html(title, values))
+                payload = dict(values, club=club, competition=competition, seasons=list(seasons),
+                               position=position, u23_scope=u23_scope, min_minutes=min_minutes, data_version=version)
+                with open(base + ".json", "w", encoding="utf-8") as f:
+                    f.write(to_json_plotly(payload))
+                paths += [base + ".html", base + ".json"]
+    return paths
+
+def export_reports(competition=None, seasons=None, output_dir=REPORTS_DIR, clubs=None, workers=None, min_minutes=0):
+    """Export the reports of every club (or the given ones) in a process pool; return the paths written"""
+    scope = normalize_scope(competition, seasons)
+    df = get_dataset(scope).df
+    if not clubs:
+        club_ids = df['club_id'].to_numpy() if 'club_id' in df.columns else np.zeros(0, dtype='int16')
+        clubs = sorted(club_registry.name_list(np.unique(club_ids[club_ids >= 0])))
+    output_dir = os.path.join(output_dir, slugify(scope[1]), "_".join(scope[2]))
+    workers = workers or os.cpu_count() or 1
+    logger.info("Exporting reports for %d clubs to %s with %d workers.", len(clubs), output_dir, workers)
+    paths = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(clubs) or 1), initializer=_init_report_worker, initargs=(scope,)) as pool:
+        futures = {pool.submit(export_club_reports, scope, club, output_dir, min_minutes=min_minutes): club for club in clubs}
+        for future in as_completed(futures):
+            try:
+                paths += future.result()
+            except Exception as e:
+                logger.error("Report export failed for %s: %s", futures[future], e)
+    logger.info("Wrote %d report files.", len(paths))
+    return sorted(paths)
+
+startup_seconds["import"] = time.perf_counter() - STARTED_AT
+
+# --- Command Line ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="A-League U23 analytics dashboard")
+    subparsers = parser.add_subparsers(dest="command")
+    run_parser = subparsers.add_parser("run", help="Run the development server (default)")
+    run_parser.add_argument("--port", type=int, default=8051)
+    run_parser.add_argument("--watch-interval", type=float, default=DATA_WATCH_INTERVAL_SECONDS, help="Seconds between checks for new data files (0 disables hot reload)")
+    serve_parser = subparsers.add_parser("serve", help="Serve with multiple gunicorn workers sharing one preloaded dataset")
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=8051)
+    serve_parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count, at most 4)")
+    serve_parser.add_argument("--threads", type=int, default=1, help="Threads per worker")
+    serve_parser.add_argument("--timeout", type=int, default=60, help="Worker timeout in seconds")
+    serve_parser.add_argument("--watch-interval", type=float, default=DATA_WATCH_INTERVAL_SECONDS, help="Seconds between checks for new data files (0 disables hot reload)")
+    add_parser = subparsers.add_parser("add-partition", help="Add a season export to the partitioned data store")
+    add_parser.add_argument("csv_path", help="Cleaned FBref export for one competition and season")
+    add_parser.add_argument("--competition", required=True, help="e.g. 'A-League Men'")
+    add_parser.add_argument("--season", required=True, help="e.g. '2024-2025'")
+    export_parser = subparsers.add_parser("export-reports", help="Write HTML/JSON reports for every club x position x scope preset")
+    export_parser.add_argument("--competition", help="Default: the first competition in the store")
+    export_parser.add_argument("--season", action="append", dest="seasons", help="Repeat for several seasons (default: the latest)")
+    export_parser.add_argument("--club", action="append", dest="clubs", help="Repeat for several clubs (default: every club)")
+    export_parser.add_argument("--min-minutes", type=int, default=0)
+    export_parser.add_argument("--output-dir", default=REPORTS_DIR)
+    export_parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    ingest_parser = subparsers.add_parser("ingest-matchweek", help="Add a matchweek's per-match player rows to a season partition")
+    ingest_parser.add_argument("delta_path", help="CSV with one row per player per match (Player, Squad, Min, Gls, Ast, ...)")
+    ingest_parser.add_argument("--competition", required=True)
+    ingest_parser.add_argument("--season", required=True)
+    ingest_parser.add_argument("--matchweek", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "add-partition":
+        get_state().catalog.add_partition(args.csv_path, args.competition, args.season)
+        return
+    if args.command == "ingest-matchweek":
+        get_state().catalog.ingest_matchweek(args.delta_path, args.competition, args.season, args.matchweek)
+        return
+    if args.command == "export-reports":
+        export_reports(args.competition, args.seasons, args.output_dir, args.clubs, args.workers, args.min_minutes)
+        return
+    if args.command == "serve":
+        serve(args.host, args.port, args.workers, args.threads, args.timeout, args.watch_interval)
+        return
+
+    # --- Run the App ---
+    port = getattr(args, "port", 8051)
+    # debug=True serves from a reloader child process; only that process needs the data and a watcher
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_warmup()
+        start_data_watcher(getattr(args, "watch_interval", DATA_WATCH_INTERVAL_SECONDS))
+    logger.info("--- Starting A-League Dashboard ---")
+    logger.info("Attempting to launch on: http://127.0.0.1:%d/", port)
     Timer(1.5, lambda: open_browser(port)).start()
     # Use debug=True for development to see errors in browser
     # Use debug=False for 'production' or sharing
     app.run(debug=True, port=port)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+"""Fetch FBref player stat tables for several competitions and seasons into typed DataFrames.
+
+Replaces the requests/BeautifulSoup cells of the analysis notebook. Pages are fetched by a
+bounded thread pool through an on-disk HTTP cache (bodies stored once by content hash,
+revalidated with ETag/Last-Modified) and a per-host rate limiter, then parsed with lxml.
+Numbers arrive typed: thousands separators, 'yy-ddd' ages and 'au AUS' nations are handled at
+parse time, so no CSV needs fixing afterwards.
+
+    python fbref_ingest.py --competition "A-League Men" --season 2023-2024 --season 2024-2025
+
+Set --base-url (or FBREF_BASE_URL) to point the fetcher at a local stand-in server.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+import pandas as pd
+from lxml import html as lxml_html
+
+from name_keys import slugify
+
+logger = logging.getLogger("a_league_ingest")
+
+DEFAULT_BASE_URL = os.environ.get("FBREF_BASE_URL", "https://fbref.com")
+CACHE_DIR = "a_league_data/http_cache"
+OUTPUT_DIR = "a_league_processed"
+MAX_WORKERS = 4
+# FBref allows about 10 requests a minute per client
+MIN_REQUEST_INTERVAL_SECONDS = 6.0
+# A cached page younger than this is used without asking the server
+MAX_AGE_SECONDS = 60 * 60
+REQUEST_TIMEOUT_SECONDS = 30
+MAX_RETRIES = 3
+USER_AGENT = "a-league-analytics/1.0"
+
+# Competition name -> (FBref competition id, URL name)
+COMPETITIONS = {
+    'A-League Men': (65, 'A-League-Men'),
+    'A-League Women': (196, 'A-League-Women'),
+}
+# Table name -> (URL path segment, id of the player table in the page)
+STAT_TABLES = {
+    'standard': ('stats', 'stats_standard'),
+    'shooting': ('shooting', 'stats_shooting'),
+    'passing': ('passing', 'stats_passing'),
+    'defense': ('defense', 'stats_defense'),
+    'misc': ('misc', 'stats_misc'),
+}
+TEXT_COLUMNS = {'Player', 'Nation', 'Pos', 'Squad', 'Comp'}
+DROPPED_COLUMNS = {'Rk', 'Matches'}
+
+def _write_bytes_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+# --- HTTP Cache ---
+class HttpCache:
+    """On-disk HTTP cache: each body is stored once under its SHA-256, and an index maps every
+    URL to its body hash plus the validators (ETag, Last-Modified) used to revalidate it"""
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = Lock()
+        self._index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self._index = json.load(f)
+
+    def _object_path(self, sha256):
+        return os.path.join(self.root, "objects", sha256[:2], sha256)
+
+    def lookup(self, url):
+        with self._lock:
+            entry = self._index.get(url)
+        if entry and os.path.exists(self._object_path(entry["sha256"])):
+            return entry
+        return None
+
+    def body(self, entry):
+        with open(self._object_path(entry["sha256"]), "rb") as f:
+            return f.read()
+
+    def store(self, url, body, headers):
+        sha256 = hashlib.sha256(body).hexdigest()
+        object_path = self._object_path(sha256)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            _write_bytes_atomic(object_path, body)
+        entry = {
+            "sha256": sha256, "etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+        self._update(url, entry)
+        return entry
+
+    def touch(self, url, entry):
+        """Record that the server confirmed a cached body is still current"""
+        entry = dict(entry, fetched_at=time.time())
+        self._update(url, entry)
+        return entry
+
+    def _update(self, url, entry):
+        with self._lock:
+            self._index[url] = entry
+            os.makedirs(self.root, exist_ok=True)
+            _write_bytes_atomic(self.index_path, json.dumps(self._index, indent=2).encode())
+
+# --- Rate Limiting ---
+class HostRateLimiter:
+    """Spaces requests to the same host at least min_interval seconds apart, across threads"""
+
+    def __init__(self, min_interval=MIN_REQUEST_INTERVAL_SECONDS):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = Lock()
+
+    def wait(self, host):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+# --- Fetching ---
+class Fetcher:
+    """GET through the cache and rate limiter, revalidating stale entries with conditional requests"""
+
+    def __init__(self, cache, limiter, max_age=MAX_AGE_SECONDS, timeout=REQUEST_TIMEOUT_SECONDS):
+        self.cache = cache
+        self.limiter = limiter
+        self.max_age = max_age
+        self.timeout = timeout
+        self.counts = {"fresh": 0, "revalidated": 0, "downloaded": 0}
+        self._counts_lock = Lock()
+
+    def _count(self, outcome):
+        with self._counts_lock:
+            self.counts[outcome] += 1
+
+    def get(self, url):
+        entry = self.cache.lookup(url)
+        if entry and time.time() - entry["fetched_at"] < self.max_age:
+            self._count("fresh")
+            return self.cache.body(entry)
+
+        headers = {"User-Agent": USER_AGENT}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        host = urlsplit(url).netloc
+        for attempt in range(MAX_RETRIES + 1):
+            self.limiter.wait(host)
+            try:
+                with urlopen(Request(url, headers=headers), timeout=self.timeout) as response:
+                    body = response.read()
+                    self.cache.store(url, body, response.headers)
+                self._count("downloaded")
+                logger.info("Downloaded %s (%d bytes)", url, len(body))
+                return body
+            except HTTPError as e:
+                if e.code == 304 and entry:
+                    self.cache.touch(url, entry)
+                    self._count("revalidated")
+                    logger.debug("Not modified: %s", url)
+                    return self.cache.body(entry)
+                if e.code in (429, 503) and attempt < MAX_RETRIES:
+                    delay = _retry_after_seconds(e.headers.get("Retry-After"), default=self.limiter.min_interval * 2 ** attempt)
+                    logger.warning("%s returned %d, retrying in %.0fs", url, e.code, delay)
+                    time.sleep(delay)
+                    continue
+                raise
+
+def _retry_after_seconds(value, default):
+    if not value:
+        return default
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+# --- Parsing ---
+def _find_table(document, table_id):
+    """The table element, including FBref tables shipped inside HTML comments"""
+    tables = document.xpath(f'//table[@id="{table_id}"]')
+    if tables:
+        return tables[0]
+    for comment in document.xpath('//comment()'):
+        if table_id in comment.text:
+            tables = lxml_html.fromstring(comment.text).xpath(f'//table[@id="{table_id}"]')
+            if tables:
+                return tables[0]
+    return None
+
+def _column_names(table):
+    """Flatten the two header rows ('Playing Time' over 'Min' -> 'Playing Time Min')"""
+    header_rows = table.xpath('./thead/tr')
+    names = [cell.text_content().strip() for cell in header_rows[-1].xpath('./th|./td')]
+    if len(header_rows) < 2:
+        return names
+    over_names = []
+    for cell in header_rows[0].xpath('./th|./td'):
+        over_names.extend([cell.text_content().strip()] * int(cell.get('colspan', 1)))
+    return [f"{over} {name}".strip() for over, name in itertools.zip_longest(over_names, names, fillvalue='')][:len(names)]
+
+def _typed_column(name, values):
+    series = pd.Series(values, dtype=object)
+    if name in TEXT_COLUMNS:
+        series = series.where(series != '', None)
+        if name == 'Nation': # 'au AUS' -> 'AUS'
+            series = series.str.split().str[-1]
+        return series
+    if name == 'Age': # 'yy-ddd' -> yy
+        series = series.str.split('-').str[0]
+    return pd.to_numeric(series.str.replace(',', '', regex=False), errors='coerce')
+
+def parse_stat_table(page, table_id):
+    """Parse one FBref player table into a DataFrame with numeric columns typed"""
+    document = lxml_html.document_fromstring(page, parser=lxml_html.HTMLParser(encoding='utf-8'))
+    table = _find_table(document, table_id)
+    if table is None:
+        raise ValueError(f"table '{table_id}' not found")
+    names = _column_names(table)
+    rows = []
+    for tr in table.xpath('./tbody/tr'):
+        # Header rows repeated inside the body and spacer rows carry a class
+        if 'thead' in (tr.get('class') or '') or 'spacer' in (tr.get('class') or ''):
+            continue
+        cells = [cell.text_content().strip() for cell in tr.xpath('./th|./td')]
+        if len(cells) == len(names):
+            rows.append(cells)
+    columns = list(zip(*rows)) if rows else [[] for _ in names]
+    frame = pd.DataFrame({
+        name: _typed_column(name, values) for name, values in zip(names, columns) if name not in DROPPED_COLUMNS
+    })
+    # FBref repeats column names in some tables (e.g. per-90 blocks); keep the first
+    return frame.loc[:, ~frame.columns.duplicated()]
+
+# --- Refresh ---
+def stat_table_url(base_url, competition, season, table):
+    """URL of a competition's player stat page; season None is the current season"""
+    comp_id, comp_name = COMPETITIONS[competition]
+    path_segment = STAT_TABLES[table][0]
+    if season:
+        return f"{base_url}/en/comps/{comp_id}/{season}/{path_segment}/{season}-{comp_name}-Stats"
+    return f"{base_url}/en/comps/{comp_id}/{path_segment}/{comp_name}-Stats"
+
+def refresh(competitions, seasons, tables=tuple(STAT_TABLES), base_url=DEFAULT_BASE_URL, out_dir=OUTPUT_DIR,
+            max_workers=MAX_WORKERS, min_interval=MIN_REQUEST_INTERVAL_SECONDS, max_age=MAX_AGE_SECONDS, cache_dir=CACHE_DIR):
+    """Fetch and parse every competition x season x table; write each to
+    <out_dir>/<competition>/<season>/<table>.csv and return {(competition, season, table): frame}"""
+    fetcher = Fetcher(HttpCache(cache_dir), HostRateLimiter(min_interval), max_age)
+    jobs = list(itertools.product(competitions, seasons, tables))
+
+    def run(job):
+        competition, season, table = job
+        url = stat_table_url(base_url.rstrip('/'), competition, season, table)
+        frame = parse_stat_table(fetcher.get(url), STAT_TABLES[table][1])
+        path = os.path.join(out_dir, slugify(competition), season or "current", f"{table}.csv")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        frame.to_csv(path, index=False)
+        logger.info("%s %s %s: %d players -> %s", competition, season or "current", table, len(frame), path)
+        return frame
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = dict(zip(jobs, executor.map(run, jobs)))
+    logger.info("Fetched %d tables in %.1fs (%s)", len(jobs), time.perf_counter() - start,
+                ", ".join(f"{count} {outcome}" for outcome, count in fetcher.counts.items()))
+    return frames
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch FBref player stat tables")
+    parser.add_argument("--competition", action="append", choices=sorted(COMPETITIONS), help="Repeatable (default: A-League Men)")
+    parser.add_argument("--season", action="append", help="e.g. 2023-2024; repeatable (default: current season)")
+    parser.add_argument("--table", action="append", choices=list(STAT_TABLES), help="Repeatable (default: all)")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--out", default=OUTPUT_DIR)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--min-interval", type=float, default=MIN_REQUEST_INTERVAL_SECONDS, help="Seconds between requests to one host")
+    parser.add_argument("--max-age", type=float, default=MAX_AGE_SECONDS, help="Use cached pages younger than this without revalidating")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=os.environ.get("DASHBOARD_LOG_LEVEL", "INFO").upper(),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    refresh(args.competition or ['A-League Men'], args.season or [None], args.table or list(STAT_TABLES),
+            args.base_url, args.out, args.workers, args.min_interval, args.max_age, args.cache_dir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+"""Name normalization shared by the dashboard, player_linkage.py and fbref_ingest.py.
+
+The dashboard looks players up by the keys player_linkage.py writes into the crosswalk, so
+both must fold names with this one function.
+"""
+import unicodedata
+
+def fold_name(name):
+    """Lower-case, accent-free, punctuation-free form of a name ('Đurić' -> 'duric')"""
+    text = unicodedata.normalize('NFKD', str(name).replace('Đ', 'D').replace('đ', 'd'))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join("".join(c if c.isalnum() else " " for c in text).split())
+
+def slugify(name):
+    """Lower-case, hyphen-separated form of a name for file paths ('A-League Men' -> 'a-league-men')"""
+    return "".join(c if c.isalnum() else "-" for c in str(name).lower()).strip("-")
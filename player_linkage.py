@@ -0,0 +1,256 @@
+"""Link player records across FBref stat tables, seasons and competitions, and build the
+merged_player_stats.csv that the dashboard's load_data reads.
+
+Every record (one row of one stat table) gets a stable player_id. Records already in the
+persisted crosswalk keep their id, and a record whose (Player, Squad) exactly matches one
+already linked in the same season reuses it. Only the remaining new records are fuzzy-linked,
+and only against known records that share a blocking key:
+
+  * squad + phonetic (Soundex) code of the surname  -- name variants within a club
+  * birth year + phonetic code of the surname       -- players moving club or competition
+
+Names inside a block are compared with a vectorized character n-gram cosine similarity, so
+the work grows with block sizes rather than with the square of the player count.
+
+    python player_linkage.py --competition "A-League Men" --season 2024-2025
+"""
+import argparse
+import logging
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from name_keys import fold_name, slugify
+
+logger = logging.getLogger("a_league_linkage")
+
+PROCESSED_DIR = "a_league_processed"
+CROSSWALK_PATH = "a_league_data/player_crosswalk.csv"
+MERGED_PATH = "a_league_data/merged_player_stats.csv"
+# Stat tables written by fbref_ingest, merged in this order; the first supplies the shared columns
+TABLES = ['standard', 'shooting', 'passing', 'defense', 'misc']
+SHARED_COLUMNS = ['Player', 'Nation', 'Pos', 'Squad', 'Age', 'Born', '90s']
+CROSSWALK_COLUMNS = ['player_id', 'competition', 'season', 'table', 'Player', 'Squad', 'birth_year', 'name_key']
+
+NGRAM_SIZE = 3
+NGRAM_DIMENSIONS = 1024
+# A new record links to the best-scoring known player whose birth year doesn't contradict its
+# own (more than a year apart) if the names are this similar...
+NAME_THRESHOLD = 0.85
+# ...or, with the same squad, birth year (+-1) and first initial, this similar ('Joe' vs 'Joseph')
+RELAXED_NAME_THRESHOLD = 0.7
+
+# --- Name Keys ---
+SOUNDEX_CODES = {c: str(digit) for digit, letters in enumerate(['aeiouyhw', 'bfpv', 'cgjkqsxz', 'dt', 'l', 'mn', 'r']) for c in letters}
+
+def soundex(word):
+    """American Soundex code of a folded word ('' for no letters)"""
+    letters = [c for c in word if c.isalpha()]
+    if not letters:
+        return ""
+    code, previous = letters[0].upper(), SOUNDEX_CODES.get(letters[0], "")
+    for c in letters[1:]:
+        digit = SOUNDEX_CODES.get(c, "")
+        if digit not in ("0", previous) and digit:
+            code += digit
+        if c not in "hw": # h and w don't separate equal codes
+            previous = digit
+    return (code + "000")[:4]
+
+def name_vectors(names):
+    """L2-normalized hashed character n-gram count vectors, one row per name"""
+    vectors = np.zeros((len(names), NGRAM_DIMENSIONS), dtype=np.float32)
+    for row, name in enumerate(names):
+        padded = f"  {name} "
+        for i in range(len(padded) - NGRAM_SIZE + 1):
+            vectors[row, zlib.crc32(padded[i:i + NGRAM_SIZE].encode()) % NGRAM_DIMENSIONS] += 1
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+def season_start_year(season):
+    try:
+        return int(str(season)[:4])
+    except ValueError:
+        return None
+
+def record_keys(records):
+    """Add name_key, phonetic and birth_year columns used for blocking and scoring"""
+    records = records.copy()
+    records['name_key'] = records['Player'].map(fold_name)
+    records['phonetic'] = records['name_key'].map(lambda key: soundex(key.split()[-1]) if key else "")
+    birth_year = pd.to_numeric(records['Born'], errors='coerce') if 'Born' in records.columns else pd.Series(np.nan, index=records.index)
+    if 'Age' in records.columns:
+        start_year = records['season'].map(season_start_year).astype('float64')
+        birth_year = birth_year.fillna(start_year - pd.to_numeric(records['Age'], errors='coerce'))
+    records['birth_year'] = birth_year
+    records['squad_key'] = records['Squad'].map(fold_name)
+    return records
+
+# --- Crosswalk ---
+def load_crosswalk(path=CROSSWALK_PATH):
+    if os.path.exists(path):
+        return pd.read_csv(path, dtype={'season': str})
+    return pd.DataFrame(columns=CROSSWALK_COLUMNS)
+
+def save_crosswalk(crosswalk, path=CROSSWALK_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    crosswalk[CROSSWALK_COLUMNS].to_csv(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+
+# --- Linkage ---
+def _blocked_pairs(new, known):
+    """Candidate (new row, known row) positions sharing a squad or birth-year block"""
+    new = new.reset_index(drop=True).assign(new_pos=lambda f: np.arange(len(f)))
+    known = known.reset_index(drop=True).assign(known_pos=lambda f: np.arange(len(f)))
+    pairs = [new[['new_pos', 'squad_key', 'phonetic']].merge(known[['known_pos', 'squad_key', 'phonetic']], on=['squad_key', 'phonetic'])]
+    # Birth years derived from age can be a year out, so known players are also blocked a year either side
+    known_years = known[['known_pos', 'birth_year', 'phonetic']].dropna(subset=['birth_year'])
+    known_years = pd.concat([known_years.assign(birth_year=known_years['birth_year'] + offset) for offset in (-1, 0, 1)])
+    pairs.append(new[['new_pos', 'birth_year', 'phonetic']].dropna(subset=['birth_year']).merge(known_years, on=['birth_year', 'phonetic']))
+    pairs = pd.concat([p[['new_pos', 'known_pos']] for p in pairs]).drop_duplicates()
+    return pairs['new_pos'].to_numpy(), pairs['known_pos'].to_numpy()
+
+def _known_records(crosswalk, records):
+    """Crosswalk rows plus the records given an id so far in this run"""
+    frames = [frame for frame in (crosswalk, records.dropna(subset=['player_id'])[CROSSWALK_COLUMNS]) if len(frame)]
+    return pd.concat(frames, ignore_index=True) if frames else crosswalk
+
+def link_records(records, crosswalk):
+    """Assign player_id to every record; return (records, crosswalk with the new records added).
+
+    records needs competition, season, table, Player and Squad columns (plus Age/Born if known).
+    """
+    records = record_keys(records)
+    record_id = ['competition', 'season', 'table', 'Player', 'Squad']
+    crosswalk = crosswalk.astype({'season': str})
+    # 1. Records seen in an earlier run
+    records = records.merge(crosswalk[record_id + ['player_id']], on=record_id, how='left')
+    # 2. Exact (Player, Squad) matches within the same competition and season
+    known = _known_records(crosswalk, records)
+    same_season = known.drop_duplicates(['competition', 'season', 'Player', 'Squad'])[['competition', 'season', 'Player', 'Squad', 'player_id']]
+    unlinked = records['player_id'].isna()
+    exact = records.loc[unlinked, ['competition', 'season', 'Player', 'Squad']].merge(same_season, how='left')
+    records.loc[unlinked, 'player_id'] = exact['player_id'].to_numpy()
+    logger.info("%d records already in the crosswalk, %d matched exactly, %d to link.",
+                int((~unlinked).sum()), int(exact['player_id'].notna().sum()), int(records['player_id'].isna().sum()))
+
+    # 3. Fuzzy linkage of the rest, one (competition, season) group at a time so that records
+    # of the same season (other tables) that were just linked become candidates too
+    next_id = int(pd.to_numeric(known['player_id']).max()) + 1 if len(known) else 1
+    for _, group in records[records['player_id'].isna()].groupby(['competition', 'season'], sort=True):
+        known = record_keys_known(_known_records(crosswalk, records))
+        # Exact name repeats inside the group (same player in several tables) are linked once
+        first = group.drop_duplicates(['Player', 'Squad'])
+        ids = np.full(len(first), np.nan)
+        if len(known):
+            new_pos, known_pos = _blocked_pairs(first, known)
+            if len(new_pos):
+                new_vectors = name_vectors(first['name_key'].tolist())
+                known_vectors = name_vectors(known['name_key'].tolist())
+                similarity = np.einsum('ij,ij->i', new_vectors[new_pos], known_vectors[known_pos])
+                same_squad = first['squad_key'].to_numpy()[new_pos] == known['squad_key'].to_numpy()[known_pos]
+                birth_gap = np.abs(first['birth_year'].to_numpy(dtype='float64')[new_pos] - known['birth_year'].to_numpy(dtype='float64')[known_pos])
+                close_birth = birth_gap <= 1
+                same_initial = first['name_key'].str[:1].to_numpy()[new_pos] == known['name_key'].str[:1].to_numpy()[known_pos]
+                accepted = (np.isnan(birth_gap) | close_birth) & (
+                    (similarity >= NAME_THRESHOLD) | ((similarity >= RELAXED_NAME_THRESHOLD) & same_squad & close_birth & same_initial))
+                scored = pd.DataFrame({'new_pos': new_pos, 'player_id': known['player_id'].to_numpy()[known_pos],
+                                       'score': similarity + 0.1 * close_birth + 0.05 * same_squad})[accepted]
+                best = scored.sort_values('score', ascending=False, kind='mergesort').drop_duplicates('new_pos')
+                ids[best['new_pos'].to_numpy()] = best['player_id'].to_numpy(dtype='float64')
+        unmatched = np.isnan(ids)
+        ids[unmatched] = np.arange(next_id, next_id + unmatched.sum())
+        next_id += int(unmatched.sum())
+        first = first.assign(player_id=ids)
+        group_ids = group[['Player', 'Squad']].merge(first[['Player', 'Squad', 'player_id']], how='left')['player_id']
+        records.loc[group.index, 'player_id'] = group_ids.to_numpy()
+        logger.info("%s %s: %d linked to known players, %d new players.",
+                    group['competition'].iat[0], group['season'].iat[0], int((~unmatched).sum()), int(unmatched.sum()))
+
+    records['player_id'] = records['player_id'].astype('int64')
+    crosswalk = _known_records(crosswalk, records).drop_duplicates(record_id, keep='first')
+    return records, crosswalk
+
+def record_keys_known(known):
+    """Blocking keys for crosswalk rows (which store name_key and birth_year already)"""
+    known = known.copy()
+    known['name_key'] = known['name_key'].fillna('').astype(str)
+    known['phonetic'] = known['name_key'].map(lambda key: soundex(key.split()[-1]) if key else "")
+    known['squad_key'] = known['Squad'].map(fold_name)
+    known['birth_year'] = pd.to_numeric(known['birth_year'], errors='coerce')
+    return known
+
+# --- Merge ---
+def read_season_tables(processed_dir, competition, season):
+    """{table: frame} for the fbref_ingest CSVs of one competition season"""
+    season_dir = os.path.join(processed_dir, slugify(competition), season)
+    tables = {}
+    for table in TABLES:
+        path = os.path.join(season_dir, f"{table}.csv")
+        if os.path.exists(path):
+            tables[table] = pd.read_csv(path)
+    if 'standard' not in tables:
+        raise FileNotFoundError(f"No standard table in {season_dir}; run fbref_ingest.py for {competition} {season} first.")
+    return tables
+
+def merge_season(linked_tables):
+    """One row per player_id and squad with the columns of every table"""
+    merged = linked_tables['standard']
+    for table in TABLES[1:]:
+        if table not in linked_tables:
+            continue
+        frame = linked_tables[table]
+        extra = [col for col in frame.columns if col not in merged.columns and col not in SHARED_COLUMNS]
+        merged = merged.merge(frame[['player_id', 'Squad'] + extra].drop_duplicates(['player_id', 'Squad']), on=['player_id', 'Squad'], how='left')
+    return merged
+
+def build_merged(competitions, seasons, processed_dir=PROCESSED_DIR, crosswalk_path=CROSSWALK_PATH):
+    """Link and merge every competition season; return {(competition, season): merged frame}"""
+    crosswalk = load_crosswalk(crosswalk_path)
+    tables = {}
+    for competition in competitions:
+        for season in seasons:
+            for table, frame in read_season_tables(processed_dir, competition, season).items():
+                tables[(competition, season, table)] = frame.assign(competition=competition, season=season, table=table)
+    records, crosswalk = link_records(pd.concat(tables.values(), ignore_index=True), crosswalk)
+    save_crosswalk(crosswalk, crosswalk_path)
+
+    ids = records.set_index(['competition', 'season', 'table', 'Player', 'Squad'])['player_id']
+    merged = {}
+    for competition in competitions:
+        for season in seasons:
+            linked_tables = {}
+            for table in TABLES:
+                if (competition, season, table) in tables:
+                    frame = tables[(competition, season, table)]
+                    keys = pd.MultiIndex.from_frame(frame[['competition', 'season', 'table', 'Player', 'Squad']])
+                    linked_tables[table] = frame.drop(columns=['competition', 'season', 'table']).assign(player_id=ids.reindex(keys).to_numpy())
+            merged[(competition, season)] = merge_season(linked_tables)
+    return merged
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Link FBref player records and write merged player stats")
+    parser.add_argument("--competition", action="append", required=True)
+    parser.add_argument("--season", action="append", required=True)
+    parser.add_argument("--processed-dir", default=PROCESSED_DIR)
+    parser.add_argument("--crosswalk", default=CROSSWALK_PATH)
+    parser.add_argument("--out", help=f"Output CSV for a single competition season (default: {MERGED_PATH}); "
+                                      "several are written to <processed-dir>/<competition>/<season>/merged_player_stats.csv")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=os.environ.get("DASHBOARD_LOG_LEVEL", "INFO").upper(),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    merged = build_merged(args.competition, args.season, args.processed_dir, args.crosswalk)
+    for (competition, season), frame in merged.items():
+        if len(merged) == 1:
+            path = args.out or MERGED_PATH
+        else:
+            path = os.path.join(args.processed_dir, slugify(competition), season, "merged_player_stats.csv")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        frame.to_csv(path, index=False)
+        logger.info("Wrote %s (%d players)", path, len(frame))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from synthetic_data import write_dataset
+
+SYNTHETIC_ROWS = 600
+
+def import_dashboard(data_dir, module_name):
+    """Import a fresh copy of dashboard-code.py with data_dir as the working directory"""
+    os.environ.setdefault("DASHBOARD_LOG_LEVEL", "WARNING")
+    cwd = os.getcwd()
+    os.chdir(data_dir)
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT, "dashboard-code.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    return module
+
+@pytest.fixture(scope="session")
+def dashboard(tmp_path_factory):
+    """dashboard-code.py imported with an empty data directory as the working directory"""
+    return import_dashboard(tmp_path_factory.mktemp("dashboard_data"), "a_league_dashboard_test")
+
+@pytest.fixture(scope="session")
+def synthetic_dashboard(tmp_path_factory):
+    """dashboard-code.py serving SYNTHETIC_ROWS synthetic players; the data paths are relative, so
+    the session runs in its data directory"""
+    data_dir = tmp_path_factory.mktemp("synthetic_data")
+    write_dataset(str(data_dir), SYNTHETIC_ROWS)
+    module = import_dashboard(data_dir, "a_league_dashboard_synthetic_test")
+    cwd = os.getcwd()
+    os.chdir(data_dir)
+    yield module
+    os.chdir(cwd)
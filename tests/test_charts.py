@@ -0,0 +1,35 @@
+import json
+
+CHART_IDS = ['goals-chart', 'assisters-chart', 'minutes-chart', 'teams-chart']
+
+def post_update_charts(dashboard, changed, figures):
+    """POST the update_charts callback as the renderer does; returns the four figure values"""
+    inputs = {
+        ('competition-filter', 'value'): None, ('season-filter', 'value'): None,
+        ('position-filter', 'value'): 'all', ('min-minutes-filter', 'value'): 0,
+        ('player-search', 'value'): '', ('u23-filter-toggle', 'value'): 'all',
+    }
+    body = {
+        'output': '..' + '...'.join(f'{chart_id}.figure' for chart_id in CHART_IDS) + '..',
+        'outputs': [{'id': chart_id, 'property': 'figure'} for chart_id in CHART_IDS],
+        'inputs': [{'id': component_id, 'property': prop, 'value': value} for (component_id, prop), value in inputs.items()],
+        'state': [{'id': chart_id, 'property': 'figure', 'value': figures.get(chart_id)} for chart_id in ('goals-chart', 'teams-chart')],
+        'changedPropIds': [changed],
+    }
+    response = dashboard.server.test_client().post('/_dash-update-component', json=body)
+    assert response.status_code == 200
+    payload = json.loads(response.get_data())['response']
+    return [payload[chart_id]['figure'] for chart_id in CHART_IDS]
+
+def test_charts_are_sent_whole_until_drawn(synthetic_dashboard):
+    # On page load the seasons are set by update_season_options, so the first call the charts
+    # see is triggered by 'season-filter.value' and no figure exists yet
+    figures = post_update_charts(synthetic_dashboard, 'season-filter.value', {})
+    assert all('__dash_patch_update' not in figure for figure in figures)
+    goals = figures[0]
+    assert goals['data'][0]['orientation'] == 'h' and goals['data'][0]['hovertemplate']
+    assert goals['layout']['height'] and goals['layout']['margin']
+
+    drawn = dict(zip(CHART_IDS, figures))
+    patches = post_update_charts(synthetic_dashboard, 'position-filter.value', drawn)
+    assert all('__dash_patch_update' in patch for patch in patches)
@@ -0,0 +1,37 @@
+import pandas as pd
+
+from synthetic_data import generate_players
+
+def test_ingest_matchweek_keeps_the_aggregates_equal_to_a_recount(dashboard, tmp_path):
+    season_csv = tmp_path / "season.csv"
+    generate_players(300).to_csv(season_csv, index=False)
+    catalog = dashboard.DataCatalog(str(tmp_path / "store"))
+    catalog.add_partition(str(season_csv), "A-League Men", "2024-2025")
+
+    season = pd.read_parquet(tmp_path / "store" / "a-league-men" / "2024-2025.parquet")
+    changed = season.sample(40, random_state=1)
+    delta = pd.DataFrame({
+        'Player': changed['Player'].astype(object).tolist() + ['Zane Young'],
+        'Squad': changed['Squad'].astype(object).tolist() + ['Perth Glory'],
+        'Pos': changed['Pos'].astype(object).tolist() + ['FW'],
+        'Min': [90] * 40 + [23], 'Gls': [1, 0] * 20 + [1], 'Ast': [0, 1, 0, 0] * 10 + [0],
+        'Age': changed['Age'].astype('float64').tolist() + [19],
+    })
+    delta_csv = tmp_path / "matchweek.csv"
+    delta.to_csv(delta_csv, index=False)
+    entry = catalog.ingest_matchweek(str(delta_csv), "A-League Men", "2024-2025", matchweek=1)
+
+    rewritten = pd.read_parquet(tmp_path / "store" / entry["path"])
+    maintained = pd.read_parquet(tmp_path / "store" / entry["aggregates_path"]).set_index(dashboard.AGGREGATE_KEYS).sort_index()
+    recounted = dashboard.cell_aggregates(rewritten).sort_index()
+    assert len(rewritten) == len(season) + 1
+    assert str(rewritten['Age'].dtype) == str(season['Age'].dtype) == 'Int8'
+    pd.testing.assert_frame_equal(maintained, recounted, check_dtype=False)
+
+def test_schema_narrows_widened_integer_columns(dashboard):
+    frame = pd.DataFrame({
+        'Age': pd.array([19, 31, None], dtype='Int64'), 'Min': pd.array([90, 2430, 0], dtype='Int64'),
+        'Gls': pd.array([1, 2, None], dtype='Int8'), 'xG': [0.4, 1.2, None],
+    })
+    typed = dashboard.apply_player_schema(frame)
+    assert typed.dtypes.astype(str).to_dict() == {'Age': 'Int8', 'Min': 'Int16', 'Gls': 'Int8', 'xG': 'float32'}
@@ -0,0 +1,122 @@
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+
+import pandas as pd
+import pytest
+
+import fbref_ingest
+
+STANDARD_PAGE = """<html><body>
+<table id="stats_standard">
+<thead><tr><th>Rk</th><th>Player</th><th>Nation</th><th>Pos</th><th>Squad</th><th>Age</th><th>Min</th></tr></thead>
+<tbody>
+<tr><th>1</th><td>Nikola Đurić</td><td>au AUS</td><td>DF</td><td>Sydney FC</td><td>24-101</td><td>1,234</td></tr>
+<tr class="thead"><th>Rk</th><td>Player</td><td>Nation</td><td>Pos</td><td>Squad</td><td>Age</td><td>Min</td></tr>
+<tr><th>2</th><td>Kyle Milne</td><td>nz NZL</td><td>FW</td><td>Auckland FC</td><td>19-003</td><td>450</td></tr>
+</tbody>
+</table>
+</body></html>"""
+
+# FBref ships most tables after the first inside an HTML comment
+SHOOTING_PAGE = """<html><body>
+<div id="all_stats_shooting"><!--
+<table id="stats_shooting">
+<thead>
+<tr><th colspan="2"></th><th colspan="2">Standard</th></tr>
+<tr><th>Player</th><th>Squad</th><th>Gls</th><th>Sh</th></tr>
+</thead>
+<tbody>
+<tr><td>Nikola Đurić</td><td>Sydney FC</td><td>1</td><td>7</td></tr>
+<tr><td>Kyle Milne</td><td>Auckland FC</td><td>6</td><td>31</td></tr>
+</tbody>
+</table>
+--></div>
+</body></html>"""
+
+PASSING_PAGE = """<html><body>
+<table id="stats_passing">
+<thead><tr><th>Player</th><th>Squad</th><th>Cmp</th></tr></thead>
+<tbody><tr><td>Kyle Milne</td><td>Auckland FC</td><td>120</td></tr></tbody>
+</table>
+</body></html>"""
+
+STANDARD_ETAG = '"standard-v1"'
+RETRY_AFTER_SECONDS = 1
+
+class StandInFBref(BaseHTTPRequestHandler):
+    """Serves the fixture pages by stat path segment: 'stats' answers If-None-Match with 304,
+    'passing' is rate limited (429 + Retry-After) on its first request"""
+    pages = {'stats': STANDARD_PAGE, 'shooting': SHOOTING_PAGE, 'passing': PASSING_PAGE}
+    log = [] # (path segment, status, If-None-Match)
+    log_lock = Lock()
+
+    def do_GET(self):
+        segment = self.path.split('/')[5]
+        with self.log_lock:
+            first_request = not any(entry[0] == segment for entry in self.log)
+        if segment == 'passing' and first_request:
+            status, headers, body = 429, {'Retry-After': str(RETRY_AFTER_SECONDS)}, b''
+        elif segment == 'stats' and self.headers.get('If-None-Match') == STANDARD_ETAG:
+            status, headers, body = 304, {'ETag': STANDARD_ETAG}, b''
+        elif segment in self.pages:
+            status, headers, body = 200, {'ETag': STANDARD_ETAG} if segment == 'stats' else {}, self.pages[segment].encode()
+        else:
+            status, headers, body = 404, {}, b''
+        with self.log_lock:
+            self.log.append((segment, status, self.headers.get('If-None-Match')))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def stand_in_server():
+    StandInFBref.log = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInFBref)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", StandInFBref.log
+    server.shutdown()
+    server.server_close()
+
+def run_refresh(base_url, tmp_path):
+    return fbref_ingest.refresh(['A-League Men'], ['2024-2025'], ['standard', 'shooting', 'passing'], base_url=base_url,
+                                out_dir=str(tmp_path / "processed"), min_interval=0, max_age=0, cache_dir=str(tmp_path / "cache"))
+
+def test_refresh_against_a_stand_in_server(stand_in_server, tmp_path):
+    base_url, log = stand_in_server
+    start = time.monotonic()
+    frames = run_refresh(base_url, tmp_path)
+    assert time.monotonic() - start >= RETRY_AFTER_SECONDS
+
+    standard = frames[('A-League Men', '2024-2025', 'standard')]
+    assert standard['Player'].tolist() == ['Nikola Đurić', 'Kyle Milne']
+    assert standard['Nation'].tolist() == ['AUS', 'NZL']
+    assert standard['Age'].tolist() == [24, 19] and standard['Min'].tolist() == [1234, 450]
+    assert 'Rk' not in standard.columns
+
+    shooting = frames[('A-League Men', '2024-2025', 'shooting')]
+    assert list(shooting.columns) == ['Player', 'Squad', 'Standard Gls', 'Standard Sh']
+    assert shooting['Standard Sh'].tolist() == [7, 31]
+
+    passing = frames[('A-League Men', '2024-2025', 'passing')]
+    assert passing['Cmp'].tolist() == [120]
+    assert [status for segment, status, _ in log if segment == 'passing'] == [429, 200]
+
+    written = pd.read_csv(tmp_path / "processed" / "a-league-men" / "2024-2025" / "standard.csv")
+    assert written['Min'].tolist() == [1234, 450]
+
+def test_refresh_revalidates_stale_pages_with_etag(stand_in_server, tmp_path):
+    base_url, log = stand_in_server
+    first = run_refresh(base_url, tmp_path)
+    log.clear()
+    second = run_refresh(base_url, tmp_path)
+    assert ('stats', 304, STANDARD_ETAG) in log
+    key = ('A-League Men', '2024-2025', 'standard')
+    pd.testing.assert_frame_equal(first[key], second[key])
@@ -0,0 +1,32 @@
+import pytest
+
+MINUTES_THRESHOLDS = [0, 90, 270, 450, 900]
+
+def chart_series(figure):
+    trace = figure['data'][0]
+    return figure['layout']['title']['text'], list(trace['x']), sorted(zip(trace['y'], trace['x'], trace['customdata'] or [None] * len(trace['y'])), key=repr)
+
+@pytest.mark.parametrize("u23_scope", ['all', 'u23'])
+@pytest.mark.parametrize("min_minutes", MINUTES_THRESHOLDS)
+@pytest.mark.parametrize("position", ['all', 'GK', 'DF', 'MF', 'FW'])
+def test_cube_matches_the_row_path(synthetic_dashboard, monkeypatch, position, min_minutes, u23_scope):
+    dashboard = synthetic_dashboard
+    assert dashboard.MINUTES_THRESHOLDS == MINUTES_THRESHOLDS
+    scope = dashboard.normalize_scope(None, None)
+    dataset = dashboard.get_dataset(scope)
+    assert position == 'all' or position in dataset.filter_index.position_values
+    assert dataset.filter_cube().cell(position, min_minutes) is not None
+
+    from_cube = (
+        dashboard.build_summary_cards(scope, position, min_minutes, ''),
+        dashboard.build_performer_cards(scope, position, min_minutes, ''),
+        [chart_series(fig) for fig in dashboard.build_charts(scope, position, min_minutes, '', u23_scope)],
+    )
+    # The same filters through select_rows, compute_leaders and nlargest
+    monkeypatch.setattr(dashboard.FilterCube, 'cell', lambda self, position, min_minutes: None)
+    from_rows = (
+        dashboard.build_summary_cards(scope, position, min_minutes, ''),
+        dashboard.build_performer_cards(scope, position, min_minutes, ''),
+        [chart_series(fig) for fig in dashboard.build_charts(scope, position, min_minutes, '', u23_scope)],
+    )
+    assert from_cube == from_rows
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+def make_players():
+    return pd.DataFrame({
+        'Player': ['Jack Smith', 'Nikola Đurić', 'José García', 'Kai Kuol'],
+        'Pos': ['DF', 'MF,DF', 'FW', None],
+        'Min': [900, 95, 300, np.nan],
+        'U23': [True, False, True, True],
+    })
+
+def test_select_matches_the_filters(dashboard):
+    index = dashboard.FilterIndex(make_players())
+    assert index.select('DF', 0, '').tolist() == [True, True, False, False]
+    assert index.select('all', 270, '').tolist() == [True, False, True, False]
+    assert index.select('all', 0, 'duric').tolist() == [False, True, False, False]
+
+def test_masks_for_posted_values_are_not_kept(dashboard):
+    index = dashboard.FilterIndex(make_players())
+    position_masks, minutes_masks = dict(index._position_masks), dict(index._minutes_masks)
+    for minutes in range(1, 200):
+        index.minutes_mask(minutes)
+    assert index.minutes_mask(96).tolist() == [True, False, True, False]
+    assert index.position_mask('fw').tolist() == [False, False, True, False]
+    assert index.position_mask('nope').tolist() == [False, False, False, False]
+    assert index._position_masks.keys() == position_masks.keys()
+    assert index._minutes_masks.keys() == minutes_masks.keys()
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+NAMES = ['Ángel Di María', 'Angelo Dimitri', 'Nikola Đurić', 'José García', 'Kai Trewin', 'Kaiden Trewin', 'Mikail Trewin', None]
+
+@pytest.fixture
+def index(dashboard):
+    return dashboard.NameIndex(pd.Series(NAMES))
+
+def search(index, term):
+    name_ids, scores = index.search(term)
+    return [index.names[name_id] for name_id in name_ids], scores.round(3).tolist()
+
+def test_prefix_words(index):
+    # 'di' is a whole word of the first name and a prefix in the second
+    assert search(index, 'ang di') == (['angel di maria', 'angelo dimitri'], [0.95, 0.9])
+
+def test_infix_needs_three_letters(index):
+    assert search(index, 'arci') == (['jose garcia'], [0.75])
+    assert search(index, 'ka')[0] == ['kai trewin', 'kaiden trewin'] # not 'mikail'
+    assert search(index, 'kai')[0] == ['kai trewin', 'kaiden trewin', 'mikail trewin']
+
+def test_typo_within_the_edit_limit(index):
+    names, scores = search(index, 'garica')
+    assert names == ['jose garcia'] and 0 < scores[0] < 0.75
+
+def test_typo_beyond_the_edit_limit(index):
+    # Two edits from 'garcia'; six letters allow one
+    assert search(index, 'gurcoa') == ([], [])
+
+def test_multi_word_ranking(index):
+    # exact, then prefix, then infix for 'kai'; a typo for 'trewin' lowers every score alike
+    assert search(index, 'kai trewin') == (['kai trewin', 'kaiden trewin', 'mikail trewin'], [1.0, 0.95, 0.875])
+    names, scores = search(index, 'kai trewni')
+    assert names == ['kai trewin', 'kaiden trewin', 'mikail trewin'] and scores[0] < 0.875
+
+def test_row_scores(index):
+    scores = index.row_scores('jose')
+    assert scores.tolist() == [0, 0, 0, 1.0, 0, 0, 0, 0]
@@ -0,0 +1,17 @@
+import fbref_ingest
+import player_linkage
+from name_keys import fold_name, slugify
+
+def test_fold_name():
+    assert fold_name("Nikola Đurić") == "nikola duric"
+    assert fold_name("  José  GARCÍA-López ") == "jose garcia lopez"
+    assert fold_name("O'Neill, Jr.") == "o neill jr"
+
+def test_slugify():
+    assert slugify("A-League Men") == "a-league-men"
+    assert slugify("2024-2025") == "2024-2025"
+    assert slugify("Western Sydney Wanderers!") == "western-sydney-wanderers"
+
+def test_dashboard_and_crosswalk_fold_names_the_same_way(dashboard):
+    assert dashboard.fold_name is player_linkage.fold_name is fold_name
+    assert dashboard.slugify is player_linkage.slugify is fbref_ingest.slugify is slugify
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from player_linkage import CROSSWALK_COLUMNS, link_records
+
+def crosswalk_of(*rows):
+    return pd.DataFrame([dict(zip(CROSSWALK_COLUMNS, row)) for row in rows], columns=CROSSWALK_COLUMNS)
+
+def records_of(*rows):
+    return pd.DataFrame(rows, columns=['competition', 'season', 'table', 'Player', 'Squad', 'Born'])
+
+CROSSWALK = crosswalk_of(
+    (7, 'A-League Men', '2023-2024', 'standard', 'Mohamed Touré', 'Adelaide United', 2004, 'mohamed toure'),
+    (8, 'A-League Men', '2023-2024', 'standard', 'Bo Smith', 'Sydney FC', 2001, 'bo smith'),
+    (12, 'A-League Men', '2024-2025', 'standard', 'Kai Trewin', 'Brisbane Roar', 2001, 'kai trewin'),
+)
+
+def linked_ids(records, crosswalk=CROSSWALK):
+    linked, _ = link_records(records, crosswalk)
+    return dict(zip(zip(linked['table'], linked['Player']), linked['player_id']))
+
+def test_records_in_the_crosswalk_keep_their_id():
+    # Exactly the crosswalk's record, even though its name would fuzzy-match nobody else
+    ids = linked_ids(records_of(('A-League Men', '2024-2025', 'standard', 'Kai Trewin', 'Brisbane Roar', 2001)))
+    assert ids == {('standard', 'Kai Trewin'): 12}
+
+def test_exact_player_and_squad_match_in_the_same_season():
+    ids = linked_ids(records_of(('A-League Men', '2024-2025', 'shooting', 'Kai Trewin', 'Brisbane Roar', None)))
+    assert ids == {('shooting', 'Kai Trewin'): 12}
+
+def test_fuzzy_link_inside_a_birth_year_block():
+    # Spelled differently at another club a season later: blocked on birth year and surname code
+    ids = linked_ids(records_of(('A-League Men', '2024-2025', 'standard', 'Mohammed Toure', 'Melbourne City', 2004)))
+    assert ids == {('standard', 'Mohammed Toure'): 7}
+
+def test_no_link_below_the_name_threshold():
+    # Same squad, birth year and surname code, but the names are not similar enough
+    ids = linked_ids(records_of(('A-League Men', '2024-2025', 'standard', 'Alexander Smith', 'Sydney FC', 2001)))
+    assert ids[('standard', 'Alexander Smith')] not in (7, 8, 12)
+
+def test_new_players_get_new_ids_once_per_season():
+    records = records_of(
+        ('A-League Men', '2024-2025', 'standard', 'Zane Young', 'Perth Glory', 2003),
+        ('A-League Men', '2024-2025', 'passing', 'Zane Young', 'Perth Glory', None),
+        ('A-League Men', '2024-2025', 'standard', 'Luka Jovanović', 'Western United', 1999),
+    )
+    linked, crosswalk = link_records(records, CROSSWALK)
+    ids = dict(zip(zip(linked['table'], linked['Player']), linked['player_id']))
+    assert ids[('standard', 'Zane Young')] == ids[('passing', 'Zane Young')]
+    assert sorted({ids[('standard', 'Zane Young')], ids[('standard', 'Luka Jovanović')]}) == [13, 14]
+    assert len(crosswalk) == len(CROSSWALK) + 3
+    # A second run finds every record in the crosswalk and keeps its id
+    relinked, _ = link_records(records, crosswalk)
+    assert relinked['player_id'].tolist() == linked['player_id'].tolist()
@@ -0,0 +1,32 @@
+import gc
+import weakref
+
+import pytest
+
+def test_reload_drops_datasets_of_dropped_versions(synthetic_dashboard):
+    dashboard = synthetic_dashboard
+    first = dashboard.normalize_scope(None, None)
+    dashboard.get_dataset(first)
+    for _ in range(dashboard.RETAINED_DATA_STATES + 1):
+        dashboard.reload_data()
+        dashboard.get_dataset(dashboard.normalize_scope(None, None))
+    assert first[0] not in dashboard.data_states
+    assert {scope[0] for scope in dashboard.dataset_cache._entries} <= set(dashboard.data_states)
+    with pytest.raises(LookupError):
+        dashboard.state_for(first[0])
+    with pytest.raises(LookupError):
+        dashboard.get_dataset(first)
+    assert first not in dashboard.dataset_cache._entries
+
+def test_master_reload_collects_the_superseded_state(synthetic_dashboard):
+    dashboard = synthetic_dashboard
+    old_state = weakref.ref(dashboard.get_state())
+    gc.collect()
+    gc.freeze()
+    try:
+        version = dashboard.reload_in_master()
+        assert gc.get_freeze_count() == 0
+    finally:
+        gc.unfreeze()
+    assert list(dashboard.data_states) == [version]
+    assert old_state() is None
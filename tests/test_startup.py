@@ -0,0 +1,28 @@
+import json
+import os
+
+from conftest import import_dashboard
+
+def test_import_reads_no_data(tmp_path, monkeypatch):
+    store = tmp_path / "a_league_data" / "store"
+    store.mkdir(parents=True)
+    (store / "catalog.json").write_text(json.dumps({"partitions": [
+        {"competition": "A-League Men", "season": "2024-2025", "path": "a-league-men/2024-2025.parquet", "columns": []},
+    ]}))
+    (tmp_path / "a_league_data" / "player_crosswalk.csv").write_text(
+        "player_id,competition,season,table,Player,Squad,birth_year,name_key\n1,A-League Men,2024-2025,standard,Jack Smith,Sydney FC,2001,jack smith\n")
+    opened = []
+    real_open = open
+    def recording_open(path, *args, **kwargs):
+        opened.append(os.path.abspath(os.fspath(path)))
+        return real_open(path, *args, **kwargs)
+    monkeypatch.setattr("builtins.open", recording_open)
+
+    dashboard = import_dashboard(tmp_path, "a_league_dashboard_startup_test")
+    assert dashboard.data_state is None
+    assert not [path for path in opened if path.startswith(str(tmp_path))]
+
+    monkeypatch.chdir(tmp_path)
+    state = dashboard.get_state()
+    assert state.version == 1 and state.catalog.competitions() == ["A-League Men"]
+    assert str(store / "catalog.json") in opened
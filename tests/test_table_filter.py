@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+@pytest.mark.parametrize("filter_part, expected", [
+    ('{Player} contains "Jorge Silva"', ('Player', 'contains', 'Jorge Silva')),
+    ('{Player} contains "Kyle Milne"', ('Player', 'contains', 'Kyle Milne')),
+    ('{Player} eq "Renee Leeq"', ('Player', 'eq', 'Renee Leeq')),
+    ('{Min} >= 900', ('Min', 'ge', 900.0)),
+    ('{Min} < 90', ('Min', 'lt', 90.0)),
+    ('{Min} != 0', ('Min', 'ne', 0.0)),
+    ('{Gls} = 3', ('Gls', 'eq', 3.0)),
+    ('{Gls} gt 2', ('Gls', 'gt', 2.0)),
+    ('{SoT%} le 50', ('SoT%', 'le', 50.0)),
+    ('{Squad} contains ', ('Squad', 'contains', None)),
+])
+def test_split_filter_part(dashboard, filter_part, expected):
+    assert dashboard.split_filter_part(filter_part) == expected
+
+def test_split_filter_part_rejects_unknown_operators(dashboard):
+    assert dashboard.split_filter_part('{Player} like "Jorge"') == (None, None, None)
+    assert dashboard.split_filter_part('Player contains Jorge') == (None, None, None)
+
+def test_contains_filter_with_operator_words_in_the_name(dashboard):
+    rows = pd.DataFrame({
+        'Player': ['George Smith', 'Jorge Silva', 'Kyle Milne', 'Zane Young'],
+        'Min': pd.array([900, 450, 1200, 90], dtype='Int16'),
+    })
+    assert dashboard.apply_table_filter(rows, '{Player} contains "George Smith"')['Player'].tolist() == ['George Smith']
+    assert dashboard.apply_table_filter(rows, '{Player} contains "Kyle Milne"')['Player'].tolist() == ['Kyle Milne']
+    assert dashboard.apply_table_filter(rows, '{Player} contains "ge" && {Min} >= 500')['Player'].tolist() == ['George Smith']